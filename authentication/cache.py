@@ -0,0 +1,212 @@
+import copy
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from django.conf import settings
+from core.metrics import cache_requests
+from permissions.registry import get_token_permissions
+
+
+@dataclass(frozen=True)
+class VerifiedToken:
+    access_token: object
+    expires_at: float
+
+
+@dataclass(frozen=True)
+class Principal:
+    user: object
+    permissions: frozenset
+    expires_at: float
+
+    @property
+    def role(self):
+        return self.user.role
+
+
+class PrincipalCache:
+    def __init__(self, max_size=1024, ttl=60):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, user_id):
+        with self._lock:
+            principal = self._entries.get(user_id)
+
+            if principal is None:
+                cache_requests.inc(cache="principal", result="miss")
+
+                return None
+
+            if principal.expires_at <= time.monotonic():
+                del self._entries[user_id]
+                cache_requests.inc(cache="principal", result="miss")
+
+                return None
+
+            self._entries.move_to_end(user_id)
+
+        cache_requests.inc(cache="principal", result="hit")
+
+        return principal
+
+    def set(self, user, permissions=None):
+        role = user.role
+
+        if permissions is not None:
+            permissions = frozenset(permissions)
+        elif role:
+            permissions = frozenset(
+                name.lower() for name in role.permissions.values_list("name", flat=True)
+            )
+        else:
+            permissions = frozenset()
+
+        principal = Principal(
+            user=user,
+            permissions=permissions,
+            expires_at=time.monotonic() + self.ttl,
+        )
+
+        if self.max_size <= 0 or self.ttl <= 0:
+            return principal
+
+        with self._lock:
+            self._entries[user.id] = principal
+            self._entries.move_to_end(user.id)
+
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+        return principal
+
+    def get_user(self, user_id, token=None):
+        principal = self.get(user_id)
+
+        if principal is None:
+            from users.models import User
+
+            user = User.objects.select_related("role").get(id=user_id)
+            permissions = get_token_permissions(token, user) if token else None
+            principal = self.set(user, permissions=permissions)
+
+        # Each request gets its own instance so view code can never leak
+        # attribute changes into the shared cached copy.
+        return copy.copy(principal.user), principal
+
+    def invalidate_user(self, user_id):
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def invalidate_users(self, user_ids):
+        with self._lock:
+            for user_id in user_ids:
+                self._entries.pop(int(user_id), None)
+
+    def invalidate_role(self, role_id):
+        with self._lock:
+            stale_ids = [
+                user_id
+                for user_id, principal in self._entries.items()
+                if principal.user.role_id == role_id
+            ]
+
+            for user_id in stale_ids:
+                del self._entries[user_id]
+
+    def invalidate_roles(self, role_ids):
+        role_ids = set(role_ids)
+
+        with self._lock:
+            stale_ids = [
+                user_id
+                for user_id, principal in self._entries.items()
+                if principal.user.role_id in role_ids
+            ]
+
+            for user_id in stale_ids:
+                del self._entries[user_id]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class VerifiedTokenCache:
+    def __init__(self, max_size=4096):
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _key(self, token):
+        return hashlib.sha256(token.encode()).digest()
+
+    def get(self, token):
+        key = self._key(token)
+
+        with self._lock:
+            entry = self._entries.get(key)
+
+            if entry is None:
+                cache_requests.inc(cache="verified_token", result="miss")
+
+                return None
+
+            if entry.expires_at <= time.time():
+                del self._entries[key]
+                cache_requests.inc(cache="verified_token", result="miss")
+
+                return None
+
+            self._entries.move_to_end(key)
+
+        cache_requests.inc(cache="verified_token", result="hit")
+
+        return entry.access_token
+
+    def set(self, token, access_token):
+        if self.max_size <= 0:
+            return
+
+        entry = VerifiedToken(
+            access_token=access_token,
+            expires_at=access_token["exp"],
+        )
+
+        with self._lock:
+            key = self._key(token)
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def evict(self, token):
+        # Only drops this token's entry; the token itself stays valid until it
+        # expires and is simply verified again on its next use.
+        with self._lock:
+            self._entries.pop(self._key(token), None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+principal_cache = PrincipalCache(
+    max_size=settings.PRINCIPAL_CACHE["MAX_SIZE"],
+    ttl=settings.PRINCIPAL_CACHE["TTL"],
+)
+
+token_cache = VerifiedTokenCache(
+    max_size=settings.VERIFIED_TOKEN_CACHE["MAX_SIZE"],
+)
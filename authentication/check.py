@@ -1,7 +1,8 @@
 from rest_framework.authentication import BaseAuthentication
 from rest_framework.exceptions import AuthenticationFailed
 from rest_framework_simplejwt.tokens import AccessToken
-from users.models import User
+from authentication.cache import principal_cache, token_cache
+from core.metrics import auth_failures
 
 
 class JWTCookieAuthentication(BaseAuthentication):
@@ -12,14 +13,21 @@ class JWTCookieAuthentication(BaseAuthentication):
             return None
 
         try:
-            access_token = AccessToken(token)
+            access_token = token_cache.get(token)
+
+            if access_token is None:
+                access_token = AccessToken(token)
+                token_cache.set(token, access_token)
 
             user_id = access_token["user_id"]
-            user = User.objects.get(id=user_id)
+            user, principal = principal_cache.get_user(user_id, token=access_token)
+
+            request.principal = principal
 
             return (user, access_token)
 
         except Exception as e:
+            auth_failures.inc(reason="access_token")
             raise AuthenticationFailed("Authentication failed.")
 
     def authenticate_header(self, request):
@@ -0,0 +1,69 @@
+import time
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from rest_framework.test import APIRequestFactory
+from authentication.cache import VerifiedTokenCache, principal_cache
+from authentication.check import JWTCookieAuthentication
+from authentication.token.serializers import CustomTokenObtainPairSerializer
+from users.models import User
+
+
+class Command(BaseCommand):
+    help = "Measure per-request authentication CPU with and without the verified-token cache."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--iterations",
+            type=int,
+            default=20000,
+            help="Number of authenticated requests to simulate per run.",
+        )
+
+    def handle(self, *args, **kwargs):
+        iterations = kwargs["iterations"]
+
+        with transaction.atomic():
+            user = User.objects.create_user(
+                name="Benchmark",
+                email="benchmark.auth@example.com",
+                password="Benchmark123!",
+            )
+            token = str(CustomTokenObtainPairSerializer.get_token(user).access_token)
+
+            request = APIRequestFactory().get("/")
+            request.COOKIES["accessToken"] = token
+
+            # The principal cache stays warm in both runs so only token
+            # verification differs between them.
+            principal_cache.get_user(user.id)
+
+            uncached = self.run(request, iterations, VerifiedTokenCache(max_size=0))
+            cached = self.run(request, iterations, VerifiedTokenCache())
+
+            transaction.set_rollback(True)
+
+        self.stdout.write(f"Iterations: {iterations}")
+        self.stdout.write(f"Without token cache: {uncached:.2f} µs/request")
+        self.stdout.write(f"With token cache:    {cached:.2f} µs/request")
+        self.stdout.write(
+            self.style.SUCCESS(f"Speedup: {uncached / cached:.1f}x per request.")
+        )
+
+    def run(self, request, iterations, cache):
+        from authentication import check
+
+        authentication = JWTCookieAuthentication()
+        original_cache = check.token_cache
+        check.token_cache = cache
+
+        try:
+            start = time.perf_counter()
+
+            for _ in range(iterations):
+                authentication.authenticate(request)
+
+            elapsed = time.perf_counter() - start
+        finally:
+            check.token_cache = original_cache
+
+        return elapsed / iterations * 1_000_000
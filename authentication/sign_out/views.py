@@ -3,6 +3,7 @@ from rest_framework.permissions import AllowAny
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework_simplejwt.tokens import RefreshToken
+from authentication.cache import token_cache
 
 
 class SignOutView(APIView):
@@ -19,7 +20,6 @@ class SignOutView(APIView):
             )
 
         response = Response({"detail": "You have successfully signed out."})
-
         response.delete_cookie("accessToken")
         response.delete_cookie("refreshToken")
 
@@ -29,4 +29,8 @@ class SignOutView(APIView):
         except Exception as e:
             return Response({"detail": str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
+        access_token = request.COOKIES.get("accessToken")
+        if access_token:
+            token_cache.evict(access_token)
+
         return response
@@ -0,0 +1,48 @@
+from django.contrib.auth.signals import user_login_failed
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+from authentication.cache import principal_cache
+from core.metrics import auth_failures
+from permissions.models import Permission
+from roles.models import Role
+from users.models import User
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_user_principal(sender, instance, **kwargs):
+    principal_cache.invalidate_user(instance.id)
+
+
+@receiver(post_save, sender=Role)
+@receiver(post_delete, sender=Role)
+def invalidate_role_principals(sender, instance, **kwargs):
+    principal_cache.invalidate_role(instance.id)
+
+
+@receiver(m2m_changed, sender=Role.permissions.through)
+def invalidate_role_permission_principals(sender, instance, action, reverse, **kwargs):
+    if not action.startswith("post_"):
+        return
+
+    if reverse:
+        # The change came from the Permission side (permission.roles.add(...)),
+        # so every role in pk_set is affected, or all of them on clear.
+        pk_set = kwargs.get("pk_set")
+        if pk_set:
+            principal_cache.invalidate_roles(pk_set)
+        else:
+            principal_cache.clear()
+    else:
+        principal_cache.invalidate_role(instance.id)
+
+
+@receiver(post_save, sender=Permission)
+@receiver(post_delete, sender=Permission)
+def invalidate_permission_principals(sender, instance, **kwargs):
+    principal_cache.clear()
+
+
+@receiver(user_login_failed)
+def count_login_failure(sender, credentials, **kwargs):
+    auth_failures.inc(reason="credentials")
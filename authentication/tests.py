@@ -0,0 +1,251 @@
+from django.urls import reverse
+from rest_framework import status
+from unittest import mock
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import AccessToken
+from authentication.cache import (
+    PrincipalCache,
+    VerifiedTokenCache,
+    principal_cache,
+    token_cache,
+)
+from permissions.models import Permission, PermissionGroup
+from roles.models import Role
+from users.models import User
+
+
+class PrincipalCacheTests(APITestCase):
+    def setUp(self):
+        self.users_permission_group = PermissionGroup.objects.create(
+            name="users", description="Permissions related to user management."
+        )
+        self.view_user_permission = Permission.objects.create(
+            name="view_user",
+            description="Permission to view users.",
+            group=self.users_permission_group,
+        )
+        self.create_user_permission = Permission.objects.create(
+            name="create_user",
+            description="Permission to create a new user.",
+            group=self.users_permission_group,
+        )
+
+        self.view_role = Role.objects.create(name="viewer")
+        self.view_role.permissions.set([self.view_user_permission])
+
+        self.user_data = {
+            "name": "Viewer",
+            "email": "viewer@example.com",
+            "password": "Viewer123!",
+        }
+        self.user = User.objects.create_user(
+            name=self.user_data["name"],
+            email=self.user_data["email"],
+            password=self.user_data["password"],
+            role=self.view_role,
+        )
+
+        self.sign_in_url = reverse("sign-in")
+        self.user_url = lambda user_id: reverse("users-detail", args=[user_id])
+
+        principal_cache.clear()
+
+    def authenticate(self):
+        response = self.client.post(
+            self.sign_in_url,
+            {"email": self.user_data["email"], "password": self.user_data["password"]},
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_principal_cached_after_first_request(self):
+        """
+        Test that the authenticated principal is served from the cache on later requests.
+        """
+        self.authenticate()
+        self.client.get(self.user_url(self.user.id))
+        self.assertIsNotNone(principal_cache.get(self.user.id))
+
+        with self.assertNumQueries(0):
+            user, principal = principal_cache.get_user(self.user.id)
+
+        self.assertEqual(user.id, self.user.id)
+        self.assertEqual(user.role.id, self.view_role.id)
+        self.assertEqual(principal.permissions, frozenset({"view_user"}))
+
+    def test_cached_user_is_copied_per_request(self):
+        """
+        Test that callers receive their own copy of the cached user.
+        """
+        first_user, _ = principal_cache.get_user(self.user.id)
+        first_user.name = "Changed"
+        second_user, _ = principal_cache.get_user(self.user.id)
+        self.assertEqual(second_user.name, self.user_data["name"])
+
+    def test_user_save_invalidates_principal(self):
+        """
+        Test that saving a user drops their cached principal.
+        """
+        principal_cache.get_user(self.user.id)
+        self.user.name = "Updated Viewer"
+        self.user.save()
+        self.assertIsNone(principal_cache.get(self.user.id))
+
+    def test_role_permissions_change_invalidates_principal(self):
+        """
+        Test that changing a role's permissions drops the principals of its users.
+        """
+        principal_cache.get_user(self.user.id)
+        self.view_role.permissions.add(self.create_user_permission)
+        self.assertIsNone(principal_cache.get(self.user.id))
+
+        _, principal = principal_cache.get_user(self.user.id)
+        self.assertEqual(principal.permissions, frozenset({"view_user", "create_user"}))
+
+    def test_reverse_permission_change_invalidates_principal(self):
+        """
+        Test that changing a permission's roles drops the principals of those roles' users.
+        """
+        principal_cache.get_user(self.user.id)
+        self.create_user_permission.roles.add(self.view_role)
+        self.assertIsNone(principal_cache.get(self.user.id))
+
+    def test_role_delete_invalidates_principal(self):
+        """
+        Test that deleting a role drops the principals of its users.
+        """
+        principal_cache.get_user(self.user.id)
+        self.view_role.delete()
+        self.assertIsNone(principal_cache.get(self.user.id))
+
+        user, principal = principal_cache.get_user(self.user.id)
+        self.assertIsNone(user.role)
+        self.assertEqual(principal.permissions, frozenset())
+
+    def test_cache_is_bounded(self):
+        """
+        Test that the least recently used principal is evicted once the cache is full.
+        """
+        cache = PrincipalCache(max_size=1, ttl=60)
+        other_user = User.objects.create_user(
+            name="Other", email="other@example.com", password="Other123!"
+        )
+        cache.get_user(self.user.id)
+        cache.get_user(other_user.id)
+        self.assertEqual(len(cache), 1)
+        self.assertIsNone(cache.get(self.user.id))
+        self.assertIsNotNone(cache.get(other_user.id))
+
+    def test_cache_entries_expire(self):
+        """
+        Test that principals are not served once their TTL has passed.
+        """
+        cache = PrincipalCache(max_size=10, ttl=0)
+        cache.get_user(self.user.id)
+        self.assertIsNone(cache.get(self.user.id))
+
+
+class VerifiedTokenCacheTests(APITestCase):
+    def setUp(self):
+        self.user_data = {
+            "name": "Viewer",
+            "email": "viewer@example.com",
+            "password": "Viewer123!",
+        }
+        self.user = User.objects.create_user(
+            name=self.user_data["name"],
+            email=self.user_data["email"],
+            password=self.user_data["password"],
+        )
+
+        self.sign_in_url = reverse("sign-in")
+        self.sign_out_url = reverse("sign-out")
+        self.user_url = lambda user_id: reverse("users-detail", args=[user_id])
+
+        token_cache.clear()
+
+    def authenticate(self):
+        response = self.client.post(
+            self.sign_in_url,
+            {"email": self.user_data["email"], "password": self.user_data["password"]},
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        return response.cookies["accessToken"].value
+
+    def test_verified_token_skips_decoding(self):
+        """
+        Test that a token is only decoded and verified on its first request.
+        """
+        self.authenticate()
+        self.client.get(self.user_url(self.user.id))
+
+        with mock.patch("authentication.check.AccessToken") as access_token:
+            response = self.client.get(self.user_url(self.user.id))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        access_token.assert_not_called()
+
+    def test_sign_out_evicts_cached_token(self):
+        """
+        Test that signing out drops the cached verification of the access token.
+        """
+        token = self.authenticate()
+        self.client.get(self.user_url(self.user.id))
+        self.assertIsNotNone(token_cache.get(token))
+
+        self.client.post(self.sign_out_url)
+        self.assertIsNone(token_cache.get(token))
+
+    def test_failed_sign_out_keeps_cached_tokens(self):
+        """
+        Test that a sign-out with an invalid refresh token leaves the token cache alone.
+        """
+        token = self.authenticate()
+        self.client.get(self.user_url(self.user.id))
+        self.client.cookies.clear()
+        self.client.cookies["accessToken"] = token
+        self.client.cookies["refreshToken"] = "invalid"
+
+        response = self.client.post(self.sign_out_url)
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIsNotNone(token_cache.get(token))
+
+    def test_evict_keeps_other_tokens(self):
+        """
+        Test that evicting a token leaves other cached tokens in place.
+        """
+        cache = VerifiedTokenCache(max_size=10)
+        first_token = AccessToken.for_user(self.user)
+        second_token = AccessToken.for_user(self.user)
+        cache.set(str(first_token), first_token)
+        cache.set(str(second_token), second_token)
+
+        cache.evict(str(first_token))
+        self.assertIsNone(cache.get(str(first_token)))
+        self.assertIsNotNone(cache.get(str(second_token)))
+
+    def test_expired_token_not_served(self):
+        """
+        Test that a cached token is not served once its expiry has passed.
+        """
+        cache = VerifiedTokenCache(max_size=10)
+        access_token = AccessToken.for_user(self.user)
+        access_token["exp"] = 0
+        cache.set("expired", access_token)
+        self.assertIsNone(cache.get("expired"))
+
+    def test_cache_is_bounded(self):
+        """
+        Test that the least recently used token is evicted once the cache is full.
+        """
+        cache = VerifiedTokenCache(max_size=1)
+        first_token = AccessToken.for_user(self.user)
+        second_token = AccessToken.for_user(self.user)
+        cache.set("first", first_token)
+        cache.set("second", second_token)
+        self.assertEqual(len(cache), 1)
+        self.assertIsNone(cache.get("first"))
+        self.assertIs(cache.get("second"), second_token)
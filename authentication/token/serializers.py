@@ -1,4 +1,5 @@
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
+from permissions.registry import get_token_claims
 from roles.base.serializers import SimpleRoleSerializer
 
 
@@ -9,6 +10,9 @@ class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
 
         token["user_id"] = user.id
 
+        for claim, value in get_token_claims(user).items():
+            token[claim] = value
+
         return token
 
     def validate(self, attrs):
@@ -1,6 +1,10 @@
 from django.urls import reverse
 from rest_framework import status
 from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import AccessToken
+from permissions.models import Permission, PermissionGroup
+from permissions.registry import get_token_permissions
+from roles.models import Role
 from users.models import User
 
 
@@ -93,3 +97,111 @@ class AuthTokensTests(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
         self.assertIn("detail", response.data)
         self.assertEqual(response.data["detail"], "Authentication failed.")
+
+
+class PermissionClaimsTests(APITestCase):
+    def setUp(self):
+        self.skills_permission_group = PermissionGroup.objects.create(
+            name="skills", description="Permissions related to skill management."
+        )
+        self.view_skill_permission = Permission.objects.create(
+            name="view_skill",
+            description="Permission to view skills.",
+            group=self.skills_permission_group,
+        )
+        self.create_skill_permission = Permission.objects.create(
+            name="create_skill",
+            description="Permission to create a new skill.",
+            group=self.skills_permission_group,
+        )
+
+        self.view_role = Role.objects.create(name="viewer")
+        self.view_role.permissions.set(
+            [self.view_skill_permission, self.create_skill_permission]
+        )
+
+        self.user_data = {
+            "name": "Viewer",
+            "email": "viewer@example.com",
+            "password": "Viewer123!",
+        }
+        self.user = User.objects.create_user(
+            name=self.user_data["name"],
+            email=self.user_data["email"],
+            password=self.user_data["password"],
+            role=self.view_role,
+        )
+
+        self.sign_in_url = reverse("sign-in")
+        self.token_refresh_url = reverse("token-refresh")
+
+    def sign_in(self):
+        response = self.client.post(
+            self.sign_in_url,
+            {"email": self.user_data["email"], "password": self.user_data["password"]},
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        return response
+
+    def get_user(self):
+        return User.objects.select_related("role").get(id=self.user.id)
+
+    def test_sign_in_embeds_permission_claims(self):
+        """
+        Test that the access token carries the role, its version and its permission bitmask.
+        """
+        response = self.sign_in()
+        access_token = AccessToken(response.data["access"])
+        self.view_role.refresh_from_db()
+        self.assertEqual(access_token["role_id"], self.view_role.id)
+        self.assertEqual(access_token["role_version"], self.view_role.version)
+        self.assertEqual(
+            get_token_permissions(access_token, self.get_user()),
+            {"view_skill", "create_skill"},
+        )
+
+    def test_refresh_embeds_permission_claims(self):
+        """
+        Test that refreshed access tokens carry the current permission claims.
+        """
+        response = self.sign_in()
+        self.view_role.permissions.remove(self.create_skill_permission)
+        self.client.cookies.load({"refreshToken": response.data["refresh"]})
+        response = self.client.post(self.token_refresh_url, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        access_token = AccessToken(response.data["access"])
+        self.assertEqual(
+            get_token_permissions(access_token, self.get_user()), {"view_skill"}
+        )
+
+    def test_revoked_permissions_reject_token_claims(self):
+        """
+        Test that changing a role's permissions invalidates the claims of tokens issued before.
+        """
+        response = self.sign_in()
+        access_token = AccessToken(response.data["access"])
+        self.view_role.permissions.remove(self.create_skill_permission)
+        self.assertIsNone(get_token_permissions(access_token, self.get_user()))
+
+    def test_role_change_rejects_token_claims(self):
+        """
+        Test that moving a user to another role invalidates the claims of tokens issued before.
+        """
+        response = self.sign_in()
+        access_token = AccessToken(response.data["access"])
+        self.user.role = Role.objects.create(name="other")
+        self.user.save()
+        self.assertIsNone(get_token_permissions(access_token, self.get_user()))
+
+    def test_role_save_keeps_bumped_version(self):
+        """
+        Test that saving a role after changing its permissions does not roll back its version.
+        """
+        version = self.view_role.version
+        self.view_role.permissions.remove(self.create_skill_permission)
+        self.view_role.name = "renamed"
+        self.view_role.save()
+        self.view_role.refresh_from_db()
+        self.assertEqual(self.view_role.version, version + 1)
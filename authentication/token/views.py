@@ -4,6 +4,8 @@ from rest_framework.permissions import AllowAny
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework_simplejwt.tokens import RefreshToken
+from authentication.token.serializers import CustomTokenObtainPairSerializer
+from core.metrics import auth_failures
 from users.models import User
 
 
@@ -17,11 +19,11 @@ class CustomTokenRefreshView(APIView):
             refresh_token_obj = RefreshToken(refresh_token)
 
             user_id = refresh_token_obj["user_id"]
-            user = User.objects.get(id=user_id)
+            user = User.objects.select_related("role").get(id=user_id)
 
             refresh_token_obj.blacklist()
 
-            new_refresh_token_obj = RefreshToken.for_user(user)
+            new_refresh_token_obj = CustomTokenObtainPairSerializer.get_token(user)
             new_access_token_obj = new_refresh_token_obj.access_token
 
             new_refresh_token = str(new_refresh_token_obj)
@@ -52,4 +54,5 @@ class CustomTokenRefreshView(APIView):
             return response
 
         except Exception as e:
+            auth_failures.inc(reason="refresh_token")
             raise AuthenticationFailed("Authentication failed.")
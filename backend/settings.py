@@ -22,6 +22,7 @@ REST_FRAMEWORK = {
     "DEFAULT_PERMISSION_CLASSES": [
         "rest_framework.permissions.IsAuthenticated",
     ],
+    "DEFAULT_PAGINATION_CLASS": "core.pagination.BoundedPageNumberPagination",
 }
 
 SIMPLE_JWT = {
@@ -37,6 +38,88 @@ SIMPLE_JWT = {
     "AUTH_COOKIE_SAMESITE": "Lax",
 }
 
+PRINCIPAL_CACHE = {
+    "MAX_SIZE": int(os.getenv("PRINCIPAL_CACHE_MAX_SIZE", 1024)),
+    "TTL": int(os.getenv("PRINCIPAL_CACHE_TTL", 60)),
+}
+
+VERIFIED_TOKEN_CACHE = {
+    "MAX_SIZE": int(os.getenv("VERIFIED_TOKEN_CACHE_MAX_SIZE", 4096)),
+}
+
+ROLE_VERSION_CACHE_TTL = int(os.getenv("ROLE_VERSION_CACHE_TTL", 30))
+
+GROUPED_PERMISSIONS_CACHE_TTL = int(os.getenv("GROUPED_PERMISSIONS_CACHE_TTL", 300))
+
+USER_BULK_INGEST = {
+    "BATCH_SIZE": int(os.getenv("USER_BULK_INGEST_BATCH_SIZE", 500)),
+    "HASH_WORKERS": int(
+        os.getenv("USER_BULK_INGEST_HASH_WORKERS", os.cpu_count() or 1)
+    ),
+    "PARALLEL_HASH_MIN_ROWS": int(
+        os.getenv("USER_BULK_INGEST_PARALLEL_HASH_MIN_ROWS", 64)
+    ),
+}
+
+PAGINATION = {
+    "PAGE_SIZE": int(os.getenv("PAGINATION_PAGE_SIZE", 10)),
+    "MAX_PAGE_SIZE": int(os.getenv("PAGINATION_MAX_PAGE_SIZE", 50)),
+    "MAX_UNPAGINATED_RESULTS": int(
+        os.getenv("PAGINATION_MAX_UNPAGINATED_RESULTS", 1000)
+    ),
+    "EXPORT_CHUNK_SIZE": int(os.getenv("PAGINATION_EXPORT_CHUNK_SIZE", 2000)),
+}
+
+SEARCH_BACKEND = os.getenv("SEARCH_BACKEND", "auto")
+
+QUERY_INSTRUMENTATION = {
+    "ENABLED": os.getenv("QUERY_INSTRUMENTATION_ENABLED", "True") == "True",
+    "LOG_SAMPLE_RATE": float(os.getenv("QUERY_INSTRUMENTATION_LOG_SAMPLE_RATE", 0.1)),
+    "SLOW_REQUEST_MS": float(os.getenv("QUERY_INSTRUMENTATION_SLOW_REQUEST_MS", 500)),
+    "DUPLICATE_QUERIES_WARNING": int(
+        os.getenv("QUERY_INSTRUMENTATION_DUPLICATE_QUERIES_WARNING", 10)
+    ),
+}
+
+# The test runner silences core.instrumentation so its lines stay out of the
+# test output.
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "handlers": {"console": {"class": "logging.StreamHandler"}},
+    "loggers": {
+        "core.instrumentation": {
+            "handlers": ["console"],
+            "level": os.getenv("QUERY_INSTRUMENTATION_LOG_LEVEL", "INFO"),
+            "propagate": False,
+        },
+    },
+}
+
+METRICS = {
+    "ENABLED": os.getenv("METRICS_ENABLED", "True") == "True",
+    "TOKEN": os.getenv("METRICS_TOKEN", ""),
+    "DIRECTORY": os.getenv("METRICS_DIRECTORY", ""),
+    "FLUSH_INTERVAL": float(os.getenv("METRICS_FLUSH_INTERVAL", 1)),
+}
+
+# Turned on by the test runner; DEBUG only logs repeated serializer queries.
+QUERY_OPTIMIZER_STRICT = os.getenv("QUERY_OPTIMIZER_STRICT", "False") == "True"
+
+JOBS = {
+    "LEASE_SECONDS": int(os.getenv("JOBS_LEASE_SECONDS", 300)),
+    "MAX_ATTEMPTS": int(os.getenv("JOBS_MAX_ATTEMPTS", 3)),
+    "POLL_INTERVAL": float(os.getenv("JOBS_POLL_INTERVAL", 1)),
+    "RETENTION_SECONDS": int(os.getenv("JOBS_RETENTION_SECONDS", 604800)),
+}
+
+IDEMPOTENCY_KEY_TTL = int(os.getenv("IDEMPOTENCY_KEY_TTL", 86400))
+
+BATCH_PROMOTION = {
+    "CHUNK_SIZE": int(os.getenv("BATCH_PROMOTION_CHUNK_SIZE", 500)),
+    "MAX_SYNC_PAIRS": int(os.getenv("BATCH_PROMOTION_MAX_SYNC_PAIRS", 2000)),
+}
+
 INSTALLED_APPS = [
     "django.contrib.admin",
     "django.contrib.auth",
@@ -64,6 +147,7 @@ TEST_RUNNER = "core.tests.CustomTestRunner"
 MIDDLEWARE = [
     "corsheaders.middleware.CorsMiddleware",
     "django.middleware.security.SecurityMiddleware",
+    "core.middleware.InstrumentationMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
@@ -131,6 +215,8 @@ USE_TZ = True
 
 STATIC_URL = "static/"
 
+MEDIA_ROOT = os.getenv("MEDIA_ROOT", BASE_DIR / "media")
+
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
 CORS_ALLOWED_ORIGINS = os.getenv("CORS_ALLOWED_ORIGINS", "").split(",")
@@ -3,6 +3,7 @@ from django.urls import path, include
 from rest_framework.permissions import AllowAny
 from drf_yasg.views import get_schema_view
 from drf_yasg import openapi
+from core.views import metrics_view
 from permissions.urls import (
     urlpatterns_for_permissions,
     urlpatterns_for_permission_groups,
@@ -30,6 +31,7 @@ urlpatterns = [
     path("users/", include("users.urls")),
     path("teams/", include("teams.urls")),
     path("skills/", include("skills.urls")),
+    path("metrics", metrics_view, name="metrics"),
     path("swagger/", schema_view.with_ui("swagger", cache_timeout=0), name="swagger"),
     path("swagger.json/", schema_view.without_ui(cache_timeout=0), name="swagger-json"),
 ]
@@ -0,0 +1,100 @@
+import functools
+import hashlib
+import json
+from django.db import IntegrityError, transaction
+from rest_framework import status
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+from rest_framework.utils.encoders import JSONEncoder
+from core.models import IdempotencyKey
+
+
+IDEMPOTENCY_KEY_HEADER = "Idempotency-Key"
+MAX_KEY_LENGTH = 255
+
+
+def get_request_hash(request):
+    body = json.dumps(request.data, cls=JSONEncoder, sort_keys=True)
+
+    return hashlib.sha256(f"{request.path}\n{body}".encode()).hexdigest()
+
+
+def replay(record, request_hash):
+    if record.request_hash != request_hash:
+        return Response(
+            {"detail": "This idempotency key was used for a different request."},
+            status=status.HTTP_422_UNPROCESSABLE_ENTITY,
+        )
+
+    response = Response(record.response_data, status=record.response_status)
+    response["Idempotent-Replayed"] = "true"
+
+    return response
+
+
+def idempotent(scope):
+    """
+    Makes a view method safe to retry. Requests with an ``Idempotency-Key``
+    header run in a transaction that also stores their response; a retry by
+    the same user with the same key and body gets the stored response back
+    with a single query. Server errors are not stored, so they can be
+    retried. Requests without the header are not affected.
+    """
+
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(self, request, *args, **kwargs):
+            key = request.headers.get(IDEMPOTENCY_KEY_HEADER)
+
+            if not key:
+                return view(self, request, *args, **kwargs)
+
+            if len(key) > MAX_KEY_LENGTH:
+                raise ValidationError(
+                    {
+                        IDEMPOTENCY_KEY_HEADER: [
+                            f"Idempotency key cannot exceed {MAX_KEY_LENGTH} characters."
+                        ]
+                    }
+                )
+
+            request_hash = get_request_hash(request)
+            lookup = {"user": request.user, "scope": scope, "key": key}
+            record = IdempotencyKey.objects.filter(**lookup).first()
+
+            if record is not None and not record.is_expired:
+                return replay(record, request_hash)
+
+            replayed = False
+
+            with transaction.atomic():
+                if record is not None:
+                    record.delete()
+
+                response = view(self, request, *args, **kwargs)
+
+                if response.status_code < 500:
+                    try:
+                        with transaction.atomic():
+                            IdempotencyKey.objects.create(
+                                **lookup,
+                                request_hash=request_hash,
+                                response_status=response.status_code,
+                                response_data=json.loads(
+                                    json.dumps(response.data, cls=JSONEncoder)
+                                ),
+                            )
+                    except IntegrityError:
+                        # A concurrent request with the same key committed
+                        # first; its work stands and this one's is undone.
+                        transaction.set_rollback(True)
+                        replayed = True
+
+            if replayed:
+                return replay(IdempotencyKey.objects.get(**lookup), request_hash)
+
+            return response
+
+        return wrapper
+
+    return decorator
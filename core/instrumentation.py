@@ -0,0 +1,37 @@
+import time
+from collections import Counter
+
+
+class QueryRecorder:
+    """
+    An execute wrapper that counts the queries of one request, their total
+    time, the statements that ran more than once and the slowest statement.
+    Statements are recorded without their parameters.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.statements = Counter()
+        self.slowest_sql = None
+        self.slowest_duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - start
+
+            self.count += 1
+            self.duration += duration
+            self.statements[sql] += 1
+
+            if duration >= self.slowest_duration:
+                self.slowest_duration = duration
+                self.slowest_sql = sql
+
+    @property
+    def duplicates(self):
+        return sum(count - 1 for count in self.statements.values())
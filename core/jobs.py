@@ -0,0 +1,182 @@
+import logging
+import os
+import socket
+from datetime import timedelta
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+from core.models import Job, JobChunk
+
+
+logger = logging.getLogger(__name__)
+
+_handlers = {}
+
+
+class JobLeaseLost(Exception):
+    """
+    Raised when a worker tries to commit progress for a job that another worker
+    has taken over after its lease expired.
+    """
+
+
+def job_handler(kind):
+    def register(handler):
+        _handlers[kind] = handler
+
+        return handler
+
+    return register
+
+
+def get_handler(kind):
+    return _handlers.get(kind)
+
+
+def get_worker_id():
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def enqueue(kind, payload=None, input_file=None, created_by=None):
+    job = Job(kind=kind, payload=payload or {}, created_by=created_by)
+
+    if input_file is not None:
+        job.input_file.save(input_file.name, input_file, save=False)
+
+    job.save()
+
+    return job
+
+
+def claim_job(worker_id):
+    """
+    Claims the oldest queued job, or a running job whose worker stopped
+    sending heartbeats, for the given worker. Returns None when there is
+    nothing to do.
+    """
+    now = timezone.now()
+    lease_expired_at = now - timedelta(seconds=settings.JOBS["LEASE_SECONDS"])
+
+    claimable = Q(status=Job.Status.QUEUED) | Q(
+        status=Job.Status.RUNNING, heartbeat_at__lt=lease_expired_at
+    )
+
+    with transaction.atomic():
+        candidates = Job.objects.filter(claimable).order_by("id")
+
+        if connection.features.has_select_for_update_skip_locked:
+            candidates = candidates.select_for_update(skip_locked=True)
+
+        for job in candidates.only("id", "status", "heartbeat_at")[:10]:
+            # The conditional update makes the claim safe on databases without
+            # SKIP LOCKED: only one worker can move the job from the state it read.
+            claimed = Job.objects.filter(
+                id=job.id, status=job.status, heartbeat_at=job.heartbeat_at
+            ).update(
+                status=Job.Status.RUNNING,
+                worker_id=worker_id,
+                heartbeat_at=now,
+            )
+
+            if claimed:
+                break
+        else:
+            return None
+
+    job = Job.objects.get(id=job.id)
+
+    if job.attempts >= settings.JOBS["MAX_ATTEMPTS"]:
+        fail_job(job, "Job exceeded the maximum number of attempts.")
+
+        return claim_job(worker_id)
+
+    job.attempts += 1
+    job.started_at = job.started_at or now
+    job.save(update_fields=["attempts", "started_at"])
+
+    return job
+
+
+def commit_chunk(job, index, data, progress):
+    """
+    Records a chunk's output and the job's progress, and renews the job's
+    lease. Must be called inside the transaction that did the chunk's work.
+    """
+    updated = Job.objects.filter(
+        id=job.id, status=Job.Status.RUNNING, worker_id=job.worker_id
+    ).update(progress=progress, heartbeat_at=timezone.now())
+
+    if not updated:
+        raise JobLeaseLost(f"Job #{job.id} is no longer held by {job.worker_id}.")
+
+    JobChunk.objects.create(job=job, index=index, data=data)
+    job.progress = progress
+
+
+def finish_job(job):
+    job.status = Job.Status.SUCCEEDED
+    job.finished_at = timezone.now()
+    job.save(update_fields=["status", "finished_at"])
+
+
+def fail_job(job, error):
+    job.status = Job.Status.FAILED
+    job.error = error
+    job.finished_at = timezone.now()
+    job.save(update_fields=["status", "error", "finished_at"])
+
+
+def purge_finished_jobs(now=None):
+    """
+    Deletes the jobs that finished longer ago than the retention period,
+    with their chunks and any input file left behind. Returns the number of
+    jobs deleted.
+    """
+    finished_before = (now or timezone.now()) - timedelta(
+        seconds=settings.JOBS["RETENTION_SECONDS"]
+    )
+    jobs = Job.objects.filter(
+        status__in=[Job.Status.SUCCEEDED, Job.Status.FAILED],
+        finished_at__lt=finished_before,
+    )
+
+    for job in jobs.exclude(input_file="").only("id", "input_file"):
+        job.input_file.delete(save=False)
+
+    _, deleted = jobs.delete()
+
+    return deleted.get(Job._meta.label, 0)
+
+
+def run_job(job):
+    handler = get_handler(job.kind)
+
+    if handler is None:
+        fail_job(job, f"No handler is registered for job kind {job.kind}.")
+
+        return
+
+    try:
+        handler(job)
+    except JobLeaseLost:
+        # Another worker owns the job now and will finish it.
+        return
+    except Exception as e:
+        logger.exception("Job #%s (%s) failed.", job.id, job.kind)
+        fail_job(job, str(e) or e.__class__.__name__)
+
+        return
+
+    finish_job(job)
+
+
+def run_next_job(worker_id=None):
+    job = claim_job(worker_id or get_worker_id())
+
+    if job is None:
+        return False
+
+    run_job(job)
+
+    return True
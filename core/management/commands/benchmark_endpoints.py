@@ -0,0 +1,414 @@
+import json
+import math
+import re
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from http.cookies import SimpleCookie
+from urllib.error import HTTPError, URLError
+from urllib.parse import urlencode
+from urllib.request import Request, urlopen
+from django.core.management.base import BaseCommand, CommandError
+
+
+SERVER_TIMING_QUERIES = re.compile(r'db-queries;desc="(\d+)"')
+SEARCH_TERMS = ["turing", "hopper", "user42", "ada lovelace", "knuth 7"]
+
+
+class Sample:
+    def __init__(self, status, duration, queries):
+        self.status = status
+        self.duration = duration
+        self.queries = queries
+
+
+class Client:
+    """
+    A minimal HTTP client keeping the session cookies itself, since the
+    authentication cookies may be marked secure on a plain HTTP server.
+    """
+
+    def __init__(self, base_url, timeout):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.cookies = {}
+
+    def request(self, method, path, data=None, query=None):
+        url = f"{self.base_url}{path}"
+        if query:
+            url = f"{url}?{urlencode(query)}"
+
+        headers = {"Accept": "application/json"}
+        body = None
+
+        if data is not None:
+            body = json.dumps(data).encode()
+            headers["Content-Type"] = "application/json"
+        if self.cookies:
+            headers["Cookie"] = "; ".join(
+                f"{name}={value}" for name, value in self.cookies.items()
+            )
+
+        request = Request(url, data=body, headers=headers, method=method)
+        start = time.perf_counter()
+
+        try:
+            with urlopen(request, timeout=self.timeout) as response:
+                content = response.read()
+                status, response_headers = response.status, response.headers
+        except HTTPError as error:
+            content = error.read()
+            status, response_headers = error.code, error.headers
+
+        duration = time.perf_counter() - start
+
+        for header in response_headers.get_all("Set-Cookie") or []:
+            for name, morsel in SimpleCookie(header).items():
+                self.cookies[name] = morsel.value
+
+        match = SERVER_TIMING_QUERIES.search(response_headers.get("Server-Timing", ""))
+        sample = Sample(status, duration, int(match.group(1)) if match else None)
+
+        try:
+            payload = json.loads(content) if content else None
+        except ValueError:
+            payload = None
+
+        return sample, payload
+
+    def sign_in(self, email, password):
+        sample, payload = self.request(
+            "POST", "/auth/sign-in/", {"email": email, "password": password}
+        )
+
+        if sample.status != 200:
+            raise CommandError(f"Signing in as {email} failed: {payload}")
+
+        return sample
+
+
+def get_results(payload):
+    if isinstance(payload, dict):
+        return payload.get("results", [])
+
+    return payload or []
+
+
+class Command(BaseCommand):
+    help = (
+        "Drive the hot API endpoints of a running server with concurrent "
+        "clients and report latency percentiles, throughput and queries per "
+        "request as JSON."
+    )
+
+    scenarios = [
+        "sign-in",
+        "token-refresh",
+        "user-list",
+        "user-search",
+        "role-list",
+        "team-detail",
+        "skill-tree",
+        "expectation-progress-list",
+        "approve-and-advance",
+    ]
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--base-url",
+            default="http://localhost:8000",
+            help="Server to benchmark, e.g. a local runserver on a synthetic dataset.",
+        )
+        parser.add_argument("--email", default="admin@example.com")
+        parser.add_argument("--password", default="Admin123!")
+        parser.add_argument(
+            "--concurrency", type=int, default=8, help="Concurrent clients."
+        )
+        parser.add_argument(
+            "--requests",
+            type=int,
+            default=200,
+            help="Measured operations per endpoint.",
+        )
+        parser.add_argument(
+            "--warmup",
+            type=int,
+            default=10,
+            help="Unmeasured operations per endpoint before measuring.",
+        )
+        parser.add_argument(
+            "--endpoints",
+            default=",".join(self.scenarios),
+            help="Comma-separated endpoints to benchmark. approve-and-advance "
+            "changes data, so reseed before comparing runs that include it.",
+        )
+        parser.add_argument("--timeout", type=float, default=30)
+        parser.add_argument(
+            "--output",
+            default="benchmark-endpoints.json",
+            help="File the JSON results are written to.",
+        )
+        parser.add_argument(
+            "--compare",
+            help="JSON results of an earlier run to compare this run with.",
+        )
+
+    def handle(self, *args, **kwargs):
+        endpoints = [name.strip() for name in kwargs["endpoints"].split(",")]
+        unknown = set(endpoints) - set(self.scenarios)
+        if unknown:
+            raise CommandError(f"Unknown endpoints: {', '.join(sorted(unknown))}.")
+
+        self.options = kwargs
+        self.local = threading.local()
+
+        try:
+            self.context = self.prepare(
+                kwargs["requests"] + kwargs["warmup"] * kwargs["concurrency"]
+            )
+        except URLError as error:
+            raise CommandError(f"Cannot reach {kwargs['base_url']}: {error.reason}")
+
+        results = {
+            "base_url": kwargs["base_url"],
+            "started_at": datetime.now(timezone.utc).isoformat(),
+            "concurrency": kwargs["concurrency"],
+            "requests": kwargs["requests"],
+            "endpoints": {},
+        }
+
+        for name in endpoints:
+            results["endpoints"][name] = self.benchmark(name)
+            self.report(name, results["endpoints"][name])
+
+        with open(kwargs["output"], "w") as file:
+            json.dump(results, file, indent=2)
+
+        if kwargs["compare"]:
+            self.compare(kwargs["compare"], results)
+
+        self.stdout.write(self.style.SUCCESS(f"Results written to {kwargs['output']}."))
+
+    def get_client(self):
+        # One signed-in client per worker thread, like one browser per user.
+        client = getattr(self.local, "client", None)
+
+        if client is None:
+            client = Client(self.options["base_url"], self.options["timeout"])
+            client.sign_in(self.options["email"], self.options["password"])
+            self.local.client = client
+
+        return client
+
+    def prepare(self, approvals):
+        client = Client(self.options["base_url"], self.options["timeout"])
+        client.sign_in(self.options["email"], self.options["password"])
+        page = {"page": 1, "page_size": 50}
+
+        teams = get_results(client.request("GET", "/teams/", query=page)[1])
+        skills = get_results(client.request("GET", "/skills/skills/", query=page)[1])
+        user_skills = []
+        page_number = 1
+
+        # Each approval gets its own user and skill so none repeats work.
+        while len(user_skills) < approvals:
+            sample, payload = client.request(
+                "GET",
+                "/skills/user-skills/",
+                query={"page": page_number, "page_size": 50},
+            )
+            rows = get_results(payload) if sample.status == 200 else []
+            if not rows:
+                break
+
+            user_skills.extend(rows)
+            page_number += 1
+
+        return {
+            "team_ids": [team["id"] for team in teams],
+            "skill_ids": [skill["id"] for skill in skills],
+            "user_skills": [(row["user_id"], row["skill_id"]) for row in user_skills],
+        }
+
+    def run_scenario(self, name, index):
+        client = self.get_client()
+        context = self.context
+
+        if name == "sign-in":
+            # A fresh client, as each sign-in starts without a session.
+            sign_in_client = Client(self.options["base_url"], self.options["timeout"])
+            return [
+                sign_in_client.sign_in(self.options["email"], self.options["password"])
+            ]
+
+        if name == "token-refresh":
+            return [client.request("POST", "/auth/token/refresh/")[0]]
+
+        if name == "user-list":
+            return [client.request("GET", "/users/", query={"page": 1})[0]]
+
+        if name == "user-search":
+            term = SEARCH_TERMS[index % len(SEARCH_TERMS)]
+            return [
+                client.request("GET", "/users/", query={"page": 1, "search": term})[0]
+            ]
+
+        if name == "role-list":
+            return [client.request("GET", "/roles/")[0]]
+
+        if name == "team-detail":
+            team_id = self.pick(context["team_ids"], index, name)
+            return [client.request("GET", f"/teams/{team_id}/")[0]]
+
+        if name == "skill-tree":
+            # The skill, its levels and every level's expectations, as the
+            # skill page loads them.
+            skill_id = self.pick(context["skill_ids"], index, name)
+            samples = [client.request("GET", f"/skills/skills/{skill_id}/")[0]]
+            sample, levels = client.request("GET", f"/skills/skills/{skill_id}/levels/")
+            samples.append(sample)
+
+            for level in get_results(levels):
+                samples.append(
+                    client.request(
+                        "GET",
+                        f"/skills/skills/{skill_id}/levels/{level['id']}/expectations/",
+                    )[0]
+                )
+
+            return samples
+
+        if name == "expectation-progress-list":
+            return [
+                client.request(
+                    "GET", "/skills/expectation-progress/", query={"page": 1}
+                )[0]
+            ]
+
+        user_id, skill_id = self.pick(context["user_skills"], index, name)
+        return [
+            client.request(
+                "POST",
+                "/skills/expectation-progress/approve_and_advance/",
+                {"user_id": user_id, "skill_id": skill_id},
+            )[0]
+        ]
+
+    def pick(self, values, index, name):
+        if not values:
+            raise CommandError(
+                f"No data to benchmark {name} with; seed the server first."
+            )
+
+        return values[index % len(values)]
+
+    def benchmark(self, name):
+        concurrency = self.options["concurrency"]
+        warmup = self.options["warmup"] * concurrency
+        total = self.options["requests"]
+
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            list(
+                executor.map(
+                    lambda index: self.run_scenario(name, index), range(warmup)
+                )
+            )
+
+            start = time.perf_counter()
+            operations = list(
+                executor.map(
+                    lambda index: self.timed(name, index),
+                    range(warmup, warmup + total),
+                )
+            )
+            elapsed = time.perf_counter() - start
+
+        return self.summarize(operations, elapsed)
+
+    def timed(self, name, index):
+        start = time.perf_counter()
+        samples = self.run_scenario(name, index)
+
+        return time.perf_counter() - start, samples
+
+    def summarize(self, operations, elapsed):
+        latencies = sorted(duration * 1000 for duration, _ in operations)
+        samples = [sample for _, operation in operations for sample in operation]
+        statuses = {}
+
+        for sample in samples:
+            statuses[str(sample.status)] = statuses.get(str(sample.status), 0) + 1
+
+        # Queries per operation, known only when the server reports them in
+        # its Server-Timing header, i.e. with QUERY_INSTRUMENTATION_ENABLED.
+        queries = [
+            sum(sample.queries for sample in operation)
+            for _, operation in operations
+            if all(sample.queries is not None for sample in operation)
+        ]
+
+        return {
+            "operations": len(operations),
+            "requests": len(samples),
+            "errors": sum(1 for sample in samples if sample.status >= 400),
+            "statuses": statuses,
+            "throughput_per_second": round(len(operations) / elapsed, 2),
+            "latency_ms": {
+                "p50": percentile(latencies, 50),
+                "p95": percentile(latencies, 95),
+                "p99": percentile(latencies, 99),
+                "mean": round(statistics.fmean(latencies), 2),
+                "max": round(latencies[-1], 2),
+            },
+            "queries_per_operation": (
+                {
+                    "mean": round(statistics.fmean(queries), 2),
+                    "max": max(queries),
+                }
+                if queries
+                else None
+            ),
+        }
+
+    def report(self, name, result):
+        latency = result["latency_ms"]
+        queries = result["queries_per_operation"]
+        queries = f"{queries['mean']} queries" if queries else "queries not reported"
+
+        self.stdout.write(
+            f"{name}: p50 {latency['p50']} ms, p95 {latency['p95']} ms, "
+            f"p99 {latency['p99']} ms, {result['throughput_per_second']}/s, "
+            f"{queries}, {result['errors']} errors."
+        )
+
+    def compare(self, path, results):
+        with open(path) as file:
+            previous = json.load(file)["endpoints"]
+
+        for name, result in results["endpoints"].items():
+            if name not in previous:
+                continue
+
+            before = previous[name]["latency_ms"]
+            after = result["latency_ms"]
+            changes = ", ".join(
+                f"{key} {change(before[key], after[key])}"
+                for key in ("p50", "p95", "p99")
+            )
+            self.stdout.write(f"{name} compared with {path}: {changes}.")
+
+
+def percentile(sorted_values, percent):
+    # Nearest rank, so the value is one that was actually measured.
+    rank = max(math.ceil(percent / 100 * len(sorted_values)), 1)
+
+    return round(sorted_values[rank - 1], 2)
+
+
+def change(before, after):
+    if not before:
+        return "n/a"
+
+    return f"{(after - before) / before * 100:+.1f}%"
@@ -0,0 +1,59 @@
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from core.jobs import get_worker_id, purge_finished_jobs, run_next_job
+
+
+# Seconds between purges of the jobs past their retention period.
+PURGE_INTERVAL = 3600
+
+
+class Command(BaseCommand):
+    help = "Run queued background jobs."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Exit once the queue is empty instead of polling for new jobs.",
+        )
+        parser.add_argument(
+            "--poll-interval",
+            type=float,
+            default=settings.JOBS["POLL_INTERVAL"],
+            help="Seconds to wait between polls when the queue is empty.",
+        )
+
+    def handle(self, *args, **kwargs):
+        verbosity = kwargs.get("verbosity", 1)
+        worker_id = get_worker_id()
+
+        if verbosity >= 1:
+            self.stdout.write(f"Worker {worker_id} started.")
+
+        purge_at = time.monotonic()
+
+        try:
+            while True:
+                close_old_connections()
+
+                if time.monotonic() >= purge_at:
+                    purged = purge_finished_jobs()
+                    purge_at = time.monotonic() + PURGE_INTERVAL
+
+                    if purged and verbosity >= 2:
+                        self.stdout.write(f"Purged {purged} finished jobs.")
+
+                if run_next_job(worker_id):
+                    continue
+
+                if kwargs["once"]:
+                    break
+
+                time.sleep(kwargs["poll_interval"])
+        except KeyboardInterrupt:
+            pass
+
+        if verbosity >= 1:
+            self.stdout.write(self.style.SUCCESS(f"Worker {worker_id} stopped."))
@@ -0,0 +1,310 @@
+import random
+import time
+from itertools import batched
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from core.search import get_indexes
+from permissions.models import Permission
+from roles.models import Role
+from skills.models import Expectation, Level, Skill, UserExpectationProgress, UserSkill
+from teams.models import Team
+from users.models import User
+
+
+FIRST_NAMES = ["Ada", "Grace", "Alan", "Edsger", "Barbara", "Donald", "Frances"]
+LAST_NAMES = ["Lovelace", "Hopper", "Turing", "Dijkstra", "Liskov", "Knuth", "Allen"]
+LEVEL_NAMES = ["Beginner", "Intermediate", "Advanced", "Expert", "Master"]
+PROGRESS_STATUSES = ["not_started", "completed", "approved"]
+FINISHED_STATUSES = ["completed", "approved"]
+# The share of user skills whose current level is ready to approve.
+READY_FRACTION = 0.3
+
+EMAIL_DOMAIN = "synthetic.example.com"
+
+
+class Command(BaseCommand):
+    help = "Seed a large synthetic dataset for load and scale testing."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=100000)
+        parser.add_argument("--roles", type=int, default=500)
+        parser.add_argument("--teams", type=int, default=2000)
+        parser.add_argument(
+            "--team-size", type=int, default=20, help="Members per team."
+        )
+        parser.add_argument("--skills", type=int, default=1000)
+        parser.add_argument("--levels", type=int, default=5, help="Levels per skill.")
+        parser.add_argument(
+            "--expectations", type=int, default=10, help="Expectations per level."
+        )
+        parser.add_argument(
+            "--skills-per-user",
+            type=int,
+            default=5,
+            help="Skills each user is tracked on, each with a progress row per "
+            "expectation of the user's current level.",
+        )
+        parser.add_argument(
+            "--password",
+            default="Synthetic123!",
+            help="Password shared by every synthetic user.",
+        )
+        parser.add_argument(
+            "--seed",
+            type=int,
+            default=0,
+            help="Random seed; the same seed produces the same dataset.",
+        )
+        parser.add_argument("--chunk-size", type=int, default=5000)
+
+    def handle(self, *args, **kwargs):
+        if User.objects.filter(email__endswith=f"@{EMAIL_DOMAIN}").exists():
+            raise CommandError(
+                "Synthetic data already exists. Seed into a fresh database."
+            )
+
+        self.rng = random.Random(kwargs["seed"])
+        self.chunk_size = kwargs["chunk_size"]
+        self.verbosity = kwargs.get("verbosity", 1)
+        start = time.perf_counter()
+
+        # Nothing is left behind if seeding fails half way.
+        with transaction.atomic():
+            role_ids = self.seed_roles(kwargs["roles"])
+            user_ids = self.seed_users(kwargs["users"], role_ids, kwargs["password"])
+            self.seed_teams(kwargs["teams"], kwargs["team_size"], user_ids)
+            levels = self.seed_skills(
+                kwargs["skills"], kwargs["levels"], kwargs["expectations"]
+            )
+            self.seed_progress(user_ids, levels, kwargs["skills_per_user"])
+
+            self.step("Search indexes", self.rebuild_indexes)
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"✅ Synthetic data seeded in {time.perf_counter() - start:.1f}s."
+            )
+        )
+
+    def step(self, label, function, *args):
+        start = time.perf_counter()
+        count = function(*args)
+
+        if self.verbosity >= 1:
+            rows = f"{count} rows " if count is not None else ""
+            self.stdout.write(f"{label}: {rows}in {time.perf_counter() - start:.1f}s.")
+
+    def create(self, model, objects):
+        created = []
+
+        for chunk in batched(objects, self.chunk_size):
+            created.extend(model.objects.bulk_create(chunk))
+
+        return created
+
+    def insert(self, model, objects):
+        count = 0
+
+        for chunk in batched(objects, self.chunk_size):
+            model.objects.bulk_create(chunk)
+            count += len(chunk)
+
+        return count
+
+    def seed_roles(self, count):
+        roles = []
+        permission_ids = list(Permission.objects.values_list("id", flat=True))
+
+        def create_roles():
+            roles.extend(
+                self.create(
+                    Role,
+                    (Role(name=f"Synthetic Role {index}") for index in range(count)),
+                )
+            )
+
+            return self.insert(
+                Role.permissions.through,
+                (
+                    Role.permissions.through(
+                        role_id=role.id, permission_id=permission_id
+                    )
+                    for role in roles
+                    for permission_id in self.sample(permission_ids, 0.3)
+                ),
+            )
+
+        self.step("Role permissions", create_roles)
+
+        return [role.id for role in roles]
+
+    def seed_users(self, count, role_ids, password):
+        # Hashing a password per user would dominate the seeding time.
+        password = make_password(password)
+        users = []
+
+        def create_users():
+            users.extend(
+                self.create(
+                    User,
+                    (
+                        User(
+                            name=f"{self.rng.choice(FIRST_NAMES)} "
+                            f"{self.rng.choice(LAST_NAMES)} {index}",
+                            email=f"user{index}@{EMAIL_DOMAIN}",
+                            password=password,
+                            role_id=self.rng.choice(role_ids) if role_ids else None,
+                        )
+                        for index in range(count)
+                    ),
+                )
+            )
+
+            return len(users)
+
+        self.step("Users", create_users)
+
+        return [user.id for user in users]
+
+    def seed_teams(self, count, team_size, user_ids):
+        if not user_ids:
+            return
+
+        def create_teams():
+            teams = self.create(
+                Team,
+                (
+                    Team(
+                        name=f"Synthetic Team {index}",
+                        team_lead_id=self.rng.choice(user_ids),
+                    )
+                    for index in range(count)
+                ),
+            )
+
+            return self.insert(
+                Team.members.through,
+                (
+                    Team.members.through(team_id=team.id, user_id=user_id)
+                    for team in teams
+                    for user_id in self.rng.sample(
+                        user_ids, min(team_size, len(user_ids))
+                    )
+                ),
+            )
+
+        self.step("Team members", create_teams)
+
+    def seed_skills(self, count, levels_per_skill, expectations_per_level):
+        # Skill id -> [(level id, [expectation ids])], in level order.
+        levels = {}
+
+        def create_skills():
+            skills = self.create(
+                Skill,
+                (
+                    Skill(
+                        name=f"Synthetic Skill {index}",
+                        description=f"Synthetic skill number {index}.",
+                    )
+                    for index in range(count)
+                ),
+            )
+            created_levels = self.create(
+                Level,
+                (
+                    Level(
+                        skill_id=skill.id,
+                        name=LEVEL_NAMES[order % len(LEVEL_NAMES)],
+                        order=order + 1,
+                    )
+                    for skill in skills
+                    for order in range(levels_per_skill)
+                ),
+            )
+            expectations = self.create(
+                Expectation,
+                (
+                    Expectation(
+                        level_id=level.id,
+                        description=f"Expectation {index + 1} of level {level.order}.",
+                    )
+                    for level in created_levels
+                    for index in range(expectations_per_level)
+                ),
+            )
+
+            expectation_ids = {}
+            for expectation in expectations:
+                expectation_ids.setdefault(expectation.level_id, []).append(
+                    expectation.id
+                )
+
+            for level in created_levels:
+                levels.setdefault(level.skill_id, []).append(
+                    (level.id, expectation_ids.get(level.id, []))
+                )
+
+            return len(skills) + len(created_levels) + len(expectations)
+
+        self.step("Skills, levels and expectations", create_skills)
+
+        return levels
+
+    def seed_progress(self, user_ids, levels, skills_per_user):
+        skill_ids = [
+            skill_id for skill_id, skill_levels in levels.items() if skill_levels
+        ]
+
+        if not skill_ids:
+            return
+
+        # Each user's (skill, level, expectations, statuses) assignments.
+        assignments = [
+            (
+                user_id,
+                skill_id,
+                self.rng.choice(levels[skill_id]),
+                (
+                    FINISHED_STATUSES
+                    if self.rng.random() < READY_FRACTION
+                    else PROGRESS_STATUSES
+                ),
+            )
+            for user_id in user_ids
+            for skill_id in self.rng.sample(
+                skill_ids, min(skills_per_user, len(skill_ids))
+            )
+        ]
+
+        self.step(
+            "User skills",
+            self.insert,
+            UserSkill,
+            (
+                UserSkill(user_id=user_id, skill_id=skill_id, current_level_id=level_id)
+                for user_id, skill_id, (level_id, _), _ in assignments
+            ),
+        )
+        self.step(
+            "Expectation progress",
+            self.insert,
+            UserExpectationProgress,
+            (
+                UserExpectationProgress(
+                    user_id=user_id,
+                    expectation_id=expectation_id,
+                    status=self.rng.choice(statuses),
+                )
+                for user_id, _, (_, expectation_ids), statuses in assignments
+                for expectation_id in expectation_ids
+            ),
+        )
+
+    def rebuild_indexes(self):
+        for index in get_indexes():
+            index.rebuild()
+
+    def sample(self, population, fraction):
+        return self.rng.sample(population, round(len(population) * fraction))
@@ -0,0 +1,270 @@
+import atexit
+import glob
+import json
+import math
+import os
+import tempfile
+import threading
+import time
+from django.conf import settings
+
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 250)
+
+
+class Counter:
+    type = "counter"
+
+    def __init__(self, registry, name, documentation, labelnames=()):
+        self.registry = registry
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+
+    def get_labels(self, labels):
+        return tuple((name, str(labels[name])) for name in self.labelnames)
+
+    def inc(self, amount=1, **labels):
+        self.registry.add([((self.name, self.get_labels(labels)), amount)])
+
+
+class Histogram(Counter):
+    type = "histogram"
+
+    def __init__(self, registry, name, documentation, labelnames=(), buckets=()):
+        super().__init__(registry, name, documentation, labelnames)
+        self.buckets = tuple(buckets) + (math.inf,)
+
+    def observe(self, value, **labels):
+        labels = self.get_labels(labels)
+        # Buckets are stored cumulatively, as they are exposed.
+        increments = [
+            ((f"{self.name}_bucket", labels + (("le", format_bound(bound)),)), 1)
+            for bound in self.buckets
+            if value <= bound
+        ]
+        increments.append(((f"{self.name}_sum", labels), value))
+        increments.append(((f"{self.name}_count", labels), 1))
+
+        self.registry.add(increments)
+
+
+class MetricsRegistry:
+    """
+    Counters and histograms in the Prometheus text format.
+
+    Every sample is a running total, so the totals of several processes add
+    up. When ``settings.METRICS["DIRECTORY"]`` is set, each process writes its
+    totals to its own file there at most every ``FLUSH_INTERVAL`` seconds and
+    on exit, and the metrics endpoint adds up every file, so any worker can
+    answer a scrape for all of them. Without a directory only the totals of
+    the answering process are reported. Like any running total, the files
+    should be removed when the service is redeployed.
+    """
+
+    def __init__(self):
+        self.metrics = {}
+        self.values = {}
+        self.lock = threading.Lock()
+        self.pid = os.getpid()
+        self.flushed_at = time.monotonic()
+
+        atexit.register(self.flush)
+
+    def counter(self, name, documentation, labelnames=()):
+        return self.register(Counter(self, name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        return self.register(Histogram(self, name, documentation, labelnames, buckets))
+
+    def register(self, metric):
+        self.metrics[metric.name] = metric
+
+        return metric
+
+    def add(self, increments):
+        with self.lock:
+            if self.pid != os.getpid():
+                self.after_fork()
+
+            for key, amount in increments:
+                self.values[key] = self.values.get(key, 0) + amount
+
+        if time.monotonic() - self.flushed_at >= settings.METRICS["FLUSH_INTERVAL"]:
+            self.flush()
+
+    def after_fork(self):
+        # A forked worker starts with its parent's totals, which the parent
+        # keeps reporting. A reused pid continues the totals of its file.
+        self.pid = os.getpid()
+        self.values = self.read(self.get_path()) if self.get_path() else {}
+
+    def get_path(self):
+        directory = settings.METRICS["DIRECTORY"]
+
+        if not directory:
+            return None
+
+        return os.path.join(directory, f"metrics-{self.pid}.json")
+
+    def flush(self):
+        with self.lock:
+            self.flushed_at = time.monotonic()
+            path = self.get_path()
+
+            if path is None or self.pid != os.getpid():
+                return
+
+            samples = [
+                [name, list(labels), value]
+                for (name, labels), value in self.values.items()
+            ]
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        # Readers only ever see a complete file.
+        descriptor, temporary_path = tempfile.mkstemp(
+            dir=os.path.dirname(path), suffix=".tmp"
+        )
+        with os.fdopen(descriptor, "w") as file:
+            json.dump(samples, file)
+
+        os.replace(temporary_path, path)
+
+    def read(self, path):
+        try:
+            with open(path) as file:
+                samples = json.load(file)
+        except (OSError, ValueError):
+            return {}
+
+        return {
+            (name, tuple(tuple(label) for label in labels)): value
+            for name, labels, value in samples
+        }
+
+    def collect(self):
+        directory = settings.METRICS["DIRECTORY"]
+
+        if not directory:
+            with self.lock:
+                return dict(self.values)
+
+        self.flush()
+
+        totals = {}
+
+        for path in glob.glob(os.path.join(directory, "metrics-*.json")):
+            for key, value in self.read(path).items():
+                totals[key] = totals.get(key, 0) + value
+
+        return totals
+
+    def render(self):
+        samples = {}
+
+        for (name, labels), value in self.collect().items():
+            samples.setdefault(name, []).append((labels, value))
+
+        lines = []
+
+        for metric in sorted(self.metrics.values(), key=lambda metric: metric.name):
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+
+            if metric.type == "histogram":
+                names = [
+                    f"{metric.name}_{suffix}" for suffix in ("bucket", "sum", "count")
+                ]
+            else:
+                names = [metric.name]
+
+            for name in names:
+                for labels, value in sorted(samples.get(name, []), key=sort_key):
+                    lines.append(f"{name}{format_labels(labels)} {format_value(value)}")
+
+        return "\n".join(lines) + "\n"
+
+    def clear(self):
+        with self.lock:
+            self.values = {}
+
+
+def format_bound(bound):
+    return "+Inf" if bound == math.inf else repr(float(bound))
+
+
+def format_value(value):
+    return repr(float(value))
+
+
+def format_labels(labels):
+    if not labels:
+        return ""
+
+    escaped = (
+        (name, value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"'))
+        for name, value in labels
+    )
+
+    return "{" + ",".join(f'{name}="{value}"' for name, value in escaped) + "}"
+
+
+def sort_key(sample):
+    labels, _ = sample
+    # Buckets in order of their bound rather than alphabetically.
+    return [
+        (name, float(value)) if name == "le" else (name, value)
+        for name, value in labels
+    ]
+
+
+registry = MetricsRegistry()
+
+http_requests = registry.counter(
+    "http_requests_total",
+    "Requests answered, by view, method and status code.",
+    ["view", "method", "status"],
+)
+http_request_duration = registry.histogram(
+    "http_request_duration_seconds",
+    "Time spent answering requests, by view and method.",
+    ["view", "method"],
+)
+db_queries = registry.histogram(
+    "db_queries_per_request",
+    "SQL queries run per request, by view and method.",
+    ["view", "method"],
+    buckets=QUERY_COUNT_BUCKETS,
+)
+db_duplicate_queries = registry.histogram(
+    "db_duplicate_queries_per_request",
+    "SQL statements repeated within a request, by view and method.",
+    ["view", "method"],
+    buckets=QUERY_COUNT_BUCKETS,
+)
+db_query_duration = registry.counter(
+    "db_query_duration_seconds_total",
+    "Time spent in SQL queries, by view and method.",
+    ["view", "method"],
+)
+cache_requests = registry.counter(
+    "cache_requests_total",
+    "Cache lookups, by cache and whether they hit or missed.",
+    ["cache", "result"],
+)
+auth_failures = registry.counter(
+    "auth_failures_total",
+    "Failed authentications, by what failed.",
+    ["reason"],
+)
+ingest_rows = registry.counter(
+    "ingest_rows_total",
+    "Bulk ingest rows processed, by outcome.",
+    ["result"],
+)
+ingest_chunk_duration = registry.histogram(
+    "ingest_chunk_duration_seconds",
+    "Time spent ingesting one chunk of bulk ingest rows.",
+)
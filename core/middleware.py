@@ -0,0 +1,106 @@
+import json
+import logging
+import random
+import time
+from django.conf import settings
+from django.db import connection
+from core import metrics
+from core.instrumentation import QueryRecorder
+
+
+logger = logging.getLogger("core.instrumentation")
+
+
+def get_view_name(request):
+    resolver_match = getattr(request, "resolver_match", None)
+
+    # Unresolved paths share one label so scanners cannot grow the metrics.
+    return resolver_match.view_name if resolver_match else "<unresolved>"
+
+
+class InstrumentationMiddleware:
+    """
+    Records the SQL queries of every request with a single execute wrapper
+    and reports them, with the request's latency and status code, in the
+    metrics served at ``/metrics`` labelled by view name, in a Server-Timing
+    header, and in a structured log line for slow requests, requests with
+    many duplicate queries and a sample of the rest. Queries run while a
+    streaming response is consumed happen after the middleware returns and
+    are not counted.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        metrics_enabled = settings.METRICS["ENABLED"]
+        options = settings.QUERY_INSTRUMENTATION
+
+        if not metrics_enabled and not options["ENABLED"]:
+            return self.get_response(request)
+
+        recorder = QueryRecorder()
+        start = time.perf_counter()
+
+        with connection.execute_wrapper(recorder):
+            response = self.get_response(request)
+
+        duration = time.perf_counter() - start
+        view_name = get_view_name(request)
+
+        if metrics_enabled:
+            labels = {"view": view_name, "method": request.method}
+
+            metrics.http_requests.inc(status=response.status_code, **labels)
+            metrics.http_request_duration.observe(duration, **labels)
+            metrics.db_queries.observe(recorder.count, **labels)
+            metrics.db_duplicate_queries.observe(recorder.duplicates, **labels)
+            metrics.db_query_duration.inc(recorder.duration, **labels)
+
+        if options["ENABLED"]:
+            duration_ms = duration * 1000
+
+            response["Server-Timing"] = self.get_server_timing(duration_ms, recorder)
+            self.log(request, response, view_name, duration_ms, recorder)
+
+        return response
+
+    def get_server_timing(self, duration_ms, recorder):
+        return ", ".join(
+            [
+                f"app;dur={duration_ms:.2f}",
+                f"db;dur={recorder.duration * 1000:.2f}",
+                f'db-queries;desc="{recorder.count}"',
+                f'db-duplicates;desc="{recorder.duplicates}"',
+            ]
+        )
+
+    def log(self, request, response, view_name, duration_ms, recorder):
+        options = settings.QUERY_INSTRUMENTATION
+
+        if (
+            duration_ms >= options["SLOW_REQUEST_MS"]
+            or recorder.duplicates >= options["DUPLICATE_QUERIES_WARNING"]
+        ):
+            level = logging.WARNING
+        elif random.random() < options["LOG_SAMPLE_RATE"]:
+            level = logging.INFO
+        else:
+            return
+
+        logger.log(
+            level,
+            json.dumps(
+                {
+                    "route": f"{request.method} {view_name}",
+                    "path": request.path,
+                    "status": response.status_code,
+                    "duration_ms": round(duration_ms, 2),
+                    "db_ms": round(recorder.duration * 1000, 2),
+                    "queries": recorder.count,
+                    "duplicate_queries": recorder.duplicates,
+                    "slowest_query_ms": round(recorder.slowest_duration * 1000, 2),
+                    "slowest_query": recorder.slowest_sql,
+                }
+            ),
+        )
@@ -0,0 +1,121 @@
+from django.conf import settings
+from django.db import models
+from django.utils import timezone
+
+
+class Job(models.Model):
+    class Status(models.TextChoices):
+        QUEUED = "queued"
+        RUNNING = "running"
+        SUCCEEDED = "succeeded"
+        FAILED = "failed"
+
+    kind = models.CharField(max_length=100)
+    status = models.CharField(
+        max_length=20, choices=Status.choices, default=Status.QUEUED
+    )
+    payload = models.JSONField(default=dict, blank=True)
+    progress = models.JSONField(default=dict, blank=True)
+    input_file = models.FileField(upload_to="jobs/", null=True, blank=True)
+    error = models.TextField(blank=True)
+    attempts = models.PositiveIntegerField(default=0)
+    worker_id = models.CharField(max_length=255, blank=True)
+    created_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="jobs",
+    )
+
+    created_at = models.DateTimeField(default=timezone.now)
+    started_at = models.DateTimeField(null=True, blank=True)
+    heartbeat_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [models.Index(fields=["status", "id"])]
+
+    def __str__(self):
+        return f"{self.kind} #{self.id} ({self.status})"
+
+    @property
+    def is_finished(self):
+        return self.status in (self.Status.SUCCEEDED, self.Status.FAILED)
+
+    def get_rows_per_second(self):
+        rows_processed = self.progress.get("rows_processed", 0)
+
+        if not self.started_at or not rows_processed:
+            return 0
+
+        elapsed = (
+            (self.finished_at or timezone.now()) - self.started_at
+        ).total_seconds()
+
+        return round(rows_processed / elapsed, 2) if elapsed > 0 else 0
+
+    @classmethod
+    def get_by_id(cls, id):
+        return cls.objects.filter(id=id)
+
+    @classmethod
+    def get_by_kind(cls, kind):
+        return cls.objects.filter(kind=kind)
+
+
+class JobChunk(models.Model):
+    """
+    The output of one committed chunk of a job. A chunk is written in the same
+    transaction as the work it records, so an interrupted job resumes after its
+    last chunk.
+    """
+
+    job = models.ForeignKey(Job, on_delete=models.CASCADE, related_name="chunks")
+    index = models.PositiveIntegerField()
+    data = models.JSONField(default=dict)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["job", "index"], name="unique_job_chunk")
+        ]
+        ordering = ["index"]
+
+    def __str__(self):
+        return f"Chunk {self.index} of job #{self.job_id}"
+
+
+class IdempotencyKey(models.Model):
+    """
+    The response to a request sent with an ``Idempotency-Key`` header, stored
+    in the transaction that did the work so a retry of the same request with
+    the same key gets the same response without doing it again.
+    """
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="idempotency_keys",
+    )
+    scope = models.CharField(max_length=100)
+    key = models.CharField(max_length=255)
+    request_hash = models.CharField(max_length=64)
+    response_status = models.PositiveSmallIntegerField()
+    response_data = models.JSONField(null=True, blank=True)
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "scope", "key"], name="unique_idempotency_key"
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.scope} {self.key} ({self.response_status})"
+
+    @property
+    def is_expired(self):
+        age = (timezone.now() - self.created_at).total_seconds()
+
+        return age > settings.IDEMPOTENCY_KEY_TTL
@@ -0,0 +1,224 @@
+import logging
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist
+from django.db import connection
+from django.db.models import Prefetch
+from rest_framework import serializers
+from rest_framework.relations import ManyRelatedField, RelatedField
+
+
+logger = logging.getLogger(__name__)
+
+
+_plans = {}
+_plans_lock = threading.Lock()
+
+# Actions whose querysets are only read, so deferring fields is safe.
+READ_ACTIONS = ("list", "retrieve")
+
+
+class QuerysetPlan:
+    """
+    The select_related, prefetch_related and only() calls a serializer needs
+    to be rendered without a query per row.
+    """
+
+    def __init__(self):
+        self.select_related = set()
+        self.prefetch_related = {}
+        self.only = set()
+        # False once any serialized model reads attributes the plan cannot
+        # see, such as properties or SerializerMethodField results.
+        self.can_defer = True
+
+    def apply(self, queryset):
+        if self.select_related:
+            queryset = queryset.select_related(*sorted(self.select_related))
+
+        if self.prefetch_related:
+            queryset = queryset.prefetch_related(*self.prefetch_related.values())
+
+        if self.can_defer and self.only:
+            queryset = queryset.only(*sorted(self.only))
+
+        return queryset
+
+
+def get_queryset_plan(serializer_class):
+    with _plans_lock:
+        plan = _plans.get(serializer_class)
+
+    if plan is None:
+        serializer = serializer_class()
+        plan = QuerysetPlan()
+        plan_serializer(serializer, serializer.Meta.model, "", plan)
+
+        with _plans_lock:
+            _plans[serializer_class] = plan
+
+    return plan
+
+
+def optimize_queryset(queryset, serializer_class):
+    """
+    Prepares the queryset for the relations the serializer reads, derived
+    from its fields: dotted ``source`` paths through foreign keys become
+    select_related, many-to-many and reverse relations become prefetches
+    planned from their nested serializers, and the columns read become
+    only() when every serialized model is read through declared fields.
+    """
+    return get_queryset_plan(serializer_class).apply(queryset)
+
+
+def reads_undeclared_attributes(serializer):
+    # A custom to_representation or method field may read any attribute.
+    return type(serializer).to_representation not in (
+        serializers.Serializer.to_representation,
+        serializers.ModelSerializer.to_representation,
+    ) or any(
+        isinstance(field, serializers.SerializerMethodField)
+        for field in serializer.fields.values()
+    )
+
+
+def plan_serializer(serializer, model, prefix, plan):
+    if reads_undeclared_attributes(serializer):
+        plan.can_defer = False
+
+    plan.only.add(f"{prefix}{model._meta.pk.name}")
+
+    for field in serializer.fields.values():
+        if field.write_only:
+            continue
+
+        if field.source == "*":
+            if isinstance(field, serializers.BaseSerializer):
+                plan_serializer(field, model, prefix, plan)
+            elif not isinstance(field, serializers.SerializerMethodField):
+                plan.can_defer = False
+            continue
+
+        plan_source(field, field.source_attrs, model, prefix, plan)
+
+
+def plan_source(field, attrs, model, prefix, plan):
+    for index, attr in enumerate(attrs):
+        is_last = index == len(attrs) - 1
+
+        try:
+            model_field = model._meta.get_field(attr)
+        except FieldDoesNotExist:
+            # A property or method, which may read anything.
+            plan.can_defer = False
+            return
+
+        if not model_field.is_relation:
+            plan.only.add(f"{prefix}{attr}")
+            return
+
+        if model_field.many_to_many or model_field.one_to_many:
+            plan.prefetch_related.setdefault(
+                f"{prefix}{attr}",
+                get_prefetch(field if is_last else None, model_field, prefix, attr),
+            )
+            return
+
+        if model_field.concrete:
+            plan.only.add(f"{prefix}{attr}")
+
+        # A primary key field reads the foreign key column, not the row.
+        if is_last and isinstance(field, RelatedField):
+            return
+
+        plan.select_related.add(f"{prefix}{attr}")
+        model = model_field.related_model
+        prefix = f"{prefix}{attr}__"
+
+        if is_last and isinstance(field, serializers.BaseSerializer):
+            plan_serializer(field, model, prefix, plan)
+        elif is_last:
+            plan.can_defer = False
+
+
+def get_prefetch(field, model_field, prefix, attr):
+    if isinstance(field, serializers.ListSerializer):
+        child = field.child
+    elif isinstance(field, serializers.BaseSerializer):
+        child = field
+    else:
+        child = None
+
+    if child is None:
+        # Primary keys only, e.g. a PrimaryKeyRelatedField with many=True.
+        if isinstance(field, ManyRelatedField):
+            queryset = model_field.related_model._default_manager.only("pk")
+
+            if model_field.one_to_many:
+                queryset = queryset.only("pk", model_field.field.attname)
+
+            return Prefetch(f"{prefix}{attr}", queryset=queryset)
+
+        return f"{prefix}{attr}"
+
+    child_plan = QuerysetPlan()
+    plan_serializer(child, model_field.related_model, "", child_plan)
+
+    if model_field.one_to_many:
+        # The prefetch joins rows back to their parent on this column.
+        child_plan.only.add(model_field.field.attname)
+
+    queryset = child_plan.apply(model_field.related_model._default_manager.all())
+
+    return Prefetch(f"{prefix}{attr}", queryset=queryset)
+
+
+class ExtraQueriesError(AssertionError):
+    pass
+
+
+@contextmanager
+def assert_no_repeated_queries():
+    """
+    Fails when the same SQL statement runs more than once inside the block,
+    the signature of a query per serialized row. Only fails when
+    ``settings.QUERY_OPTIMIZER_STRICT`` is set, which the test runner does;
+    in DEBUG the statement is logged as a warning instead, and production
+    requests do not pay for the check at all.
+    """
+    strict = settings.QUERY_OPTIMIZER_STRICT
+
+    if not strict and not settings.DEBUG:
+        yield
+        return
+
+    statements = Counter()
+
+    def record(execute, sql, params, many, context):
+        statements[sql] += 1
+
+        return execute(sql, params, many, context)
+
+    with connection.execute_wrapper(record):
+        yield
+
+    repeated = [(sql, count) for sql, count in statements.items() if count > 1]
+    if repeated:
+        sql, count = max(repeated, key=lambda item: item[1])
+        message = (
+            f"Serialization ran the same query {count} times; the queryset is "
+            f"missing select_related or prefetch_related: {sql}"
+        )
+
+        if strict:
+            raise ExtraQueriesError(message)
+
+        logger.warning(message)
+
+
+def serialize(serializer):
+    """Returns ``serializer.data``, checked for per-row queries."""
+    with assert_no_repeated_queries():
+        return serializer.data
@@ -0,0 +1,316 @@
+import base64
+import binascii
+import json
+from django.conf import settings
+from django.db import connection
+from django.db.models import Q
+from django.http import StreamingHttpResponse
+from rest_framework.exceptions import NotFound, PermissionDenied, ValidationError
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+from core.exports import iter_json_array, iter_queryset_chunks
+from core.optimizer import serialize
+from permissions.access import has_permission
+
+
+class BoundedPageNumberPagination(PageNumberPagination):
+    """
+    Page number pagination under the project-wide policy in
+    ``settings.PAGINATION``. A client that asks for a page gets at most
+    ``max_page_size`` rows. A client that does not still gets a plain list,
+    for compatibility, but never more than ``MAX_UNPAGINATED_RESULTS`` rows;
+    when the list is cut short the response says so in its headers. Clients
+    that need every row use the streaming export instead.
+    """
+
+    page_size_query_param = "page_size"
+
+    @property
+    def page_size(self):
+        return settings.PAGINATION["PAGE_SIZE"]
+
+    @property
+    def max_page_size(self):
+        return settings.PAGINATION["MAX_PAGE_SIZE"]
+
+    def is_requested(self, request):
+        return (
+            self.page_query_param in request.query_params
+            or self.page_size_query_param in request.query_params
+        )
+
+    def limit_queryset(self, queryset, request):
+        self.request = request
+        limit = settings.PAGINATION["MAX_UNPAGINATED_RESULTS"]
+
+        # One extra row tells whether the list was cut short.
+        results = list(queryset[: limit + 1])
+        self.truncated = len(results) > limit
+
+        return results[:limit]
+
+    def get_limited_response(self, data):
+        response = Response(data)
+
+        if self.truncated:
+            first_page_url = replace_query_param(
+                self.request.build_absolute_uri(), self.page_query_param, 1
+            )
+            response["X-Results-Truncated"] = "true"
+            response["Link"] = f'<{first_page_url}>; rel="first"'
+
+        return response
+
+
+class BoundedListMixin:
+    """
+    List helper for viewsets whose paginator is a BoundedPageNumberPagination.
+
+    ``?stream=json`` returns the complete list instead, for the clients
+    allowed to export data: rows are read with ``iterator()``, serialized a
+    chunk at a time and written to a streaming JSON array, so memory use
+    does not grow with the number of rows.
+    """
+
+    stream_denied_message = "You do not have permission to stream complete lists."
+
+    def get_list_serializer(self, rows):
+        return self.get_serializer(rows, many=True)
+
+    def get_list_response(self, queryset):
+        if self.request.query_params.get("stream", "").lower() == "json":
+            return self.get_streaming_list_response(queryset)
+
+        if self.paginator.is_requested(self.request):
+            page = self.paginate_queryset(queryset)
+            serializer = self.get_list_serializer(page)
+
+            return self.get_paginated_response(serialize(serializer))
+
+        rows = self.paginator.limit_queryset(queryset, self.request)
+        serializer = self.get_list_serializer(rows)
+
+        return self.paginator.get_limited_response(serialize(serializer))
+
+    def get_streaming_list_response(self, queryset):
+        user = self.request.user
+        allow_superuser = getattr(self, "allow_superuser", False)
+
+        if not (allow_superuser and user.is_superuser) and not has_permission(
+            self.request, "export_data"
+        ):
+            raise PermissionDenied(self.stream_denied_message)
+
+        chunks = (
+            serialize(self.get_list_serializer(rows))
+            for rows in iter_queryset_chunks(queryset)
+        )
+
+        return StreamingHttpResponse(
+            iter_json_array(chunks), content_type="application/json"
+        )
+
+
+class KeysetPagination(BasePagination):
+    """
+    Cursor pagination that seeks past the last row of the previous page
+    instead of skipping rows with OFFSET, so every page costs the same as the
+    first one when the ordering is backed by an index.
+
+    Only the orderings in ``orderings`` are accepted. Each maps the value of
+    the ordering query parameter to the model fields it sorts by, the last of
+    which must be unique, and should have a composite index on those fields.
+    Cursors are opaque to clients: they encode the sort values of the row the
+    page ends or starts at, and whether the client is moving backwards.
+    """
+
+    page_size = 10
+    page_size_query_param = "page_size"
+    max_page_size = 50
+    cursor_query_param = "cursor"
+    ordering_query_param = "ordering"
+    orderings = {}
+    default_ordering = None
+    invalid_cursor_message = "Invalid cursor."
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.ordering = self.get_ordering(request)
+        self.page_size = self.get_page_size(request)
+
+        fields = self.orderings[self.ordering]
+        cursor = self.decode_cursor(request)
+        reverse = cursor is not None and cursor["reverse"]
+
+        order = [self.flip(field) for field in fields] if reverse else fields
+        queryset = queryset.order_by(*order)
+
+        if cursor is not None:
+            queryset = queryset.filter(self.get_seek_filter(order, cursor["values"]))
+
+        # One extra row tells whether there is a page beyond this one.
+        results = list(queryset[: self.page_size + 1])
+        has_more = len(results) > self.page_size
+        results = results[: self.page_size]
+
+        if reverse:
+            results.reverse()
+            has_next, has_previous = True, has_more
+        else:
+            has_next, has_previous = has_more, cursor is not None
+
+        self.next_cursor = None
+        self.previous_cursor = None
+
+        if results and has_next:
+            self.next_cursor = self.encode_cursor(results[-1], fields, reverse=False)
+        if results and has_previous:
+            self.previous_cursor = self.encode_cursor(results[0], fields, reverse=True)
+
+        return results
+
+    def get_ordering(self, request):
+        ordering = request.query_params.get(self.ordering_query_param)
+
+        if not ordering:
+            return self.default_ordering
+
+        ordering = ",".join(field.strip() for field in ordering.split(","))
+
+        if ordering not in self.orderings:
+            raise ValidationError(
+                {
+                    self.ordering_query_param: [
+                        "Unsupported ordering. Choose one of: "
+                        + ", ".join(self.orderings)
+                        + "."
+                    ]
+                }
+            )
+
+        return ordering
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+
+        if page_size <= 0:
+            return self.page_size
+
+        return min(page_size, self.max_page_size)
+
+    def flip(self, field):
+        return field[1:] if field.startswith("-") else f"-{field}"
+
+    def get_seek_filter(self, order, values):
+        """
+        Matches the rows that come after the given sort values in the given
+        order: equal on the first N fields and past the value of the next
+        one, for every N. The first field is also bounded on its own so the
+        database can start an index range scan at the cursor.
+        """
+        seek = Q(pk__in=[])
+        equal = Q()
+
+        for field, value in zip(order, values):
+            name = field.lstrip("-")
+            seek |= equal & self.get_after_filter(name, value, field.startswith("-"))
+            equal &= self.get_equal_filter(name, value)
+
+        name, value = order[0].lstrip("-"), values[0]
+        bound = self.get_equal_filter(name, value) | self.get_after_filter(
+            name, value, order[0].startswith("-")
+        )
+
+        return bound & seek
+
+    def get_equal_filter(self, name, value):
+        if value is None:
+            return Q(**{f"{name}__isnull": True})
+
+        return Q(**{name: value})
+
+    def get_after_filter(self, name, value, descending):
+        # NULLs sort as the largest value on some databases and the smallest
+        # on others, and the composite indexes keep the database's default.
+        nulls_largest = connection.features.nulls_order_largest
+        nulls_after = nulls_largest != descending
+
+        if value is None:
+            return Q(pk__in=[]) if nulls_after else Q(**{f"{name}__isnull": False})
+
+        after = Q(**{f"{name}__lt" if descending else f"{name}__gt": value})
+
+        if nulls_after:
+            after |= Q(**{f"{name}__isnull": True})
+
+        return after
+
+    def encode_cursor(self, row, fields, reverse):
+        payload = {
+            "o": self.ordering,
+            "v": [getattr(row, field.lstrip("-")) for field in fields],
+            "r": reverse,
+        }
+
+        return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode()
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+
+        if not encoded:
+            return None
+
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(encoded.encode()))
+            ordering, values, reverse = payload["o"], payload["v"], payload["r"]
+        except (binascii.Error, ValueError, TypeError, KeyError):
+            raise NotFound(self.invalid_cursor_message)
+
+        fields = self.orderings[self.ordering]
+
+        if (
+            ordering != self.ordering
+            or not isinstance(values, list)
+            or len(values) != len(fields)
+        ):
+            raise NotFound(self.invalid_cursor_message)
+
+        return {"values": values, "reverse": bool(reverse)}
+
+    def get_link(self, cursor):
+        if cursor is None:
+            return None
+
+        return replace_query_param(
+            self.request.build_absolute_uri(), self.cursor_query_param, cursor
+        )
+
+    def get_next_link(self):
+        return self.get_link(self.next_cursor)
+
+    def get_previous_link(self):
+        return self.get_link(self.previous_cursor)
+
+    def get_paginated_response(self, data):
+        return Response(
+            {
+                "next": self.get_next_link(),
+                "previous": self.get_previous_link(),
+                "results": data,
+            }
+        )
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "required": ["results"],
+            "properties": {
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "previous": {"type": "string", "nullable": True, "format": "uri"},
+                "results": schema,
+            },
+        }
@@ -0,0 +1,445 @@
+from django.conf import settings
+from django.db import DatabaseError, connection, transaction
+from django.db.migrations.operations.base import Operation
+from django.db.models import Case, FloatField, Q, Value, When
+from django.db.models.functions import Greatest
+from django.db.models.signals import post_delete, post_save, pre_delete
+from rest_framework import filters
+from rest_framework.settings import api_settings
+
+
+# FTS5's trigram tokenizer cannot match terms shorter than one trigram.
+MIN_TRIGRAM_QUERY_LENGTH = 3
+UPDATE_CHUNK_SIZE = 500
+
+_indexes = {}
+
+
+class SearchIndex:
+    """
+    Declares the text fields of a model that are searched together, so each
+    database can serve the search from its own index: pg_trgm GIN indexes on
+    PostgreSQL, an FTS5 shadow table on SQLite. Fields are lookup paths from
+    the model and may follow foreign keys.
+
+    ``dependencies`` maps related models to the lookup path from the indexed
+    model, so saving or deleting a related row reindexes the rows that copy
+    its text into the shadow table.
+    """
+
+    def __init__(self, name, model, fields, dependencies=None):
+        self.name = name
+        self.model = model
+        self.fields = dict(fields)
+        self.dependencies = dict(dependencies or {})
+
+        _indexes[name] = self
+
+    def __str__(self):
+        return self.name
+
+    @property
+    def table(self):
+        return f"search_{self.name}"
+
+    def search(self, queryset, query):
+        """
+        Returns the rows of the queryset matching the query in any field,
+        annotated with ``search_rank`` and ordered by it, best first.
+        """
+        return get_backend(self).search(self, queryset, query)
+
+    def update(self, pks):
+        """
+        Reindexes the given rows. Needed after writes that skip model signals,
+        such as ``bulk_create``, ``bulk_update`` and ``QuerySet.update``.
+        """
+        get_backend(self).update(self, pks)
+
+    def rebuild(self):
+        get_backend(self).rebuild(self)
+
+    def connect(self):
+        post_save.connect(self.handle_save, sender=self.model, weak=False)
+        post_delete.connect(self.handle_delete, sender=self.model, weak=False)
+
+        for model in self.dependencies:
+            post_save.connect(self.handle_dependency_save, sender=model, weak=False)
+            pre_delete.connect(
+                self.handle_dependency_pre_delete, sender=model, weak=False
+            )
+            post_delete.connect(self.handle_dependency_delete, sender=model, weak=False)
+
+    def get_dependent_pks(self, instance):
+        path = self.dependencies[type(instance)]
+
+        return list(
+            self.model._base_manager.filter(**{path: instance.pk}).values_list(
+                "pk", flat=True
+            )
+        )
+
+    def handle_save(self, sender, instance, **kwargs):
+        self.update([instance.pk])
+
+    def handle_delete(self, sender, instance, **kwargs):
+        self.update([instance.pk])
+
+    def handle_dependency_save(self, sender, instance, created, **kwargs):
+        if not created:
+            self.update(self.get_dependent_pks(instance))
+
+    def handle_dependency_pre_delete(self, sender, instance, **kwargs):
+        # The dependent rows are unlinked by the time post_delete is sent.
+        instance._search_dependent_pks = getattr(instance, "_search_dependent_pks", {})
+        instance._search_dependent_pks[self.name] = self.get_dependent_pks(instance)
+
+    def handle_dependency_delete(self, sender, instance, **kwargs):
+        pks = getattr(instance, "_search_dependent_pks", {}).pop(self.name, [])
+        self.update(pks)
+
+
+def get_indexes():
+    return list(_indexes.values())
+
+
+def get_index(name):
+    return _indexes.get(name)
+
+
+class BasicSearchBackend:
+    """
+    Filters with case-insensitive substring matches and ranks prefix matches
+    above matches inside a word. Works everywhere but scans the table.
+    """
+
+    name = "basic"
+
+    def is_available(self, index):
+        return True
+
+    def filter(self, index, queryset, query):
+        condition = Q()
+        for path in index.fields.values():
+            condition |= Q(**{f"{path}__icontains": query})
+
+        return queryset.filter(condition)
+
+    def get_rank(self, index, query):
+        ranks = [
+            Case(
+                When(**{f"{path}__iexact": query}, then=Value(1.0)),
+                When(**{f"{path}__istartswith": query}, then=Value(0.5)),
+                When(**{f"{path}__icontains": query}, then=Value(0.25)),
+                default=Value(0.0),
+                output_field=FloatField(),
+            )
+            for path in index.fields.values()
+        ]
+
+        return ranks[0] if len(ranks) == 1 else Greatest(*ranks)
+
+    def search(self, index, queryset, query):
+        return (
+            self.filter(index, queryset, query)
+            .annotate(search_rank=self.get_rank(index, query))
+            .order_by("-search_rank", "pk")
+        )
+
+    def update(self, index, pks):
+        pass
+
+    def rebuild(self, index):
+        pass
+
+
+class PostgresTrigramSearchBackend(BasicSearchBackend):
+    """
+    Keeps the substring filter, which PostgreSQL serves from GIN indexes with
+    the pg_trgm operator class, and ranks by trigram word similarity.
+    """
+
+    name = "postgres"
+
+    def __init__(self):
+        self.has_extension = None
+
+    def is_available(self, index):
+        if self.has_extension is None:
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")
+                self.has_extension = cursor.fetchone() is not None
+
+        return self.has_extension
+
+    def get_rank(self, index, query):
+        from django.contrib.postgres.search import TrigramWordSimilarity
+
+        ranks = [TrigramWordSimilarity(query, path) for path in index.fields.values()]
+
+        return ranks[0] if len(ranks) == 1 else Greatest(*ranks)
+
+
+class SQLiteFTSSearchBackend(BasicSearchBackend):
+    """
+    Matches against an FTS5 table using the trigram tokenizer, which supports
+    substring queries, and ranks with bm25. The table holds a copy of the
+    indexed text keyed by the row's primary key and is kept in sync by the
+    index's signal handlers.
+    """
+
+    name = "sqlite"
+
+    def __init__(self):
+        self.tables = None
+
+    def is_available(self, index):
+        if self.tables is None:
+            self.tables = set(connection.introspection.table_names())
+
+        return index.table in self.tables
+
+    def get_match(self, query):
+        # A quoted phrase matches the query as a substring, like icontains.
+        return '"{}"'.format(query.replace('"', '""'))
+
+    def search(self, index, queryset, query):
+        if len(query) < MIN_TRIGRAM_QUERY_LENGTH:
+            return super().search(index, queryset, query)
+
+        table = connection.ops.quote_name(index.table)
+        model_table = connection.ops.quote_name(queryset.model._meta.db_table)
+        pk_column = connection.ops.quote_name(queryset.model._meta.pk.column)
+
+        # Joining the FTS table lets SQLite run the MATCH once and look rows
+        # up by primary key, where a subquery would run it once per row.
+        return queryset.extra(
+            tables=[index.table],
+            where=[
+                f"{table}.rowid = {model_table}.{pk_column}",
+                f"{table} MATCH %s",
+            ],
+            params=[self.get_match(query)],
+            select={"search_rank": f"-bm25({table})"},
+        ).order_by("-search_rank", "pk")
+
+    def update(self, index, pks):
+        pks = list(pks)
+
+        if not pks or not self.is_available(index):
+            return
+
+        for start in range(0, len(pks), UPDATE_CHUNK_SIZE):
+            chunk = pks[start : start + UPDATE_CHUNK_SIZE]
+            placeholders = ", ".join(["%s"] * len(chunk))
+            table = connection.ops.quote_name(index.table)
+
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    f"DELETE FROM {table} WHERE rowid IN ({placeholders})", chunk
+                )
+
+            self.insert_rows(index, index.model._base_manager.filter(pk__in=chunk))
+
+    def rebuild(self, index):
+        if not self.is_available(index):
+            return
+
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {connection.ops.quote_name(index.table)}")
+            self.insert_rows(index, index.model._base_manager.all())
+
+    def insert_rows(self, index, queryset):
+        table = connection.ops.quote_name(index.table)
+        columns = ", ".join(
+            connection.ops.quote_name(column) for column in index.fields
+        )
+        placeholders = ", ".join(["%s"] * (len(index.fields) + 1))
+        sql = f"INSERT INTO {table} (rowid, {columns}) VALUES ({placeholders})"
+
+        rows = queryset.values_list("pk", *index.fields.values()).iterator(
+            chunk_size=UPDATE_CHUNK_SIZE
+        )
+        batch = []
+
+        with connection.cursor() as cursor:
+            for row in rows:
+                batch.append(
+                    [row[0], *("" if value is None else value for value in row[1:])]
+                )
+
+                if len(batch) >= UPDATE_CHUNK_SIZE:
+                    cursor.executemany(sql, batch)
+                    batch = []
+
+            if batch:
+                cursor.executemany(sql, batch)
+
+
+_backend_classes = {
+    backend.name: backend
+    for backend in (
+        BasicSearchBackend,
+        PostgresTrigramSearchBackend,
+        SQLiteFTSSearchBackend,
+    )
+}
+_vendor_backends = {
+    "postgresql": PostgresTrigramSearchBackend.name,
+    "sqlite": SQLiteFTSSearchBackend.name,
+}
+_backends = {}
+
+
+def get_backend(index=None):
+    """
+    Returns the configured search backend, or the basic backend when the
+    configured one has no index for the given search index, for instance
+    because the database lacks the pg_trgm extension or FTS5.
+    """
+    name = settings.SEARCH_BACKEND
+
+    if name == "auto":
+        name = _vendor_backends.get(connection.vendor, BasicSearchBackend.name)
+
+    if name not in _backends:
+        _backends[name] = _backend_classes[name]()
+
+    backend = _backends[name]
+
+    if index is not None and not backend.is_available(index):
+        return _backends.setdefault(BasicSearchBackend.name, BasicSearchBackend())
+
+    return backend
+
+
+def reset_backends():
+    """Forgets what was detected about the database, e.g. after migrating."""
+    _backends.clear()
+
+
+class CreateSearchIndex(Operation):
+    """
+    Creates the database side of a search index. On PostgreSQL it installs
+    pg_trgm and adds GIN trigram indexes on the upper-cased columns, matching
+    the expressions Django generates for icontains. On SQLite it creates the
+    FTS5 shadow table and fills it from ``populate_sql``, which must select
+    the primary key followed by one value per column. Databases without
+    either feature are left alone and use the basic backend.
+    """
+
+    reduces_to_sql = False
+    reversible = True
+
+    def __init__(self, name, columns, populate_sql, trigram_columns):
+        self.name = name
+        self.columns = columns
+        self.populate_sql = populate_sql
+        self.trigram_columns = trigram_columns
+
+    def deconstruct(self):
+        return (
+            self.__class__.__qualname__,
+            [],
+            {
+                "name": self.name,
+                "columns": self.columns,
+                "populate_sql": self.populate_sql,
+                "trigram_columns": self.trigram_columns,
+            },
+        )
+
+    def state_forwards(self, app_label, state):
+        pass
+
+    def get_trigram_index_name(self, table, column):
+        return f"search_{self.name}_{table}_{column}_trgm"[:63]
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        vendor = schema_editor.connection.vendor
+        quote_name = schema_editor.quote_name
+
+        if vendor == "postgresql":
+            try:
+                with transaction.atomic(using=schema_editor.connection.alias):
+                    schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+            except DatabaseError:
+                # Installing extensions needs privileges the app may not have.
+                return
+
+            for table, column in self.trigram_columns:
+                schema_editor.execute(
+                    f"CREATE INDEX IF NOT EXISTS "
+                    f"{quote_name(self.get_trigram_index_name(table, column))} "
+                    f"ON {quote_name(table)} "
+                    f"USING gin (UPPER({quote_name(column)}) gin_trgm_ops)"
+                )
+        elif vendor == "sqlite":
+            table = quote_name(f"search_{self.name}")
+            columns = ", ".join(quote_name(column) for column in self.columns)
+
+            try:
+                with transaction.atomic(using=schema_editor.connection.alias):
+                    schema_editor.execute(
+                        f"CREATE VIRTUAL TABLE IF NOT EXISTS {table} "
+                        f"USING fts5({columns}, tokenize='trigram')"
+                    )
+            except DatabaseError:
+                # SQLite was built without FTS5 or is older than 3.34.
+                return
+
+            schema_editor.execute(
+                f"INSERT INTO {table} (rowid, {columns}) {self.populate_sql}"
+            )
+
+        reset_backends()
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        vendor = schema_editor.connection.vendor
+        quote_name = schema_editor.quote_name
+
+        if vendor == "postgresql":
+            for table, column in self.trigram_columns:
+                schema_editor.execute(
+                    f"DROP INDEX IF EXISTS "
+                    f"{quote_name(self.get_trigram_index_name(table, column))}"
+                )
+        elif vendor == "sqlite":
+            schema_editor.execute(
+                f"DROP TABLE IF EXISTS {quote_name(f'search_{self.name}')}"
+            )
+
+        reset_backends()
+
+    def describe(self):
+        return f"Create search index {self.name}"
+
+
+class IndexSearchFilter(filters.SearchFilter):
+    """
+    Search filter that delegates to the view's ``search_index``, so the
+    search is served by the database's index and ranked by relevance.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        query = request.query_params.get(self.search_param, "").strip()
+
+        if not query:
+            return queryset
+
+        return view.search_index.search(queryset, query)
+
+
+class RelevanceOrderingFilter(filters.OrderingFilter):
+    """
+    Ordering filter that keeps the relevance order of a search unless the
+    client asks for an explicit ordering.
+    """
+
+    def get_ordering(self, request, queryset, view):
+        searching = request.query_params.get(api_settings.SEARCH_PARAM, "").strip()
+
+        if searching and not request.query_params.get(self.ordering_param):
+            return None
+
+        return super().get_ordering(request, queryset, view)
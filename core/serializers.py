@@ -0,0 +1,25 @@
+from rest_framework import serializers
+from core.models import Job
+
+
+class JobSerializer(serializers.ModelSerializer):
+    rows_per_second = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Job
+        fields = [
+            "id",
+            "kind",
+            "status",
+            "progress",
+            "rows_per_second",
+            "error",
+            "attempts",
+            "created_at",
+            "started_at",
+            "finished_at",
+        ]
+        read_only_fields = fields
+
+    def get_rows_per_second(self, obj):
+        return obj.get_rows_per_second()
@@ -0,0 +1,139 @@
+from collections import Counter
+from contextlib import ContextDecorator
+from dataclasses import dataclass
+from django.db import connection
+
+
+# Every budget checked during the test run, for the runner's report.
+budget_records = []
+
+# The id of the running test, set by the test runner.
+current_test = None
+
+
+@dataclass
+class QueryBudgetRecord:
+    test: str
+    label: str
+    budget: int
+    queries: int
+
+    @property
+    def exceeded(self):
+        return self.queries > self.budget
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+class query_budget(ContextDecorator):
+    """
+    Fails when the block, or the decorated test, runs more than
+    ``max_queries`` SQL queries, listing the statements it ran.
+
+        with query_budget(4, label="users-list"):
+            self.client.get(reverse("users-list"))
+    """
+
+    def __init__(self, max_queries, label=None):
+        self.max_queries = max_queries
+        self.label = label
+
+    def __call__(self, func):
+        if self.label is None:
+            self.label = func.__qualname__
+
+        return super().__call__(func)
+
+    def __enter__(self):
+        self.statements = []
+        self.wrapper = connection.execute_wrapper(self.record)
+        self.wrapper.__enter__()
+
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.wrapper.__exit__(exc_type, exc_value, traceback)
+
+        budget_records.append(
+            QueryBudgetRecord(
+                test=current_test or "",
+                label=self.label or "",
+                budget=self.max_queries,
+                queries=self.count,
+            )
+        )
+
+        if exc_type is None and self.count > self.max_queries:
+            raise QueryBudgetExceeded(self.get_message())
+
+        return False
+
+    def record(self, execute, sql, params, many, context):
+        self.statements.append(sql)
+
+        return execute(sql, params, many, context)
+
+    @property
+    def count(self):
+        return len(self.statements)
+
+    def get_message(self):
+        lines = [
+            f"{self.label or 'Block'} ran {self.count} queries, "
+            f"over its budget of {self.max_queries}:"
+        ]
+
+        for sql, count in Counter(self.statements).most_common():
+            lines.append(f"  {count}x {sql}")
+
+        return "\n".join(lines)
+
+
+def assert_constant_queries(request, grow, sizes=(1, 10, 50), max_queries=None):
+    """
+    Calls ``grow(size)`` to bring the dataset to each size in turn and
+    ``request()`` after each, failing unless every call runs the same number
+    of queries, and no more than ``max_queries`` when given. Returns the
+    number of queries per call.
+    """
+    counts = []
+
+    for size in sizes:
+        grow(size)
+
+        budget = query_budget(
+            max_queries if max_queries is not None else float("inf"),
+            label=f"{getattr(request, '__name__', 'request')} ({size} rows)",
+        )
+        with budget:
+            request()
+
+        counts.append(budget.count)
+
+    if len(set(counts)) > 1:
+        raise QueryBudgetExceeded(
+            "Query count grows with the dataset: "
+            + ", ".join(f"{size} rows: {count}" for size, count in zip(sizes, counts))
+        )
+
+    return counts[0]
+
+
+def get_top_offenders(records, limit=10):
+    """The tests whose budgets are closest to, or furthest over, their limits."""
+
+    def usage(record):
+        return (record.queries / max(record.budget, 1), record.queries)
+
+    worst = {}
+
+    for record in records:
+        if record.budget == float("inf"):
+            continue
+
+        if record.test not in worst or usage(record) > usage(worst[record.test]):
+            worst[record.test] = record
+
+    return sorted(worst.values(), key=usage, reverse=True)[:limit]
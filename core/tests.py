@@ -1,5 +1,41 @@
+import json
+import logging
+import os
+import tempfile
 import unittest
+from datetime import timedelta
+from django.conf import settings
+from django.core.management import call_command
+from django.test import TestCase, override_settings
 from django.test.runner import DiscoverRunner
+from django.utils import timezone
+from django.urls import reverse
+from rest_framework.test import APITestCase
+from core import testing
+from core.testing import QueryBudgetExceeded, assert_constant_queries, query_budget
+from core.metrics import registry
+from core.jobs import (
+    JobLeaseLost,
+    claim_job,
+    commit_chunk,
+    enqueue,
+    purge_finished_jobs,
+    run_next_job,
+)
+from core.models import Job, JobChunk
+from core.optimizer import (
+    ExtraQueriesError,
+    get_queryset_plan,
+    optimize_queryset,
+    serialize,
+)
+from permissions.models import Permission, PermissionGroup
+from roles.models import Role
+from skills.models import Expectation, Level, Skill, UserExpectationProgress, UserSkill
+from skills.user_skills.serializers import UserSkillSerializer
+from teams.base.serializers import TeamSerializer
+from teams.models import Team
+from users.models import User
 
 
 class CustomTextTestRunner(unittest.TextTestRunner):
@@ -16,6 +52,7 @@ class CustomTextTestRunner(unittest.TextTestRunner):
         result._last_test_class = None
 
         def startTest(test):
+            testing.current_test = test.id()
             test_class = test.__class__
             if test_class != result._last_test_class:
                 result._last_test_class = test_class
@@ -67,7 +104,524 @@ class CustomTextTestRunner(unittest.TextTestRunner):
 
 
 class CustomTestRunner(DiscoverRunner):
+    query_report_size = 10
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        # Per-row serializer queries fail tests rather than only being logged.
+        settings.QUERY_OPTIMIZER_STRICT = True
+        # Request log lines would be interleaved with the test output; tests
+        # that check them raise the level with assertLogs.
+        logging.getLogger("core.instrumentation").setLevel(logging.CRITICAL)
+
     def run_suite(self, suite, **kwargs):
-        return CustomTextTestRunner(
+        testing.budget_records.clear()
+
+        result = CustomTextTestRunner(
             verbosity=self.verbosity, failfast=self.failfast
         ).run(suite)
+
+        self.print_query_report()
+
+        return result
+
+    def print_query_report(self):
+        offenders = testing.get_top_offenders(
+            testing.budget_records, self.query_report_size
+        )
+
+        if not offenders:
+            return
+
+        print("Query budgets, top offenders:")
+
+        for record in offenders:
+            marker = "❌" if record.exceeded else "📊"
+            print(
+                f"{marker} {record.queries}/{record.budget} queries: "
+                f"{record.label} ({record.test})"
+            )
+
+        print()
+
+
+class JobQueueTests(TestCase):
+    def test_claim_job_takes_oldest_queued_job(self):
+        """
+        Test that workers claim queued jobs oldest first and never the same job twice.
+        """
+        first_job = enqueue("tests.job")
+        second_job = enqueue("tests.job")
+
+        self.assertEqual(claim_job("worker-1").id, first_job.id)
+        self.assertEqual(claim_job("worker-2").id, second_job.id)
+        self.assertIsNone(claim_job("worker-3"))
+
+    def test_claim_job_reclaims_expired_lease(self):
+        """
+        Test that a running job whose worker stopped sending heartbeats is claimed by another worker.
+        """
+        job = enqueue("tests.job")
+        claim_job("worker-1")
+        Job.objects.filter(id=job.id).update(
+            heartbeat_at=timezone.now()
+            - timedelta(seconds=settings.JOBS["LEASE_SECONDS"] + 1)
+        )
+
+        reclaimed_job = claim_job("worker-2")
+        self.assertEqual(reclaimed_job.id, job.id)
+        self.assertEqual(reclaimed_job.worker_id, "worker-2")
+        self.assertEqual(reclaimed_job.attempts, 2)
+
+    def test_commit_chunk_rejects_lost_lease(self):
+        """
+        Test that a worker cannot commit progress for a job another worker has taken over.
+        """
+        enqueue("tests.job")
+        job = claim_job("worker-1")
+        Job.objects.filter(id=job.id).update(worker_id="worker-2")
+
+        with self.assertRaises(JobLeaseLost):
+            commit_chunk(job, 0, {}, {"rows_processed": 1})
+
+        self.assertFalse(JobChunk.objects.filter(job=job).exists())
+
+    def test_job_without_handler_fails(self):
+        """
+        Test that a job of an unknown kind is marked as failed.
+        """
+        job = enqueue("tests.unknown")
+        self.assertTrue(run_next_job("worker-1"))
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.Status.FAILED)
+        self.assertEqual(
+            job.error, "No handler is registered for job kind tests.unknown."
+        )
+
+    def test_purge_deletes_jobs_past_retention(self):
+        """
+        Test that finished jobs past the retention period are deleted with their chunks, and newer or unfinished jobs are kept.
+        """
+        old_job = enqueue("tests.unknown")
+        run_next_job("worker-1")
+        JobChunk.objects.create(job=old_job, index=0, data={"rows": [1]})
+        new_job = enqueue("tests.unknown")
+        run_next_job("worker-1")
+        queued_job = enqueue("tests.job")
+
+        Job.objects.filter(id=old_job.id).update(
+            finished_at=timezone.now()
+            - timedelta(seconds=settings.JOBS["RETENTION_SECONDS"] + 1)
+        )
+
+        self.assertEqual(purge_finished_jobs(), 1)
+        self.assertEqual(
+            set(Job.objects.values_list("id", flat=True)), {new_job.id, queued_job.id}
+        )
+        self.assertFalse(JobChunk.objects.exists())
+
+
+class QuerysetOptimizerTests(TestCase):
+    def setUp(self):
+        self.skill = Skill.objects.create(name="Python")
+        self.level = Level.objects.create(skill=self.skill, name="Beginner", order=1)
+        self.lead = User.objects.create_user(
+            name="Lead", email="lead@example.com", password="Lead1234!"
+        )
+
+        for index in range(5):
+            user = User.objects.create_user(
+                name=f"User {index}",
+                email=f"user{index}@example.com",
+                password="User1234!",
+            )
+            UserSkill.objects.create(
+                user=user, skill=self.skill, current_level=self.level
+            )
+            team = Team.objects.create(name=f"Team {index}", team_lead=self.lead)
+            team.members.set([user, self.lead])
+
+    def test_plan_follows_source_paths_and_nested_serializers(self):
+        """
+        Test that the plan joins dotted sources and prefetches nested many serializers.
+        """
+        plan = get_queryset_plan(UserSkillSerializer)
+        self.assertEqual(plan.select_related, {"user", "skill", "current_level"})
+        self.assertIn("skill__name", plan.only)
+
+        plan = get_queryset_plan(TeamSerializer)
+        self.assertEqual(plan.select_related, {"team_lead"})
+        self.assertEqual(list(plan.prefetch_related), ["members"])
+        self.assertTrue(plan.can_defer)
+
+    def test_serialization_queries_do_not_grow_with_rows(self):
+        """
+        Test that optimized querysets serialize with a fixed number of queries.
+        """
+        for serializer_class, queryset in [
+            (UserSkillSerializer, UserSkill.objects.all()),
+            (TeamSerializer, Team.objects.all()),
+        ]:
+            with self.assertNumQueries(len(self.get_prefetches(serializer_class)) + 1):
+                serializer_class(
+                    optimize_queryset(queryset, serializer_class), many=True
+                ).data
+
+    def test_strict_mode_rejects_repeated_queries(self):
+        """
+        Test that serializing an unoptimized queryset fails in strict mode and passes when optimized.
+        """
+        with self.settings(QUERY_OPTIMIZER_STRICT=True):
+            with self.assertRaises(ExtraQueriesError):
+                serialize(UserSkillSerializer(list(UserSkill.objects.all()), many=True))
+
+            queryset = optimize_queryset(UserSkill.objects.all(), UserSkillSerializer)
+            serialize(UserSkillSerializer(list(queryset), many=True))
+
+    def test_debug_mode_logs_repeated_queries(self):
+        """
+        Test that outside strict mode, DEBUG logs repeated queries instead of failing.
+        """
+        with self.settings(QUERY_OPTIMIZER_STRICT=False, DEBUG=True):
+            with self.assertLogs("core.optimizer", level="WARNING"):
+                serialize(UserSkillSerializer(list(UserSkill.objects.all()), many=True))
+
+    def get_prefetches(self, serializer_class):
+        return get_queryset_plan(serializer_class).prefetch_related
+
+
+@override_settings(
+    QUERY_INSTRUMENTATION={
+        "ENABLED": True,
+        "LOG_SAMPLE_RATE": 0,
+        "SLOW_REQUEST_MS": 500,
+        "DUPLICATE_QUERIES_WARNING": 10,
+    },
+    METRICS={
+        "ENABLED": True,
+        "TOKEN": "scrape",
+        "DIRECTORY": "",
+        "FLUSH_INTERVAL": 1,
+    },
+)
+class InstrumentationMiddlewareTests(APITestCase):
+    def setUp(self):
+        registry.clear()
+        self.admin = User.objects.create_superuser(
+            name="Admin", email="admin@example.com", password="password"
+        )
+        self.client.force_authenticate(user=self.admin)
+
+    def get_timings(self, response):
+        return dict(
+            entry.strip().split(";", 1)
+            for entry in response["Server-Timing"].split(",")
+        )
+
+    def test_request_reports_queries_once(self):
+        """Test that a request's queries feed both the Server-Timing header and the metrics."""
+        response = self.client.get(reverse("roles-list"))
+
+        timings = self.get_timings(response)
+        self.assertEqual(set(timings), {"app", "db", "db-queries", "db-duplicates"})
+
+        queries = int(timings["db-queries"].split('"')[1])
+        self.assertGreater(queries, 0)
+        sample = (("view", "roles-list"), ("method", "GET"))
+        self.assertEqual(
+            registry.values[("db_queries_per_request_sum", sample)], queries
+        )
+
+    def test_slow_request_is_logged(self):
+        """Test that a request over the slow threshold is logged as a warning."""
+        with self.settings(
+            QUERY_INSTRUMENTATION={
+                **settings.QUERY_INSTRUMENTATION,
+                "SLOW_REQUEST_MS": 0,
+            }
+        ):
+            with self.assertLogs("core.instrumentation", level="WARNING") as logs:
+                response = self.client.get(reverse("roles-list"))
+
+        line = json.loads(logs.records[0].getMessage())
+        self.assertEqual(line["route"], "GET roles-list")
+        self.assertEqual(line["status"], 200)
+        self.assertEqual(
+            self.get_timings(response)["db-queries"], f'desc="{line["queries"]}"'
+        )
+
+    def test_disabled_instrumentation_leaves_metrics(self):
+        """Test that turning off query instrumentation drops the header but keeps the metrics."""
+        with self.settings(
+            QUERY_INSTRUMENTATION={**settings.QUERY_INSTRUMENTATION, "ENABLED": False}
+        ):
+            response = self.client.get(reverse("roles-list"))
+
+        self.assertNotIn("Server-Timing", response)
+        self.assertIn('view="roles-list"', registry.render())
+
+
+@override_settings(
+    METRICS={
+        "ENABLED": True,
+        "TOKEN": "scrape",
+        "DIRECTORY": "",
+        "FLUSH_INTERVAL": 1,
+    }
+)
+class MetricsTests(APITestCase):
+    def setUp(self):
+        registry.clear()
+
+    def scrape(self):
+        response = self.client.get(
+            reverse("metrics"), HTTP_AUTHORIZATION="Bearer scrape"
+        )
+        self.assertEqual(response.status_code, 200)
+
+        return response.content.decode()
+
+    def test_requests_are_counted_by_view(self):
+        """Test that requests are counted with their view, method and status."""
+        self.client.get(reverse("users-list"))
+
+        body = self.scrape()
+
+        self.assertIn(
+            'http_requests_total{view="users-list",method="GET",status="401"} 1.0',
+            body,
+        )
+        self.assertIn(
+            'http_request_duration_seconds_bucket{view="users-list",method="GET",le="+Inf"} 1.0',
+            body,
+        )
+        self.assertIn("# TYPE db_queries_per_request histogram", body)
+
+    def test_failed_sign_in_is_counted(self):
+        """Test that failed sign-ins count as authentication failures."""
+        self.client.post(
+            reverse("sign-in"),
+            {"email": "nobody@example.com", "password": "wrong"},
+            format="json",
+        )
+
+        self.assertIn('auth_failures_total{reason="credentials"} 1.0', self.scrape())
+
+    def test_scrape_requires_token(self):
+        """Test that the metrics endpoint rejects scrapers without the token."""
+        response = self.client.get(reverse("metrics"))
+
+        self.assertEqual(response.status_code, 401)
+
+    def test_totals_of_all_processes_are_added_up(self):
+        """Test that the metrics of every process writing to the directory are summed."""
+        with tempfile.TemporaryDirectory() as directory:
+            with open(os.path.join(directory, "metrics-1.json"), "w") as file:
+                json.dump([["ingest_rows_total", [["result", "created"]], 40]], file)
+
+            with self.settings(METRICS={**settings.METRICS, "DIRECTORY": directory}):
+                registry.metrics["ingest_rows_total"].inc(2, result="created")
+                body = self.scrape()
+
+        self.assertIn('ingest_rows_total{result="created"} 42.0', body)
+
+
+class QueryBudgetTests(TestCase):
+    def test_budget_fails_when_exceeded(self):
+        """Test that a block running more queries than its budget fails."""
+        with self.assertRaises(QueryBudgetExceeded) as context:
+            with query_budget(1, label="two counts"):
+                User.objects.count()
+                User.objects.count()
+
+        self.assertIn(
+            "two counts ran 2 queries, over its budget of 1", str(context.exception)
+        )
+        self.assertIn("2x SELECT COUNT(*)", str(context.exception))
+
+        # The overrun was expected, so it stays out of the runner's report.
+        testing.budget_records.pop()
+
+    def test_budget_as_decorator(self):
+        """Test that a decorated function is checked against its budget."""
+
+        @query_budget(1)
+        def count_users():
+            return User.objects.count()
+
+        self.assertEqual(count_users(), 0)
+        self.assertEqual(testing.budget_records[-1].label, count_users.__qualname__)
+
+    def test_constant_queries_fails_on_growth(self):
+        """Test that a query count growing with the dataset is reported."""
+
+        role = Role.objects.create(name="member")
+
+        def grow(size):
+            while User.objects.count() < size:
+                User.objects.create_user(
+                    name="User",
+                    email=f"user{User.objects.count()}@example.com",
+                    password="User1234!",
+                    role=role,
+                )
+
+        def request():
+            for user in User.objects.all():
+                user.role
+
+        with self.assertRaises(QueryBudgetExceeded):
+            assert_constant_queries(request, grow, sizes=(1, 3))
+
+
+class EndpointQueryBudgetTests(APITestCase):
+    """
+    List endpoints stay within their query budgets, and their query counts
+    stay the same as the rows they list grow.
+    """
+
+    sizes = (1, 10, 40)
+
+    def setUp(self):
+        group = PermissionGroup.objects.create(name="viewers")
+        role = Role.objects.create(name="viewer")
+        role.permissions.set(
+            Permission.objects.create(name=name, group=group)
+            for name in (
+                "view_user",
+                "view_team",
+                "view_skill",
+                "view_expectation_progress",
+            )
+        )
+        self.viewer = User.objects.create_user(
+            name="Viewer", email="viewer@example.com", password="Viewer123!", role=role
+        )
+        self.skill = Skill.objects.create(name="Python")
+        self.level = Level.objects.create(skill=self.skill, name="Beginner", order=1)
+        self.expectation = Expectation.objects.create(
+            level=self.level, description="Writes tests."
+        )
+        self.client.force_authenticate(user=self.viewer)
+
+    def create_user(self):
+        index = User.objects.count()
+
+        return User.objects.create_user(
+            name=f"User {index}",
+            email=f"user{index}@example.com",
+            password="User1234!",
+            role=self.viewer.role,
+        )
+
+    def grow(self, create):
+        def grow(size):
+            for _ in range(size - self.rows):
+                create()
+
+            self.rows = size
+
+        self.rows = 0
+
+        return grow
+
+    def get(self, url_name):
+        def request():
+            response = self.client.get(reverse(url_name), {"page_size": 50})
+            self.assertEqual(response.status_code, 200)
+
+        request.__name__ = url_name
+
+        return request
+
+    def test_user_list_budget(self):
+        """Test that the user list runs a fixed number of queries."""
+        assert_constant_queries(
+            self.get("users-list"),
+            self.grow(self.create_user),
+            self.sizes,
+            max_queries=3,
+        )
+
+    def test_team_list_budget(self):
+        """Test that the team list runs a fixed number of queries."""
+
+        def create_team():
+            team = Team.objects.create(
+                name=f"Team {Team.objects.count()}", team_lead=self.create_user()
+            )
+            team.members.set([self.create_user(), self.create_user()])
+
+        assert_constant_queries(
+            self.get("team-list"), self.grow(create_team), self.sizes, max_queries=4
+        )
+
+    def test_skill_list_budget(self):
+        """Test that the skill list runs a fixed number of queries."""
+
+        def create_skill():
+            Skill.objects.create(name=f"Skill {Skill.objects.count()}")
+
+        assert_constant_queries(
+            self.get("skill-list"), self.grow(create_skill), self.sizes, max_queries=3
+        )
+
+    def test_expectation_progress_list_budget(self):
+        """Test that the expectation progress list runs a fixed number of queries."""
+
+        def create_progress():
+            UserExpectationProgress.objects.create(
+                user=self.create_user(),
+                expectation=self.expectation,
+                status="approved",
+                approved_by=self.viewer,
+            )
+
+        assert_constant_queries(
+            self.get("expectation-progress-list"),
+            self.grow(create_progress),
+            self.sizes,
+            max_queries=3,
+        )
+
+
+class SeedSyntheticTests(TestCase):
+    def seed(self):
+        call_command(
+            "seed_synthetic",
+            users=30,
+            roles=3,
+            teams=4,
+            team_size=5,
+            skills=2,
+            levels=3,
+            expectations=2,
+            skills_per_user=2,
+            verbosity=0,
+        )
+
+        return list(
+            UserExpectationProgress.objects.order_by(
+                "user__email", "expectation_id"
+            ).values_list("user__email", "expectation__description", "status")
+        )
+
+    def test_seeds_requested_volumes(self):
+        """Test that the synthetic dataset has the requested volumes."""
+        progress = self.seed()
+
+        self.assertEqual(User.objects.count(), 30)
+        self.assertEqual(Team.members.through.objects.count(), 20)
+        self.assertEqual(Expectation.objects.count(), 12)
+        self.assertEqual(UserSkill.objects.count(), 60)
+        self.assertEqual(len(progress), 120)
+
+    def test_same_seed_produces_same_dataset(self):
+        """Test that seeding with the same seed produces the same rows."""
+        progress = self.seed()
+
+        for model in (UserExpectationProgress, UserSkill, Team, Skill, User, Role):
+            model.objects.all().delete()
+
+        self.assertEqual(self.seed(), progress)
@@ -0,0 +1,28 @@
+import hmac
+from django.conf import settings
+from django.http import Http404, HttpResponse
+from django.views.decorators.http import require_GET
+from core.metrics import registry
+
+
+@require_GET
+def metrics_view(request):
+    """
+    Metrics in the Prometheus text format. Scrapers authenticate with
+    ``Authorization: Bearer <METRICS_TOKEN>``; without a configured token the
+    endpoint only exists in DEBUG.
+    """
+    options = settings.METRICS
+    token = options["TOKEN"]
+
+    if not options["ENABLED"] or not (token or settings.DEBUG):
+        raise Http404
+
+    if token and not hmac.compare_digest(
+        request.headers.get("Authorization", ""), f"Bearer {token}"
+    ):
+        return HttpResponse("Invalid metrics token.\n", status=401)
+
+    return HttpResponse(
+        registry.render(), content_type="text/plain; version=0.0.4; charset=utf-8"
+    )
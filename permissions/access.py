@@ -1,17 +1,85 @@
 from rest_framework.permissions import BasePermission
+from permissions.registry import get_token_permissions
+
+
+def get_permission_names(request):
+    permission_names = getattr(request, "_permission_names", None)
+
+    if permission_names is None:
+        permission_names = _load_permission_names(request)
+        request._permission_names = permission_names
+
+    return permission_names
+
+
+def _load_permission_names(request):
+    requesting_user = request.user
+
+    if not requesting_user.is_authenticated or not requesting_user.role_id:
+        return frozenset()
+
+    principal = getattr(request, "principal", None)
+    if principal is not None and principal.user.id == requesting_user.id:
+        return principal.permissions
+
+    token = getattr(request, "auth", None)
+    if token is not None:
+        permission_names = get_token_permissions(token, requesting_user)
+        if permission_names is not None:
+            return permission_names
+
+    return frozenset(
+        name.lower()
+        for name in requesting_user.role.permissions.values_list("name", flat=True)
+    )
+
+
+def has_permission(request, name):
+    return name.lower() in get_permission_names(request)
+
+
+def has_permissions(request, names):
+    permission_names = get_permission_names(request)
+
+    return all(name.lower() in permission_names for name in names)
 
 
 class HasPermission(BasePermission):
-    def __init__(self, permission):
+    def __init__(self, permission=None):
         self.permission = permission
 
+    def get_required_permissions(self, view):
+        if self.permission:
+            required_permissions = self.permission
+        else:
+            required_permissions = getattr(view, "required_permissions", {}).get(
+                getattr(view, "action", None)
+            )
+
+        if isinstance(required_permissions, str):
+            return (required_permissions,)
+
+        return required_permissions or ()
+
     def has_permission(self, request, view):
+        required_permissions = self.get_required_permissions(view)
+
+        if not required_permissions:
+            return True
+
         requesting_user = request.user
 
-        if requesting_user.is_authenticated:
-            if requesting_user.role and requesting_user.role.has_permission(
-                self.permission
-            ):
-                return True
+        if not requesting_user.is_authenticated:
+            return False
+
+        if requesting_user.is_superuser and getattr(view, "allow_superuser", False):
+            return True
+
+        if has_permissions(request, required_permissions):
+            return True
+
+        self.message = getattr(view, "permission_denied_messages", {}).get(
+            getattr(view, "action", None), getattr(self, "message", None)
+        )
 
         return False
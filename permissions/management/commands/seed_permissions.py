@@ -368,3 +368,38 @@ class Command(BaseCommand):
                     self.stdout.write(
                         f"Permission {name} created with description: {description}."
                     )
+
+        # Create exports permission group
+        exports_permission_group, created = PermissionGroup.objects.get_or_create(
+            name="exports",
+            defaults={"description": "Permissions related to exporting data in bulk."},
+        )
+        if created:
+            if verbosity >= 1:
+                self.stdout.write(
+                    self.style.SUCCESS("Created permission group: exports.")
+                )
+
+        # Exports permissions
+        exports_permissions_data = [
+            (
+                "export_data",
+                "Permission to stream complete lists as CSV exports, in addition to the view permission of the exported data.",
+            ),
+        ]
+
+        for name, description in exports_permissions_data:
+            _, created = Permission.objects.get_or_create(
+                group=exports_permission_group,
+                name=name,
+                defaults={"description": description},
+            )
+            if created:
+                if verbosity >= 1:
+                    self.stdout.write(
+                        self.style.SUCCESS(f"Created permission: {name}.")
+                    )
+                if verbosity >= 2:
+                    self.stdout.write(
+                        f"Permission {name} created with description: {description}."
+                    )
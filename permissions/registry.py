@@ -0,0 +1,151 @@
+import threading
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import F
+from core.metrics import cache_requests
+
+
+ROLE_VERSION_CACHE_KEY = "roles:{}:version"
+
+
+class PermissionRegistry:
+    """
+    Maps every permission to a stable bit index (its primary key) so a set of
+    permissions can be carried as a single integer inside an access token.
+    """
+
+    def __init__(self):
+        self._names = None
+        self._lock = threading.Lock()
+
+    def get_names(self):
+        names = self._names
+
+        if names is None:
+            from permissions.models import Permission
+
+            names = {
+                permission_id: name.lower()
+                for permission_id, name in Permission.objects.values_list("id", "name")
+            }
+
+            with self._lock:
+                self._names = names
+
+        return names
+
+    def encode(self, permission_ids):
+        mask = 0
+
+        for permission_id in permission_ids:
+            mask |= 1 << permission_id
+
+        return mask
+
+    def decode(self, mask):
+        """
+        Returns the permission names of the mask, or None when it carries a
+        permission this process cannot name even after reloading, such as
+        one created by another process, so callers fall back to the database.
+        """
+        permission_names = self._decode(mask, self.get_names())
+
+        if permission_names is None:
+            # Permissions created elsewhere do not clear this process's names.
+            self.clear()
+            permission_names = self._decode(mask, self.get_names())
+
+        return permission_names
+
+    def _decode(self, mask, names):
+        permission_names = set()
+
+        while mask:
+            lowest_bit = mask & -mask
+            name = names.get(lowest_bit.bit_length() - 1)
+
+            if name is None:
+                return None
+
+            permission_names.add(name)
+            mask ^= lowest_bit
+
+        return frozenset(permission_names)
+
+    def clear(self):
+        with self._lock:
+            self._names = None
+
+
+permission_registry = PermissionRegistry()
+
+
+def get_role_version(role_id):
+    cache_key = ROLE_VERSION_CACHE_KEY.format(role_id)
+    version = cache.get(cache_key)
+
+    cache_requests.inc(
+        cache="role_version", result="miss" if version is None else "hit"
+    )
+
+    if version is None:
+        from roles.models import Role
+
+        version = (
+            Role.objects.filter(id=role_id).values_list("version", flat=True).first()
+        )
+
+        if version is None:
+            return None
+
+        cache.set(cache_key, version, settings.ROLE_VERSION_CACHE_TTL)
+
+    return version
+
+
+def bump_role_versions(role_ids):
+    from roles.models import Role
+
+    role_ids = list(role_ids)
+
+    Role.objects.filter(id__in=role_ids).update(version=F("version") + 1)
+    cache.delete_many([ROLE_VERSION_CACHE_KEY.format(role_id) for role_id in role_ids])
+
+
+def get_token_claims(user):
+    role = user.role
+
+    if not role:
+        return {"role_id": None, "role_version": None, "permissions": "0"}
+
+    mask = permission_registry.encode(role.permissions.values_list("id", flat=True))
+
+    return {
+        "role_id": role.id,
+        "role_version": role.version,
+        "permissions": format(mask, "x"),
+    }
+
+
+def get_token_permissions(token, user):
+    """
+    Returns the permission names carried by a verified access token, or None
+    when the token predates the user's current role or its permissions.
+    """
+    try:
+        role_id = token["role_id"]
+        role_version = token["role_version"]
+        mask = int(token["permissions"], 16)
+    except (KeyError, TypeError, ValueError):
+        return None
+
+    if role_id != user.role_id:
+        return None
+
+    if role_id is None:
+        return frozenset()
+
+    if role_version != get_role_version(role_id):
+        return None
+
+    return permission_registry.decode(mask)
@@ -0,0 +1,35 @@
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+from permissions.models import Permission, PermissionGroup
+from permissions.registry import bump_role_versions, permission_registry
+
+
+@receiver(post_save, sender=Permission)
+@receiver(post_delete, sender=Permission)
+def reset_permission_registry(sender, instance, **kwargs):
+    permission_registry.clear()
+
+
+@receiver(post_save, sender=Permission)
+@receiver(pre_delete, sender=Permission)
+def bump_permission_role_versions(sender, instance, created=False, **kwargs):
+    if created:
+        return
+
+    # Deleted permissions take their role links with them, so the roles are
+    # collected before the rows go away.
+    bump_role_versions(instance.roles.values_list("id", flat=True))
+
+
+@receiver(post_save, sender=PermissionGroup)
+def bump_group_role_versions(sender, instance, created, **kwargs):
+    if created:
+        return
+
+    from roles.models import Role
+
+    bump_role_versions(
+        Role.objects.filter(permissions__group=instance)
+        .values_list("id", flat=True)
+        .distinct()
+    )
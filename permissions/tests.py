@@ -0,0 +1,246 @@
+from types import SimpleNamespace
+from django.test import TestCase
+from rest_framework.test import APIRequestFactory
+from rest_framework_simplejwt.tokens import AccessToken
+from permissions.access import (
+    HasPermission,
+    get_permission_names,
+    has_permission,
+    has_permissions,
+)
+from permissions.models import Permission, PermissionGroup
+from permissions.registry import get_role_version, get_token_claims, permission_registry
+from roles.models import Role
+from users.models import User
+
+
+class PermissionEngineTests(TestCase):
+    def setUp(self):
+        self.skills_permission_group = PermissionGroup.objects.create(
+            name="skills", description="Permissions related to skill management."
+        )
+        self.view_skill_permission = Permission.objects.create(
+            name="view_skill",
+            description="Permission to view skills.",
+            group=self.skills_permission_group,
+        )
+        self.create_skill_permission = Permission.objects.create(
+            name="create_skill",
+            description="Permission to create a new skill.",
+            group=self.skills_permission_group,
+        )
+
+        self.view_role = Role.objects.create(name="viewer")
+        self.view_role.permissions.set([self.view_skill_permission])
+
+        self.view_user = User.objects.create_user(
+            name="Viewer",
+            email="viewer@example.com",
+            password="Viewer123!",
+            role=self.view_role,
+        )
+        self.no_role_user = User.objects.create_user(
+            name="No Role",
+            email="norole@example.com",
+            password="NoRole123!",
+        )
+        self.superuser = User.objects.create_superuser(
+            name="Superuser",
+            email="superuser@example.com",
+            password="Superuser123!",
+        )
+
+        self.factory = APIRequestFactory()
+
+    def make_request(self, user):
+        request = self.factory.get("/")
+        request.user = User.objects.select_related("role").get(id=user.id)
+
+        return request
+
+    def make_view(self, action, **attributes):
+        return SimpleNamespace(
+            action=action,
+            required_permissions={
+                "list": "view_skill",
+                "create": ("view_skill", "create_skill"),
+            },
+            permission_denied_messages={
+                "create": "You do not have permission to create skills.",
+            },
+            **attributes,
+        )
+
+    def test_permission_names_loaded_once_per_request(self):
+        """
+        Test that the permission set is loaded with a single query and memoized on the request.
+        """
+        request = self.make_request(self.view_user)
+
+        with self.assertNumQueries(1):
+            self.assertTrue(has_permission(request, "view_skill"))
+            self.assertFalse(has_permission(request, "create_skill"))
+            self.assertFalse(has_permissions(request, ["view_skill", "create_skill"]))
+            self.assertEqual(get_permission_names(request), {"view_skill"})
+
+    def test_permission_names_case_insensitive(self):
+        """
+        Test that permission checks ignore case, like Role.has_permission.
+        """
+        request = self.make_request(self.view_user)
+        self.assertTrue(has_permission(request, "VIEW_SKILL"))
+
+    def test_user_without_role_has_no_permissions(self):
+        """
+        Test that users without a role hold no permissions and cost no queries.
+        """
+        request = self.make_request(self.no_role_user)
+
+        with self.assertNumQueries(0):
+            self.assertEqual(get_permission_names(request), frozenset())
+
+    def test_has_permission_class_allows_declared_action(self):
+        """
+        Test that HasPermission allows actions whose declared permission is held.
+        """
+        request = self.make_request(self.view_user)
+        self.assertTrue(HasPermission().has_permission(request, self.make_view("list")))
+
+    def test_has_permission_class_allows_undeclared_action(self):
+        """
+        Test that HasPermission does not restrict actions without declared permissions.
+        """
+        request = self.make_request(self.no_role_user)
+        self.assertTrue(
+            HasPermission().has_permission(request, self.make_view("retrieve"))
+        )
+
+    def test_has_permission_class_denies_with_message(self):
+        """
+        Test that HasPermission denies missing permissions with the view's message.
+        """
+        request = self.make_request(self.view_user)
+        permission = HasPermission()
+        self.assertFalse(permission.has_permission(request, self.make_view("create")))
+        self.assertEqual(
+            permission.message, "You do not have permission to create skills."
+        )
+
+    def test_has_permission_class_superuser(self):
+        """
+        Test that superusers bypass declared permissions only where the view allows it.
+        """
+        request = self.make_request(self.superuser)
+        self.assertFalse(
+            HasPermission().has_permission(request, self.make_view("create"))
+        )
+        self.assertTrue(
+            HasPermission().has_permission(
+                request, self.make_view("create", allow_superuser=True)
+            )
+        )
+
+    def test_has_permission_class_explicit_permission(self):
+        """
+        Test that an explicit permission passed to HasPermission overrides the view's declaration.
+        """
+        request = self.make_request(self.view_user)
+        self.assertFalse(
+            HasPermission("create_skill").has_permission(
+                request, self.make_view("list")
+            )
+        )
+
+
+class PermissionRegistryTests(TestCase):
+    def setUp(self):
+        self.skills_permission_group = PermissionGroup.objects.create(
+            name="skills", description="Permissions related to skill management."
+        )
+        self.view_skill_permission = Permission.objects.create(
+            name="view_skill",
+            description="Permission to view skills.",
+            group=self.skills_permission_group,
+        )
+        self.create_skill_permission = Permission.objects.create(
+            name="create_skill",
+            description="Permission to create a new skill.",
+            group=self.skills_permission_group,
+        )
+
+        self.view_role = Role.objects.create(name="viewer")
+        self.view_role.permissions.set([self.view_skill_permission])
+
+        self.view_user = User.objects.create_user(
+            name="Viewer",
+            email="viewer@example.com",
+            password="Viewer123!",
+            role=self.view_role,
+        )
+
+        self.factory = APIRequestFactory()
+
+    def test_encode_decode_round_trip(self):
+        """
+        Test that a permission bitmask decodes back to the permission names it was built from.
+        """
+        mask = permission_registry.encode(
+            [self.view_skill_permission.id, self.create_skill_permission.id]
+        )
+        self.assertEqual(
+            permission_registry.decode(mask), {"view_skill", "create_skill"}
+        )
+
+    def test_registry_follows_permission_changes(self):
+        """
+        Test that renamed permissions decode to their new names.
+        """
+        mask = permission_registry.encode([self.view_skill_permission.id])
+        permission_registry.decode(mask)
+        self.view_skill_permission.name = "read_skill"
+        self.view_skill_permission.save()
+        self.assertEqual(permission_registry.decode(mask), {"read_skill"})
+
+    def test_registry_reloads_permissions_created_elsewhere(self):
+        """
+        Test that a permission created without this process's signals is decoded after a reload.
+        """
+        permission_registry.get_names()
+        # bulk_create sends no signals, like a save in another process.
+        (export_permission,) = Permission.objects.bulk_create(
+            [Permission(name="export_data", group=self.skills_permission_group)]
+        )
+        mask = permission_registry.encode(
+            [self.view_skill_permission.id, export_permission.id]
+        )
+        self.assertEqual(
+            permission_registry.decode(mask), {"view_skill", "export_data"}
+        )
+
+    def test_unknown_permission_bit_decodes_to_none(self):
+        """
+        Test that a mask carrying an unknown permission decodes to None.
+        """
+        mask = permission_registry.encode(
+            [self.view_skill_permission.id, self.create_skill_permission.id + 100]
+        )
+        self.assertIsNone(permission_registry.decode(mask))
+
+    def test_token_claims_answer_permission_checks_without_queries(self):
+        """
+        Test that permission checks are answered from valid token claims alone.
+        """
+        user = User.objects.select_related("role").get(id=self.view_user.id)
+        token = AccessToken.for_user(user)
+        for claim, value in get_token_claims(user).items():
+            token[claim] = value
+
+        request = self.factory.get("/")
+        request.user = user
+        request.auth = token
+        get_role_version(self.view_role.id)
+        permission_registry.get_names()
+
+        with self.assertNumQueries(0):
+            self.assertTrue(has_permission(request, "view_skill"))
+            self.assertFalse(has_permission(request, "create_skill"))
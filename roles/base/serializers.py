@@ -25,15 +25,10 @@ class RoleSerializer(serializers.ModelSerializer):
             "does_not_exist": "One or more of the provided permissions could not be found.",
         },
     )
-    user_ids = serializers.PrimaryKeyRelatedField(
-        many=True,
-        queryset=User.get_all(),
+    user_ids = serializers.ListField(
+        child=serializers.IntegerField(),
         write_only=True,
-        source="users",
         required=False,
-        error_messages={
-            "does_not_exist": "One or more of the provided users could not be found.",
-        },
     )
 
     groupedPermissions = serializers.SerializerMethodField(read_only=True)
@@ -63,32 +58,47 @@ class RoleSerializer(serializers.ModelSerializer):
     def get_users(self, obj):
         return [
             {"id": user.id, "name": user.name, "email": user.email}
-            for user in User.get_by_role(obj)
+            for user in obj.user_set.all()
         ]
 
     def get_groupedPermissions(self, obj):
+        grouped_permissions = self.context.get("grouped_permissions")
+
+        if grouped_permissions is not None and obj.id in grouped_permissions:
+            return grouped_permissions[obj.id]
+
         return obj.get_grouped_permissions()
 
     def validate_name(self, value):
         return validate_role_name(self.instance, value)
 
+    def validate_user_ids(self, value):
+        # One query for the whole list instead of one per user.
+        user_ids = set(value)
+
+        if User.get_by_ids(user_ids).count() != len(user_ids):
+            raise serializers.ValidationError(
+                "One or more of the provided users could not be found."
+            )
+
+        return user_ids
+
     def create(self, validated_data):
         permissions = validated_data.pop("permissions", [])
-        users = validated_data.pop("users", [])
+        user_ids = validated_data.pop("user_ids", [])
 
         role = Role.objects.create(**validated_data)
 
         role.permissions.set(permissions)
 
-        for user in users:
-            user.role = role
-            user.save()
+        if user_ids:
+            role.set_users(user_ids)
 
         return role
 
     def update(self, instance, validated_data):
         permissions = validated_data.pop("permissions", None)
-        users = validated_data.pop("users", None)
+        user_ids = validated_data.pop("user_ids", None)
 
         for attr, value in validated_data.items():
             setattr(instance, attr, value)
@@ -96,12 +106,8 @@ class RoleSerializer(serializers.ModelSerializer):
         if permissions is not None:
             instance.permissions.set(permissions)
 
-        if users is not None:
-            User.get_by_role(instance).update(role=None)
-
-            for user in users:
-                user.role = instance
-                user.save()
+        if user_ids is not None:
+            instance.set_users(user_ids)
 
         instance.save()
 
@@ -1,6 +1,11 @@
+from unittest import mock
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from rest_framework import status
 from rest_framework.test import APITestCase
+from authentication.cache import principal_cache
 from permissions.models import Permission, PermissionGroup
 from roles.models import Role
 from users.models import User
@@ -196,6 +201,50 @@ class RoleTests(APITestCase):
         for role in response.data:
             self.assertNotEqual(role["name"], self.admin_role.name)
 
+    def test_roles_query_count_independent_of_role_count(self):
+        """
+        Test that listing roles costs the same number of queries regardless of how many roles exist.
+        """
+        self.authenticate(
+            email=self.admin_user_data["email"],
+            password=self.admin_user_data["password"],
+        )
+        self.client.get(self.roles_url)
+
+        with CaptureQueriesContext(connection) as initial_queries:
+            self.client.get(self.roles_url)
+
+        for index in range(5):
+            role = Role.objects.create(name=f"extra_{index}")
+            role.permissions.set([self.view_role_permission])
+            User.objects.create_user(
+                name=f"Extra {index}",
+                email=f"extra{index}@example.com",
+                password="Extra123!",
+                role=role,
+            )
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.roles_url)
+
+        self.assertEqual(len(response.data), 10)
+        self.assertLessEqual(len(queries), len(initial_queries) + 1)
+
+    def test_roles_paginated(self):
+        """
+        Test that roles are paginated when pagination parameters are provided.
+        """
+        self.authenticate(
+            email=self.admin_user_data["email"],
+            password=self.admin_user_data["password"],
+        )
+        response = self.client.get(self.roles_url, {"page": 1, "page_size": 2})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["count"], 5)
+        self.assertEqual(len(response.data["results"]), 2)
+        self.assertIn("users", response.data["results"][0])
+        self.assertIn("groupedPermissions", response.data["results"][0])
+
     def test_roles_superuser_search_by_role_name(self):
         """
         Test that authenticated users who are superusers can search roles by role name.
@@ -833,3 +882,221 @@ class RoleTests(APITestCase):
         )
         response = self.client.delete(self.role_url(self.view_role.id))
         self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+
+
+class GroupedPermissionsTests(APITestCase):
+    def setUp(self):
+        self.roles_permission_group = PermissionGroup.objects.create(
+            name="roles", description="Permissions related to role management."
+        )
+        self.users_permission_group = PermissionGroup.objects.create(
+            name="users", description="Permissions related to user management."
+        )
+
+        self.view_role_permission = Permission.objects.create(
+            name="view_role",
+            description="Permission to view roles.",
+            group=self.roles_permission_group,
+        )
+        self.create_role_permission = Permission.objects.create(
+            name="create_role",
+            description="Permission to create a new role.",
+            group=self.roles_permission_group,
+        )
+        self.view_user_permission = Permission.objects.create(
+            name="view_user",
+            description="Permission to view users.",
+            group=self.users_permission_group,
+        )
+
+        self.view_role = Role.objects.create(name="viewer")
+        self.view_role.permissions.set(
+            [self.view_role_permission, self.view_user_permission]
+        )
+        self.create_role = Role.objects.create(name="creator")
+        self.create_role.permissions.set([self.create_role_permission])
+
+        cache.clear()
+
+    def get_role(self, role):
+        return Role.objects.get(id=role.id)
+
+    def test_grouped_permissions_grouped_by_group(self):
+        """
+        Test that permissions are grouped under their permission groups.
+        """
+        grouped_permissions = self.get_role(self.view_role).get_grouped_permissions()
+        self.assertEqual(
+            [
+                (
+                    group["name"],
+                    [permission["name"] for permission in group["permissions"]],
+                )
+                for group in grouped_permissions
+            ],
+            [("roles", ["view_role"]), ("users", ["view_user"])],
+        )
+
+    def test_grouped_permissions_cached(self):
+        """
+        Test that grouped permissions are built once per role version.
+        """
+        role = self.get_role(self.view_role)
+        role.get_grouped_permissions()
+
+        with self.assertNumQueries(0):
+            role.get_grouped_permissions()
+
+    def test_grouped_permissions_for_roles_single_query(self):
+        """
+        Test that grouped permissions for many roles are built with a single query.
+        """
+        roles = list(Role.objects.all())
+
+        with self.assertNumQueries(1):
+            grouped_permissions = Role.get_grouped_permissions_for_roles(roles)
+
+        self.assertEqual(
+            grouped_permissions[self.create_role.id][0]["permissions"][0]["name"],
+            "create_role",
+        )
+
+    def test_grouped_permissions_follow_role_changes(self):
+        """
+        Test that adding a permission to a role is reflected in its grouped permissions.
+        """
+        self.get_role(self.create_role).get_grouped_permissions()
+        self.create_role.permissions.add(self.view_role_permission)
+        grouped_permissions = self.get_role(self.create_role).get_grouped_permissions()
+        self.assertEqual(len(grouped_permissions[0]["permissions"]), 2)
+
+    def test_grouped_permissions_follow_permission_changes(self):
+        """
+        Test that editing a permission or its group is reflected in grouped permissions.
+        """
+        self.get_role(self.view_role).get_grouped_permissions()
+
+        self.view_role_permission.description = "Updated description."
+        self.view_role_permission.save()
+        self.users_permission_group.name = "accounts"
+        self.users_permission_group.save()
+
+        grouped_permissions = self.get_role(self.view_role).get_grouped_permissions()
+        self.assertEqual(
+            grouped_permissions[0]["permissions"][0]["description"],
+            "Updated description.",
+        )
+        self.assertEqual(grouped_permissions[1]["name"], "accounts")
+
+    def test_grouped_permissions_follow_permission_delete(self):
+        """
+        Test that deleting a permission removes it from grouped permissions.
+        """
+        self.get_role(self.view_role).get_grouped_permissions()
+        self.view_user_permission.delete()
+        grouped_permissions = self.get_role(self.view_role).get_grouped_permissions()
+        self.assertEqual([group["name"] for group in grouped_permissions], ["roles"])
+
+
+class RoleMembershipTests(APITestCase):
+    def setUp(self):
+        self.role = Role.objects.create(name="members")
+        self.other_role = Role.objects.create(name="others")
+
+        self.users = [
+            User.objects.create_user(
+                name=f"Member {index}",
+                email=f"member{index}@example.com",
+                password="Member123!",
+                role=self.role if index < 3 else self.other_role,
+            )
+            for index in range(6)
+        ]
+
+    def test_set_users_applies_difference(self):
+        """
+        Test that only users joining or leaving the role are updated.
+        """
+        self.role.set_users([user.id for user in self.users[1:5]])
+        self.assertEqual(
+            set(User.get_by_role(self.role).values_list("id", flat=True)),
+            {user.id for user in self.users[1:5]},
+        )
+        self.assertIsNone(User.objects.get(id=self.users[0].id).role)
+        self.assertEqual(User.objects.get(id=self.users[5].id).role, self.other_role)
+
+    def test_set_users_chunks_updates(self):
+        """
+        Test that membership changes are written with one UPDATE per chunk rather than per user.
+        """
+        with mock.patch("roles.models.MEMBERSHIP_UPDATE_CHUNK_SIZE", 2):
+            with CaptureQueriesContext(connection) as queries:
+                self.role.set_users([user.id for user in self.users[3:]])
+
+        updates = [query for query in queries if query["sql"].startswith("UPDATE")]
+        self.assertEqual(len(updates), 4)
+        self.assertEqual(User.get_by_role(self.role).count(), 3)
+
+    def test_set_users_invalidates_principals(self):
+        """
+        Test that users whose role changes have their cached principals dropped.
+        """
+        principal_cache.get_user(self.users[0].id)
+        principal_cache.get_user(self.users[5].id)
+        self.role.set_users([self.users[5].id])
+        self.assertIsNone(principal_cache.get(self.users[0].id))
+        self.assertIsNone(principal_cache.get(self.users[5].id))
+
+    def test_update_role_queries_do_not_grow_with_users(self):
+        """
+        Test that assigning 5 or 50 users to a role runs the same number of queries.
+        """
+        group = PermissionGroup.objects.create(name="roles")
+        manager_role = Role.objects.create(name="manager")
+        manager_role.permissions.set(
+            [Permission.objects.create(name="update_role", group=group)]
+        )
+        manager = User.objects.create_user(
+            name="Manager",
+            email="manager@example.com",
+            password="Manager123!",
+            role=manager_role,
+        )
+        self.client.force_authenticate(user=manager)
+        for index in range(6, 50):
+            User.objects.create_user(
+                name=f"Member {index}",
+                email=f"member{index}@example.com",
+                password="Member123!",
+            )
+        user_ids = list(
+            User.objects.exclude(id=manager.id)
+            .order_by("id")
+            .values_list("id", flat=True)
+        )
+        url = reverse("roles-detail", args=[self.role.id])
+
+        # Warms the per-process caches so both measured requests start alike.
+        self.client.put(
+            url,
+            {"name": "members", "permission_ids": [], "user_ids": user_ids[:1]},
+            format="json",
+        )
+
+        counts = []
+        for size in (5, 50):
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.put(
+                    url,
+                    {
+                        "name": "members",
+                        "permission_ids": [],
+                        "user_ids": user_ids[:size],
+                    },
+                    format="json",
+                )
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            counts.append(len(queries))
+
+        self.assertEqual(counts[0], counts[1])
+        self.assertEqual(User.get_by_role(self.role).count(), 50)
@@ -1,18 +1,57 @@
+from django.db.models import Prefetch
 from django.http import Http404
 from rest_framework import status, viewsets
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.exceptions import NotFound, PermissionDenied
+from authentication.cache import principal_cache
+from core.pagination import BoundedListMixin, BoundedPageNumberPagination
+from permissions.access import HasPermission, has_permission
 from permissions.models import Permission
 from roles.models import Role
 from users.models import User
 from roles.base.serializers import RoleSerializer
 
 
-class RoleViewSet(viewsets.ModelViewSet):
+class RolePagination(BoundedPageNumberPagination):
+    page_size = 10
+    page_size_query_param = "page_size"
+    max_page_size = 50
+
+
+class RoleViewSet(BoundedListMixin, viewsets.ModelViewSet):
     queryset = Role.get_all()
     serializer_class = RoleSerializer
-    permission_classes = [IsAuthenticated]
+    permission_classes = [IsAuthenticated, HasPermission]
+    pagination_class = RolePagination
+    required_permissions = {
+        "create": "create_role",
+    }
+    permission_denied_messages = {
+        "create": "You do not have permission to create a role.",
+    }
+
+    def get_queryset(self):
+        return (
+            super()
+            .get_queryset()
+            .prefetch_related(
+                Prefetch(
+                    "user_set",
+                    queryset=User.objects.only("id", "name", "email", "role_id"),
+                )
+            )
+            .order_by("id")
+        )
+
+    def get_list_serializer(self, rows):
+        return self.get_serializer_for_roles(rows)
+
+    def get_serializer_for_roles(self, roles):
+        context = self.get_serializer_context()
+        context["grouped_permissions"] = Role.get_grouped_permissions_for_roles(roles)
+
+        return self.get_serializer(roles, many=True, context=context)
 
     def check_all_permissions_role_exists(self):
         return Role.get_roles_with_all_permissions().exists()
@@ -33,12 +72,7 @@ class RoleViewSet(viewsets.ModelViewSet):
         if requesting_user.is_superuser:
             queryset = queryset.filter(name__icontains=search)
         else:
-            has_view_role_permission = (
-                requesting_user.role
-                and requesting_user.role.has_permission("view_role")
-            )
-
-            if has_view_role_permission:
+            if has_permission(request, "view_role"):
                 superuser_ids = User.get_superusers().values_list("id", flat=True)
 
                 queryset = queryset.exclude(user__id__in=superuser_ids).filter(
@@ -49,13 +83,11 @@ class RoleViewSet(viewsets.ModelViewSet):
                     hasattr(requesting_user, "role")
                     and requesting_user.role is not None
                 ):
-                    queryset = Role.get_by_id(requesting_user.role.id)
+                    queryset = queryset.filter(id=requesting_user.role.id)
                 else:
                     queryset = Role.objects.none()
 
-        serializer = self.get_serializer(queryset, many=True)
-
-        return Response(serializer.data)
+        return self.get_list_response(queryset)
 
     def retrieve(self, request, *args, **kwargs):
         requesting_user = request.user
@@ -69,9 +101,7 @@ class RoleViewSet(viewsets.ModelViewSet):
         if not hasattr(requesting_user, "role") or requesting_user.role is None:
             raise PermissionDenied("User has no assigned role.")
 
-        has_view_role_permission = (
-            requesting_user.role and requesting_user.role.has_permission("view_role")
-        )
+        has_view_role_permission = has_permission(request, "view_role")
         is_own_role = requesting_user.role.id == role.id
         if not has_view_role_permission and not is_own_role:
             raise PermissionDenied("You do not have permission to view this role.")
@@ -88,13 +118,6 @@ class RoleViewSet(viewsets.ModelViewSet):
         requesting_user = request.user
         user_ids = request.data.get("user_ids")
 
-        has_create_role_permission = (
-            requesting_user.role and requesting_user.role.has_permission("create_role")
-        )
-
-        if not has_create_role_permission:
-            raise PermissionDenied("You do not have permission to create a role.")
-
         if user_ids:
             if str(requesting_user.id) in map(str, user_ids):
                 raise PermissionDenied("You cannot assign roles to yourself.")
@@ -117,6 +140,7 @@ class RoleViewSet(viewsets.ModelViewSet):
 
             if has_all_permissions and user_ids:
                 User.get_by_ids(user_ids).update(is_staff=True, is_superuser=True)
+                principal_cache.invalidate_users(user_ids)
 
             return Response(
                 self.get_serializer(role).data,
@@ -129,11 +153,7 @@ class RoleViewSet(viewsets.ModelViewSet):
         requesting_user = request.user
         role = self.get_object()
 
-        has_update_role_permission = (
-            requesting_user.role and requesting_user.role.has_permission("update_role")
-        )
-
-        if not has_update_role_permission:
+        if not has_permission(request, "update_role"):
             raise PermissionDenied("You do not have permission to update this role.")
 
         is_own_role = (
@@ -161,6 +181,10 @@ class RoleViewSet(viewsets.ModelViewSet):
         if serializer.is_valid():
             role = serializer.save()
 
+            # The role's users may have been reassigned, so the users
+            # prefetched by get_object() are no longer accurate.
+            role._prefetched_objects_cache = {}
+
             all_permissions_count = Permission.count_all()
             has_all_permissions = role.permissions.count() == all_permissions_count
 
@@ -170,8 +194,10 @@ class RoleViewSet(viewsets.ModelViewSet):
             if has_all_permissions:
                 if user_ids:
                     User.get_by_ids(user_ids).update(is_staff=True, is_superuser=True)
+                    principal_cache.invalidate_users(user_ids)
                 else:
                     User.get_by_role(role).update(is_staff=True, is_superuser=True)
+                    principal_cache.invalidate_role(role.id)
 
             return Response(
                 self.get_serializer(role).data,
@@ -183,11 +209,7 @@ class RoleViewSet(viewsets.ModelViewSet):
         requesting_user = request.user
         role = self.get_object()
 
-        has_delete_role_permission = (
-            requesting_user.role and requesting_user.role.has_permission("delete_role")
-        )
-
-        if not has_delete_role_permission:
+        if not has_permission(request, "delete_role"):
             raise PermissionDenied("You do not have permission to delete this role.")
 
         is_own_role = (
@@ -0,0 +1,18 @@
+# Generated by Django 5.2 on 2026-10-17 00:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("roles", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="role",
+            name="version",
+            field=models.PositiveIntegerField(default=1),
+        ),
+    ]
@@ -1,10 +1,17 @@
-from django.db import models
+from django.conf import settings
+from django.core.cache import cache
+from django.db import models, transaction
 from permissions.models import Permission
 
 
+GROUPED_PERMISSIONS_CACHE_KEY = "roles:{}:grouped_permissions:{}"
+MEMBERSHIP_UPDATE_CHUNK_SIZE = 500
+
+
 class Role(models.Model):
     name = models.CharField(max_length=100, unique=True)
     permissions = models.ManyToManyField(Permission, related_name="roles")
+    version = models.PositiveIntegerField(default=1)
 
     def __str__(self):
         return self.name
@@ -34,34 +41,7 @@ class Role(models.Model):
         return self.permissions.filter(group__in=groups)
 
     def get_grouped_permissions(self):
-        grouped_permissions = []
-
-        for permission in self.permissions.select_related("group"):
-            group = permission.group
-
-            group_entry = next(
-                (entry for entry in grouped_permissions if entry["name"] == group.name),
-                None,
-            )
-
-            if not group_entry:
-                group_entry = {
-                    "id": group.id,
-                    "name": group.name,
-                    "description": group.description,
-                    "permissions": [],
-                }
-                grouped_permissions.append(group_entry)
-
-            group_entry["permissions"].append(
-                {
-                    "id": permission.id,
-                    "name": permission.name,
-                    "description": permission.description,
-                }
-            )
-
-        return grouped_permissions
+        return Role.get_grouped_permissions_for_roles([self])[self.id]
 
     @classmethod
     def exists_by_id(cls, id):
@@ -103,6 +83,122 @@ class Role(models.Model):
 
         return cls.objects.filter(query)
 
+    def set_users(self, user_ids):
+        """
+        Makes exactly the users with the given IDs members of this role. Only
+        the difference from the current membership is written, with one UPDATE
+        per chunk of IDs.
+        """
+        from authentication.cache import principal_cache
+        from users.models import User
+        from users.search import user_search_index
+
+        user_ids = set(user_ids)
+        current_user_ids = set(User.get_by_role(self).values_list("id", flat=True))
+
+        added_user_ids = sorted(user_ids - current_user_ids)
+        removed_user_ids = sorted(current_user_ids - user_ids)
+
+        with transaction.atomic():
+            for index in range(0, len(removed_user_ids), MEMBERSHIP_UPDATE_CHUNK_SIZE):
+                chunk = removed_user_ids[index : index + MEMBERSHIP_UPDATE_CHUNK_SIZE]
+                User.objects.filter(id__in=chunk, role=self).update(role=None)
+
+            for index in range(0, len(added_user_ids), MEMBERSHIP_UPDATE_CHUNK_SIZE):
+                chunk = added_user_ids[index : index + MEMBERSHIP_UPDATE_CHUNK_SIZE]
+                User.objects.filter(id__in=chunk).update(role=self)
+
+            user_search_index.update([*added_user_ids, *removed_user_ids])
+
+        principal_cache.invalidate_users([*added_user_ids, *removed_user_ids])
+
+    @classmethod
+    def build_grouped_permissions(cls, role_ids):
+        grouped_permissions = {role_id: {} for role_id in role_ids}
+
+        rows = (
+            cls.permissions.through.objects.filter(role_id__in=role_ids)
+            .order_by("permission_id")
+            .values_list(
+                "role_id",
+                "permission_id",
+                "permission__name",
+                "permission__description",
+                "permission__group_id",
+                "permission__group__name",
+                "permission__group__description",
+            )
+        )
+
+        for (
+            role_id,
+            permission_id,
+            permission_name,
+            permission_description,
+            group_id,
+            group_name,
+            group_description,
+        ) in rows:
+            groups = grouped_permissions[role_id]
+
+            group_entry = groups.get(group_id)
+            if group_entry is None:
+                group_entry = groups[group_id] = {
+                    "id": group_id,
+                    "name": group_name,
+                    "description": group_description,
+                    "permissions": [],
+                }
+
+            group_entry["permissions"].append(
+                {
+                    "id": permission_id,
+                    "name": permission_name,
+                    "description": permission_description,
+                }
+            )
+
+        return {
+            role_id: list(groups.values())
+            for role_id, groups in grouped_permissions.items()
+        }
+
+    @classmethod
+    def get_grouped_permissions_for_roles(cls, roles):
+        """
+        Returns grouped permissions for every role keyed by role ID. Entries are
+        cached per role version, so any change that bumps the version (see
+        roles.signals and permissions.signals) is picked up on the next read.
+        """
+        cache_keys = {
+            role.id: GROUPED_PERMISSIONS_CACHE_KEY.format(role.id, role.version)
+            for role in roles
+        }
+        cached_permissions = cache.get_many(cache_keys.values())
+
+        grouped_permissions = {}
+        missing_role_ids = []
+
+        for role_id, cache_key in cache_keys.items():
+            if cache_key in cached_permissions:
+                grouped_permissions[role_id] = cached_permissions[cache_key]
+            else:
+                missing_role_ids.append(role_id)
+
+        if missing_role_ids:
+            built_permissions = cls.build_grouped_permissions(missing_role_ids)
+
+            cache.set_many(
+                {
+                    cache_keys[role_id]: permissions
+                    for role_id, permissions in built_permissions.items()
+                },
+                settings.GROUPED_PERMISSIONS_CACHE_TTL,
+            )
+            grouped_permissions.update(built_permissions)
+
+        return grouped_permissions
+
     @classmethod
     def get_roles_with_all_permissions(cls):
         all_permissions_count = Permission.count_all()
@@ -0,0 +1,31 @@
+from django.core.cache import cache
+from django.db.models.signals import m2m_changed, post_delete
+from django.dispatch import receiver
+from permissions.registry import ROLE_VERSION_CACHE_KEY, bump_role_versions
+from roles.models import Role
+
+
+@receiver(m2m_changed, sender=Role.permissions.through)
+def bump_role_permissions_version(sender, instance, action, reverse, **kwargs):
+    if action not in ("post_add", "post_remove", "post_clear"):
+        return
+
+    pk_set = kwargs.get("pk_set")
+    if action != "post_clear" and not pk_set:
+        return
+
+    if not reverse:
+        bump_role_versions([instance.id])
+        # Keep the in-memory role current so a later save() does not write
+        # the old version back.
+        instance.refresh_from_db(fields=["version"])
+    elif pk_set:
+        bump_role_versions(pk_set)
+    else:
+        # A cleared permission no longer tells us which roles held it.
+        bump_role_versions(Role.objects.values_list("id", flat=True))
+
+
+@receiver(post_delete, sender=Role)
+def forget_role_version(sender, instance, **kwargs):
+    cache.delete(ROLE_VERSION_CACHE_KEY.format(instance.id))
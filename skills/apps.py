@@ -3,4 +3,8 @@ from django.apps import AppConfig
 
 class SkillsConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
-    name = "skills"
\ No newline at end of file
+    name = "skills"
+
+    def ready(self):
+        import skills.expectation_progress.jobs
+        import skills.search
@@ -224,6 +224,21 @@ class SkillTests(APITestCase):
         self.assertEqual(len(response.data), 1)
         self.assertEqual(response.data[0]["name"], "JavaScript")
 
+    def test_skills_search_ranks_and_follows_updates(self):
+        """Test that skill search ranks by relevance and sees updated skills."""
+        self.authenticate(
+            email=self.view_user_data["email"],
+            password=self.view_user_data["password"]
+        )
+        self.javascript_skill.description = "Scripting for the web, often next to Python."
+        self.javascript_skill.save()
+
+        response = self.client.get(f"{self.skills_url}?search=python")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [skill["name"] for skill in response.data], ["Python", "JavaScript"]
+        )
+
     def test_skills_ordering(self):
         """Test ordering skills by name."""
         self.authenticate(
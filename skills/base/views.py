@@ -2,29 +2,59 @@ from django.db import models
 from django.http import Http404
 from rest_framework import viewsets, status, filters
 from rest_framework.response import Response
-from rest_framework.pagination import PageNumberPagination
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.exceptions import NotFound
+from core.search import IndexSearchFilter, RelevanceOrderingFilter
+from core.exports import ExportMixin
+from core.optimizer import READ_ACTIONS, optimize_queryset
+from core.pagination import BoundedListMixin, BoundedPageNumberPagination
+from permissions.access import HasPermission, has_permission
 
 from ..models import Skill
+from ..search import skill_search_index
 from .serializers import SkillSerializer
 
 
-class SkillPagination(PageNumberPagination):
+class SkillPagination(BoundedPageNumberPagination):
     page_size = 10
     page_size_query_param = "page_size"
     max_page_size = 50
 
 
-class SkillViewSet(viewsets.ModelViewSet):
+class SkillViewSet(ExportMixin, BoundedListMixin, viewsets.ModelViewSet):
     queryset = Skill.objects.all()
     serializer_class = SkillSerializer
-    permission_classes = [IsAuthenticated]
+    permission_classes = [IsAuthenticated, HasPermission]
     pagination_class = SkillPagination
-    filter_backends = [filters.SearchFilter, filters.OrderingFilter]
-    search_fields = ["name", "description"]
+    allow_superuser = True
+    required_permissions = {
+        "list": "view_skill",
+        "create": "create_skill",
+        "update": "update_skill",
+        "partial_update": "update_skill",
+        "destroy": "delete_skill",
+        "export": ("view_skill", "export_data"),
+    }
+    permission_denied_messages = {
+        "list": "You do not have permission to view skills.",
+        "create": "You do not have permission to create skills.",
+        "update": "You do not have permission to update skills.",
+        "partial_update": "You do not have permission to update skills.",
+        "destroy": "You do not have permission to delete skills.",
+        "export": "You do not have permission to export skills.",
+    }
+    filter_backends = [IndexSearchFilter, RelevanceOrderingFilter]
+    search_index = skill_search_index
     ordering_fields = ["name", "description"]
     ordering = ["name"]
+    export_fields = [
+        ("id", "id"),
+        ("name", "name"),
+        ("description", "description"),
+        ("created_at", "created_at"),
+        ("updated_at", "updated_at"),
+    ]
+    export_filename = "skills.csv"
     
     def get_object(self):
         try:
@@ -36,46 +66,22 @@ class SkillViewSet(viewsets.ModelViewSet):
     def get_queryset(self):
         queryset = Skill.objects.all().order_by("name")
         
-        search = self.request.query_params.get("search", None)
-        if search:
-            queryset = queryset.filter(
-                models.Q(name__icontains=search) | 
-                models.Q(description__icontains=search)
-            )
+        if self.action in READ_ACTIONS:
+            queryset = optimize_queryset(queryset, self.get_serializer_class())
         
         return queryset
     
     def list(self, request, *args, **kwargs):
-        requesting_user = request.user
-        has_view_skill_permission = (
-            requesting_user.role and requesting_user.role.permissions.filter(name="view_skill").exists()
-        )
-        
-        if not has_view_skill_permission and not requesting_user.is_superuser:
-            return Response(
-                {"detail": "You do not have permission to view skills."},
-                status=status.HTTP_403_FORBIDDEN
-            )
-
         queryset = self.filter_queryset(self.get_queryset())
         
-        if "page" in request.query_params or "page_size" in request.query_params:
-            page = self.paginate_queryset(queryset)
-            if page is not None:
-                serializer = self.get_serializer(page, many=True)
-                return self.get_paginated_response(serializer.data)
-        
-        serializer = self.get_serializer(queryset, many=True)
-        return Response(serializer.data)
+        return self.get_list_response(queryset)
     
     def retrieve(self, request, *args, **kwargs):
         try:
             skill = self.get_object()
             
             requesting_user = request.user
-            has_view_skill_permission = (
-                requesting_user.role and requesting_user.role.permissions.filter(name="view_skill").exists()
-            )
+            has_view_skill_permission = has_permission(request, "view_skill")
             
             if not has_view_skill_permission and not requesting_user.is_superuser:
                 return Response(
@@ -93,18 +99,6 @@ class SkillViewSet(viewsets.ModelViewSet):
             )
     
     def create(self, request, *args, **kwargs):
-        requesting_user = request.user
-        
-        has_create_skill_permission = (
-            requesting_user.role and requesting_user.role.permissions.filter(name="create_skill").exists()
-        )
-        
-        if not has_create_skill_permission and not requesting_user.is_superuser:
-            return Response(
-                {"detail": "You do not have permission to create skills."},
-                status=status.HTTP_403_FORBIDDEN
-            )
-        
         serializer = self.get_serializer(data=request.data)
         if serializer.is_valid():
             serializer.save()
@@ -112,18 +106,6 @@ class SkillViewSet(viewsets.ModelViewSet):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
     
     def update(self, request, *args, **kwargs):
-        requesting_user = request.user
-        
-        has_update_skill_permission = (
-            requesting_user.role and requesting_user.role.permissions.filter(name="update_skill").exists()
-        )
-        
-        if not has_update_skill_permission and not requesting_user.is_superuser:
-            return Response(
-                {"detail": "You do not have permission to update skills."},
-                status=status.HTTP_403_FORBIDDEN
-            )
-        
         partial = kwargs.pop("partial", False)
         skill = self.get_object()
         serializer = self.get_serializer(skill, data=request.data, partial=partial)
@@ -133,18 +115,6 @@ class SkillViewSet(viewsets.ModelViewSet):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
     
     def destroy(self, request, *args, **kwargs):
-        requesting_user = request.user
-        
-        has_delete_skill_permission = (
-            requesting_user.role and requesting_user.role.permissions.filter(name="delete_skill").exists()
-        )
-        
-        if not has_delete_skill_permission and not requesting_user.is_superuser:
-            return Response(
-                {"detail": "You do not have permission to delete skills."},
-                status=status.HTTP_403_FORBIDDEN
-            )
-        
         try:
             skill = self.get_object()
             skill.delete()
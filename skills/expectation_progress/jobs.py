@@ -0,0 +1,72 @@
+import json
+from django.db import transaction
+from core.jobs import commit_chunk, job_handler
+from skills.expectation_progress import services
+from users.models import User
+
+
+BATCH_PROMOTION_JOB_KIND = "skills.batch_promotion"
+
+EMPTY_PROGRESS = {
+    "chunks": 0,
+    "users_processed": 0,
+    "rows_processed": 0,
+    **dict.fromkeys(services.OUTCOMES, 0),
+}
+
+
+@job_handler(BATCH_PROMOTION_JOB_KIND)
+def batch_promote(job):
+    progress = {**EMPTY_PROGRESS, **job.progress}
+    approver = User.objects.get(id=job.payload["approver_id"])
+    skill_ids = job.payload["skill_ids"]
+
+    # Users up to the last committed chunk were already promoted by an
+    # earlier attempt.
+    user_ids = job.payload["user_ids"][progress["users_processed"] :]
+
+    for chunk in services.chunk_users(
+        user_ids, len(skill_ids), job.payload["chunk_size"]
+    ):
+        with transaction.atomic():
+            results = services.approve_and_advance_many(chunk, skill_ids, approver)
+            summary = services.summarize(results)
+
+            progress = {
+                "chunks": progress["chunks"] + 1,
+                "users_processed": progress["users_processed"] + len(chunk),
+                "rows_processed": progress["rows_processed"] + summary["pairs"],
+                **{
+                    outcome: progress[outcome] + summary[outcome]
+                    for outcome in services.OUTCOMES
+                },
+            }
+
+            commit_chunk(
+                job,
+                progress["chunks"] - 1,
+                {"results": [result.as_report() for result in results]},
+                progress,
+            )
+
+
+def iter_result_json(job):
+    """
+    Streams the result of a finished batch promotion job in the same shape
+    as the synchronous response, reading one chunk at a time.
+    """
+    progress = {**EMPTY_PROGRESS, **job.progress}
+    summary = {
+        "pairs": progress["rows_processed"],
+        **{outcome: progress[outcome] for outcome in services.OUTCOMES},
+    }
+
+    yield '{"summary": ' + json.dumps(summary) + ', "results": ['
+    separator = ""
+
+    for results in job.chunks.values_list("data__results", flat=True).iterator():
+        for result in results or []:
+            yield separator + json.dumps(result)
+            separator = ", "
+
+    yield "]}"
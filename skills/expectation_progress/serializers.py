@@ -1,6 +1,8 @@
 from rest_framework import serializers
 from ..models import UserExpectationProgress, Expectation
+from teams.models import Team
 from django.contrib.auth import get_user_model
+from permissions.access import has_permission
 
 User = get_user_model()
 
@@ -48,10 +50,10 @@ class UserExpectationProgressSerializer(serializers.ModelSerializer):
         # Special handling for status changes to 'approved'
         if 'status' in validated_data and validated_data['status'] == 'approved':
             # Only admins or users with approve permission can set status to approved
-            user = self.context['request'].user
+            request = self.context['request']
+            user = request.user
             has_approve_permission = (
-                user.role and user.role.permissions.filter(name="approve_expectation").exists() or
-                user.is_superuser
+                has_permission(request, "approve_expectation") or user.is_superuser
             )
             
             if not has_approve_permission:
@@ -68,4 +70,40 @@ class UserExpectationProgressSerializer(serializers.ModelSerializer):
         for attr, value in validated_data.items():
             setattr(instance, attr, value)
         instance.save()
-        return instance
\ No newline at end of file
+        return instance
+
+
+class BatchPromotionSerializer(serializers.Serializer):
+    team_id = serializers.IntegerField(required=False)
+    user_ids = serializers.ListField(
+        child=serializers.IntegerField(), required=False, allow_empty=False
+    )
+    skill_ids = serializers.ListField(
+        child=serializers.IntegerField(),
+        allow_empty=False,
+        error_messages={
+            "required": "Skill IDs are required.",
+            "empty": "Skill IDs are required."
+        }
+    )
+    
+    def validate(self, data):
+        if ('team_id' in data) == ('user_ids' in data):
+            raise serializers.ValidationError(
+                {"detail": "Provide either team_id or user_ids."}
+            )
+            
+        # A team is promoted as it is when the request is made
+        if 'team_id' in data:
+            team = Team.objects.filter(id=data['team_id']).first()
+            if team is None:
+                raise serializers.ValidationError(
+                    {"team_id": "Specified team does not exist."}
+                )
+            data['user_ids'] = list(
+                team.members.order_by('id').values_list('id', flat=True)
+            )
+            
+        data['user_ids'] = list(dict.fromkeys(data['user_ids']))
+        data['skill_ids'] = list(dict.fromkeys(data['skill_ids']))
+        return data
\ No newline at end of file
@@ -0,0 +1,247 @@
+from dataclasses import dataclass
+from itertools import batched
+from django.db import transaction
+from django.db.models import Case, Count, Q, Value, When
+from django.utils import timezone
+from skills.models import Expectation, Level, UserExpectationProgress, UserSkill
+
+
+NOT_ASSIGNED = "not_assigned"
+INCOMPLETE = "incomplete"
+ADVANCED = "advanced"
+MAX_LEVEL = "max_level"
+
+OUTCOMES = (ADVANCED, MAX_LEVEL, INCOMPLETE, NOT_ASSIGNED)
+
+
+@dataclass
+class AdvanceResult:
+    outcome: str
+    level: Level = None
+    approved: int = 0
+    user_id: int = None
+    skill_id: int = None
+
+    @property
+    def succeeded(self):
+        return self.outcome in (ADVANCED, MAX_LEVEL)
+
+    def as_report(self):
+        return {
+            "user_id": self.user_id,
+            "skill_id": self.skill_id,
+            "outcome": self.outcome,
+            "level_id": self.level.id if self.level else None,
+            "level_name": self.level.name if self.level else None,
+            "approved": self.approved,
+        }
+
+
+def approve_and_advance(user_id, skill_id, approver, now=None):
+    """
+    Approves the completed expectations of the user's current level of the
+    skill and moves the user to the next level, with its expectations to do.
+    """
+    return approve_and_advance_many([user_id], [skill_id], approver, now)[0]
+
+
+def chunk_users(user_ids, skill_count, chunk_size):
+    """
+    Splits the users into chunks of about chunk_size (user, skill) pairs,
+    keeping each user's pairs in one chunk.
+    """
+    return batched(dict.fromkeys(user_ids), max(chunk_size // max(skill_count, 1), 1))
+
+
+def summarize(results):
+    summary = {"pairs": len(results), **dict.fromkeys(OUTCOMES, 0)}
+
+    for result in results:
+        summary[result.outcome] += 1
+
+    return summary
+
+
+def approve_and_advance_many(user_ids, skill_ids, approver, now=None):
+    """
+    Approves and advances every (user, skill) pair of the given users and
+    skills, returning one AdvanceResult per pair in input order.
+
+    Runs as one transaction holding locks on the users' skill rows, so
+    concurrent approvals of the same user and skill run one after the other
+    and the second sees the level the first advanced to. The number of
+    statements depends neither on the number of pairs nor on the number of
+    expectations, so callers chunk large batches to bound lock time.
+    """
+    now = now or timezone.now()
+    # Results are matched by the integer ids the database returns.
+    user_ids = list(dict.fromkeys(map(int, user_ids)))
+    skill_ids = list(dict.fromkeys(map(int, skill_ids)))
+
+    with transaction.atomic():
+        # Only the skill rows are locked: locking the joined level rows would
+        # serialize approvals of every user on the same level.
+        user_skills = {
+            (user_skill.user_id, user_skill.skill_id): user_skill
+            for user_skill in UserSkill.objects.select_for_update(of=("self",))
+            .filter(user_id__in=user_ids, skill_id__in=skill_ids)
+            .only("id", "user_id", "skill_id", "current_level_id")
+        }
+        levels = {
+            level.id: level
+            for level in Level.objects.filter(skill_id__in=skill_ids)
+            .order_by("id")
+            .only("id", "skill_id", "name", "order")
+        }
+        levels_by_order = {}
+        for level in levels.values():
+            levels_by_order.setdefault((level.skill_id, level.order), level)
+        successors = {
+            level.id: levels_by_order[(level.skill_id, level.order + 1)]
+            for level in levels.values()
+            if (level.skill_id, level.order + 1) in levels_by_order
+        }
+
+        incomplete = set(
+            UserExpectationProgress.objects.filter(
+                user_id__in=user_ids,
+                status="not_started",
+                expectation__level_id__in={
+                    user_skill.current_level_id for user_skill in user_skills.values()
+                },
+            )
+            .values_list("user_id", "expectation__level_id")
+            .distinct()
+        )
+        eligible = [
+            user_skill
+            for user_skill in user_skills.values()
+            if (user_skill.user_id, user_skill.current_level_id) not in incomplete
+        ]
+
+        approved = {}
+        if eligible:
+            users_by_level = {}
+            for user_skill in eligible:
+                users_by_level.setdefault(user_skill.current_level_id, []).append(
+                    user_skill.user_id
+                )
+
+            completed = UserExpectationProgress.objects.filter(
+                Q(status="completed"),
+                Q(
+                    *(
+                        Q(expectation__level_id=level_id, user_id__in=level_user_ids)
+                        for level_id, level_user_ids in users_by_level.items()
+                    ),
+                    _connector=Q.OR,
+                ),
+            )
+            if len(eligible) > 1:
+                approved = {
+                    (user_id, level_id): count
+                    for user_id, level_id, count in completed.values_list(
+                        "user_id", "expectation__level_id"
+                    )
+                    .order_by()
+                    .annotate(count=Count("id"))
+                }
+
+            updated = completed.update(
+                status="approved", approved_by=approver, approved_at=now, updated_at=now
+            )
+
+            # A single pair's count is the number of rows updated.
+            if len(eligible) == 1:
+                approved = {
+                    (eligible[0].user_id, eligible[0].current_level_id): updated
+                }
+
+        next_levels = {
+            user_skill.id: successors[user_skill.current_level_id]
+            for user_skill in eligible
+            if user_skill.current_level_id in successors
+        }
+
+        if next_levels:
+            # The next level follows from the current one, so a single CASE
+            # over the levels the advancing pairs are on moves every pair.
+            current_level_ids = {
+                user_skill.current_level_id
+                for user_skill in eligible
+                if user_skill.current_level_id in successors
+            }
+            UserSkill.objects.filter(id__in=next_levels).update(
+                current_level_id=Case(
+                    *(
+                        When(
+                            current_level_id=level_id,
+                            then=Value(successors[level_id].id),
+                        )
+                        for level_id in current_level_ids
+                    )
+                ),
+                updated_at=now,
+            )
+
+            users_by_next_level = {}
+            for user_skill in eligible:
+                if user_skill.id in next_levels:
+                    users_by_next_level.setdefault(
+                        next_levels[user_skill.id].id, []
+                    ).append(user_skill.user_id)
+
+            provision_progress(users_by_next_level)
+
+    results = []
+    for user_id in user_ids:
+        for skill_id in skill_ids:
+            user_skill = user_skills.get((user_id, skill_id))
+
+            if user_skill is None:
+                result = AdvanceResult(NOT_ASSIGNED)
+            elif (user_id, user_skill.current_level_id) in incomplete:
+                result = AdvanceResult(
+                    INCOMPLETE, level=levels[user_skill.current_level_id]
+                )
+            else:
+                count = approved.get((user_id, user_skill.current_level_id), 0)
+                if user_skill.id in next_levels:
+                    result = AdvanceResult(
+                        ADVANCED, level=next_levels[user_skill.id], approved=count
+                    )
+                else:
+                    result = AdvanceResult(
+                        MAX_LEVEL,
+                        level=levels[user_skill.current_level_id],
+                        approved=count,
+                    )
+
+            result.user_id, result.skill_id = user_id, skill_id
+            results.append(result)
+
+    return results
+
+
+def provision_progress(users_by_level):
+    """
+    Creates the missing 'not_started' progress rows of each level's
+    expectations for the users moved to that level.
+    """
+    expectation_ids = {}
+    for expectation_id, level_id in Expectation.objects.filter(
+        level_id__in=users_by_level
+    ).values_list("id", "level_id"):
+        expectation_ids.setdefault(level_id, []).append(expectation_id)
+
+    UserExpectationProgress.objects.bulk_create(
+        [
+            UserExpectationProgress(
+                user_id=user_id, expectation_id=expectation_id, status="not_started"
+            )
+            for level_id, user_ids in users_by_level.items()
+            for user_id in user_ids
+            for expectation_id in expectation_ids.get(level_id, [])
+        ],
+        ignore_conflicts=True,
+    )
@@ -0,0 +1,418 @@
+import json
+from django.conf import settings
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from core.jobs import run_next_job
+from core.models import IdempotencyKey
+from core.testing import query_budget
+from permissions.models import Permission, PermissionGroup
+from roles.models import Role
+from skills.models import Expectation, Level, Skill, UserExpectationProgress, UserSkill
+from teams.models import Team
+from users.models import User
+
+
+class ApproveAndAdvanceTests(APITestCase):
+    def setUp(self):
+        group = PermissionGroup.objects.create(name="skills")
+        role = Role.objects.create(name="approver")
+        role.permissions.set(
+            [Permission.objects.create(name="approve_expectation", group=group)]
+        )
+        self.approver = User.objects.create_user(
+            name="Approver",
+            email="approver@example.com",
+            password="Approver123!",
+            role=role,
+        )
+        self.user = User.objects.create_user(
+            name="Learner", email="learner@example.com", password="Learner123!"
+        )
+        self.skill = Skill.objects.create(name="Python")
+        self.levels = [
+            Level.objects.create(skill=self.skill, name=name, order=order)
+            for order, name in enumerate(["Beginner", "Intermediate"], start=1)
+        ]
+        self.user_skill = UserSkill.objects.create(
+            user=self.user, skill=self.skill, current_level=self.levels[0]
+        )
+
+        self.add_expectations(self.levels[0], 3, status="completed")
+        self.add_expectations(self.levels[1], 2)
+
+        self.url = reverse("expectation-progress-approve-and-advance")
+        self.data = {"user_id": self.user.id, "skill_id": self.skill.id}
+        self.client.force_authenticate(user=self.approver)
+
+    def add_expectations(self, level, count, status=None):
+        for index in range(count):
+            expectation = Expectation.objects.create(
+                level=level, description=f"{level.name} expectation {index}"
+            )
+
+            if status:
+                UserExpectationProgress.objects.create(
+                    user=self.user, expectation=expectation, status=status
+                )
+
+    def test_approves_and_advances(self):
+        """Test that completed expectations are approved and the next level is provisioned."""
+        response = self.client.post(self.url, self.data, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["new_level_id"], self.levels[1].id)
+
+        approved = UserExpectationProgress.objects.filter(
+            expectation__level=self.levels[0], status="approved"
+        )
+        self.assertEqual(approved.count(), 3)
+        self.assertEqual(
+            set(approved.values_list("approved_by", flat=True)), {self.approver.id}
+        )
+
+        self.user_skill.refresh_from_db()
+        self.assertEqual(self.user_skill.current_level, self.levels[1])
+        self.assertEqual(
+            UserExpectationProgress.objects.filter(
+                expectation__level=self.levels[1], status="not_started"
+            ).count(),
+            2,
+        )
+
+    def test_string_ids_are_accepted(self):
+        """Test that user and skill ids sent as strings approve and advance the user."""
+        response = self.client.post(
+            self.url,
+            {"user_id": str(self.user.id), "skill_id": str(self.skill.id)},
+            format="json",
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.user_skill.refresh_from_db()
+        self.assertEqual(self.user_skill.current_level, self.levels[1])
+
+    def test_invalid_ids_are_rejected(self):
+        """Test that ids that are not integers are rejected."""
+        response = self.client.post(
+            self.url, {"user_id": "five", "skill_id": self.skill.id}, format="json"
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_incomplete_level_is_not_advanced(self):
+        """Test that a level with expectations not started cannot be advanced."""
+        UserExpectationProgress.objects.filter(status="completed").update(
+            status="not_started"
+        )
+
+        response = self.client.post(self.url, self.data, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.user_skill.refresh_from_db()
+        self.assertEqual(self.user_skill.current_level, self.levels[0])
+
+    def test_second_approval_does_not_advance_again(self):
+        """Test that repeating an approval does not advance the user twice."""
+        self.client.post(self.url, self.data, format="json")
+        response = self.client.post(self.url, self.data, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.user_skill.refresh_from_db()
+        self.assertEqual(self.user_skill.current_level, self.levels[1])
+
+    def test_statements_do_not_grow_with_expectations(self):
+        """Test that approving runs the same statements for 3 and 50 expectations."""
+        with query_budget(10, label="approve-and-advance (3 expectations)") as small:
+            self.client.post(self.url, self.data, format="json")
+
+        self.add_expectations(self.levels[1], 48, status="completed")
+        UserExpectationProgress.objects.filter(
+            expectation__level=self.levels[1]
+        ).update(status="completed")
+        self.add_expectations(
+            Level.objects.create(skill=self.skill, name="Advanced", order=3), 50
+        )
+
+        with query_budget(10, label="approve-and-advance (50 expectations)") as large:
+            self.client.post(self.url, self.data, format="json")
+
+        self.assertEqual(small.count, large.count)
+
+    def test_retry_with_idempotency_key_is_replayed(self):
+        """Test that a retried request with the same idempotency key is not applied again."""
+        first = self.client.post(
+            self.url, self.data, format="json", HTTP_IDEMPOTENCY_KEY="promote-1"
+        )
+        Level.objects.create(skill=self.skill, name="Advanced", order=3)
+        UserExpectationProgress.objects.update(status="completed")
+
+        with query_budget(2, label="approve-and-advance replay"):
+            retry = self.client.post(
+                self.url, self.data, format="json", HTTP_IDEMPOTENCY_KEY="promote-1"
+            )
+
+        self.assertEqual(retry.status_code, first.status_code)
+        self.assertEqual(retry.data, first.data)
+        self.assertEqual(retry["Idempotent-Replayed"], "true")
+        self.user_skill.refresh_from_db()
+        self.assertEqual(self.user_skill.current_level, self.levels[1])
+
+    def test_idempotency_key_reused_for_other_request(self):
+        """Test that an idempotency key cannot be reused with a different body."""
+        self.client.post(
+            self.url, self.data, format="json", HTTP_IDEMPOTENCY_KEY="promote-1"
+        )
+
+        response = self.client.post(
+            self.url,
+            {**self.data, "skill_id": self.skill.id + 1},
+            format="json",
+            HTTP_IDEMPOTENCY_KEY="promote-1",
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_422_UNPROCESSABLE_ENTITY)
+        self.assertEqual(IdempotencyKey.objects.count(), 1)
+
+
+class BatchApproveAndAdvanceTests(APITestCase):
+    def setUp(self):
+        group = PermissionGroup.objects.create(name="skills")
+        role = Role.objects.create(name="approver")
+        role.permissions.set(
+            [Permission.objects.create(name="approve_expectation", group=group)]
+        )
+        self.approver = User.objects.create_user(
+            name="Approver",
+            email="approver@example.com",
+            password="Approver123!",
+            role=role,
+        )
+        self.skills = [Skill.objects.create(name=name) for name in ["Python", "SQL"]]
+        self.levels = {
+            skill.id: [
+                Level.objects.create(skill=skill, name=name, order=order)
+                for order, name in enumerate(["Beginner", "Intermediate"], start=1)
+            ]
+            for skill in self.skills
+        }
+        for levels in self.levels.values():
+            for level in levels:
+                Expectation.objects.create(level=level, description=f"{level.name} 1")
+                Expectation.objects.create(level=level, description=f"{level.name} 2")
+
+        self.ready = self.create_user("ready@example.com")
+        self.assign(self.ready, self.skills[0], 0, "completed")
+        self.assign(self.ready, self.skills[1], 1, "completed")
+        self.working = self.create_user("working@example.com")
+        self.assign(self.working, self.skills[0], 0, "not_started")
+        self.unassigned = self.create_user("unassigned@example.com")
+
+        self.team = Team.objects.create(name="Platform", team_lead=self.approver)
+        self.team.members.set([self.ready, self.working, self.unassigned])
+
+        self.url = reverse("expectation-progress-batch-approve-and-advance")
+        self.data = {
+            "team_id": self.team.id,
+            "skill_ids": [skill.id for skill in self.skills],
+        }
+        self.client.force_authenticate(user=self.approver)
+
+    def create_user(self, email):
+        return User.objects.create_user(
+            name=email.split("@")[0], email=email, password="Learner123!"
+        )
+
+    def assign(self, user, skill, level_index, status):
+        level = self.levels[skill.id][level_index]
+        UserSkill.objects.create(user=user, skill=skill, current_level=level)
+
+        for expectation in level.expectations.all():
+            UserExpectationProgress.objects.create(
+                user=user, expectation=expectation, status=status
+            )
+
+    def get_outcomes(self, results):
+        return {
+            (result["user_id"], result["skill_id"]): result["outcome"]
+            for result in results
+        }
+
+    def test_batch_reports_outcome_per_pair(self):
+        """Test that a team batch approves and advances eligible pairs and reports every pair."""
+        python, sql = self.skills
+        response = self.client.post(self.url, self.data, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            self.get_outcomes(response.data["results"]),
+            {
+                (self.ready.id, python.id): "advanced",
+                (self.ready.id, sql.id): "max_level",
+                (self.working.id, python.id): "incomplete",
+                (self.working.id, sql.id): "not_assigned",
+                (self.unassigned.id, python.id): "not_assigned",
+                (self.unassigned.id, sql.id): "not_assigned",
+            },
+        )
+        self.assertEqual(
+            response.data["summary"],
+            {
+                "pairs": 6,
+                "advanced": 1,
+                "max_level": 1,
+                "incomplete": 1,
+                "not_assigned": 3,
+            },
+        )
+        self.assertEqual(response.data["results"][0]["approved"], 2)
+        self.assertEqual(
+            response.data["results"][0]["level_id"], self.levels[python.id][1].id
+        )
+
+        self.assertEqual(
+            UserSkill.objects.get(user=self.ready, skill=python).current_level,
+            self.levels[python.id][1],
+        )
+        self.assertEqual(
+            UserExpectationProgress.objects.filter(
+                user=self.ready, status="approved"
+            ).count(),
+            4,
+        )
+        self.assertEqual(
+            UserExpectationProgress.objects.filter(
+                user=self.ready,
+                expectation__level=self.levels[python.id][1],
+                status="not_started",
+            ).count(),
+            2,
+        )
+        self.assertEqual(
+            UserSkill.objects.get(user=self.working, skill=python).current_level,
+            self.levels[python.id][0],
+        )
+
+    @override_settings(BATCH_PROMOTION={**settings.BATCH_PROMOTION, "CHUNK_SIZE": 2})
+    def test_batch_of_user_ids_in_chunks(self):
+        """Test that a batch of user ids split into chunks reports the same outcomes."""
+        response = self.client.post(
+            self.url,
+            {
+                "user_ids": [self.working.id, self.ready.id, self.ready.id],
+                "skill_ids": self.data["skill_ids"],
+            },
+            format="json",
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [result["user_id"] for result in response.data["results"]],
+            [self.working.id, self.working.id, self.ready.id, self.ready.id],
+        )
+        self.assertEqual(response.data["summary"]["advanced"], 1)
+        self.assertEqual(response.data["summary"]["max_level"], 1)
+
+    def test_batch_statements_do_not_grow_with_pairs(self):
+        """Test that a batch runs the same statements for 3 and 30 team members."""
+        with query_budget(13, label="batch-approve-and-advance (3 users)") as small:
+            self.client.post(self.url, self.data, format="json")
+
+        for index in range(27):
+            user = self.create_user(f"member{index}@example.com")
+            self.assign(user, self.skills[0], 0, "completed")
+            self.assign(user, self.skills[1], 0, "not_started")
+            self.team.members.add(user)
+
+        with query_budget(13, label="batch-approve-and-advance (30 users)") as large:
+            response = self.client.post(self.url, self.data, format="json")
+
+        self.assertEqual(response.data["summary"]["advanced"], 27)
+        self.assertEqual(small.count, large.count)
+
+    def test_batch_advance_statement_covers_only_current_levels(self):
+        """Test that the advance statement names only the levels the batch's pairs are on."""
+        python = self.skills[0]
+        for order in range(3, 20):
+            Level.objects.create(skill=python, name=f"Level {order}", order=order)
+
+        with CaptureQueriesContext(connection) as queries:
+            self.client.post(self.url, self.data, format="json")
+
+        (advance,) = [
+            query["sql"]
+            for query in queries
+            if query["sql"].startswith('UPDATE "skills_userskill"')
+        ]
+        self.assertEqual(advance.count("WHEN"), 1)
+
+    def test_batch_requires_team_or_user_ids(self):
+        """Test that a batch needs exactly one of a team id and user ids."""
+        response = self.client.post(
+            self.url,
+            {**self.data, "user_ids": [self.ready.id]},
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        response = self.client.post(
+            self.url, {**self.data, "team_id": self.team.id + 1}, format="json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("team_id", response.data)
+
+    @override_settings(
+        BATCH_PROMOTION={**settings.BATCH_PROMOTION, "MAX_SYNC_PAIRS": 5}
+    )
+    def test_batch_too_large_to_run_synchronously(self):
+        """Test that a batch over the synchronous limit must run as a job."""
+        response = self.client.post(self.url, self.data, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(
+            UserExpectationProgress.objects.filter(status="approved").exists()
+        )
+
+    @override_settings(BATCH_PROMOTION={**settings.BATCH_PROMOTION, "CHUNK_SIZE": 2})
+    def test_batch_async_job(self):
+        """Test that an async batch returns a job whose report can be fetched once a worker has run it."""
+        response = self.client.post(f"{self.url}?async=true", self.data, format="json")
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        job_id = response.data["id"]
+
+        result_url = reverse(
+            "expectation-progress-batch-job-result", kwargs={"job_id": job_id}
+        )
+        response = self.client.get(result_url)
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+
+        self.assertTrue(run_next_job())
+
+        response = self.client.get(
+            reverse("expectation-progress-batch-job-status", kwargs={"job_id": job_id})
+        )
+        self.assertEqual(response.data["status"], "succeeded")
+        self.assertEqual(response.data["progress"]["chunks"], 3)
+        self.assertEqual(response.data["progress"]["rows_processed"], 6)
+
+        response = self.client.get(result_url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        report = json.loads(b"".join(response.streaming_content))
+        self.assertEqual(report["summary"]["advanced"], 1)
+        self.assertEqual(report["summary"]["not_assigned"], 3)
+        self.assertEqual(len(report["results"]), 6)
+        self.assertEqual(
+            UserSkill.objects.get(user=self.ready, skill=self.skills[0]).current_level,
+            self.levels[self.skills[0].id][1],
+        )
+
+    def test_batch_requires_permission(self):
+        """Test that a user without the approve permission cannot run a batch."""
+        self.client.force_authenticate(user=self.working)
+
+        response = self.client.post(self.url, self.data, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
@@ -1,32 +1,71 @@
+from django.conf import settings
 from django.db import models
-from django.http import Http404
+from django.http import Http404, StreamingHttpResponse
 from rest_framework import viewsets, status, filters
 from rest_framework.response import Response
-from rest_framework.pagination import PageNumberPagination
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.exceptions import NotFound
 from rest_framework.decorators import action
+from core.exports import ExportMixin
+from core.idempotency import idempotent
+from core.jobs import enqueue
+from core.models import Job
+from core.optimizer import READ_ACTIONS, optimize_queryset
+from core.pagination import BoundedListMixin, BoundedPageNumberPagination
+from core.serializers import JobSerializer
+from permissions.access import HasPermission, has_permission
 
-from ..models import UserExpectationProgress, Expectation, Level, UserSkill
-from .serializers import UserExpectationProgressSerializer
-from django.utils import timezone
+from ..models import UserExpectationProgress
+from .serializers import BatchPromotionSerializer, UserExpectationProgressSerializer
+from .jobs import BATCH_PROMOTION_JOB_KIND, iter_result_json
+from . import services
 
 
-class ExpectationProgressPagination(PageNumberPagination):
+class ExpectationProgressPagination(BoundedPageNumberPagination):
     page_size = 10
     page_size_query_param = "page_size"
     max_page_size = 50
 
 
-class UserExpectationProgressViewSet(viewsets.ModelViewSet):
+class UserExpectationProgressViewSet(ExportMixin, BoundedListMixin, viewsets.ModelViewSet):
     queryset = UserExpectationProgress.objects.all()
     serializer_class = UserExpectationProgressSerializer
-    permission_classes = [IsAuthenticated]
+    permission_classes = [IsAuthenticated, HasPermission]
     pagination_class = ExpectationProgressPagination
+    allow_superuser = True
+    required_permissions = {
+        "create": "create_expectation_progress",
+        "destroy": "delete_expectation_progress",
+        "approve_and_advance": "approve_expectation",
+        "batch_approve_and_advance": "approve_expectation",
+        "batch_job_status": "approve_expectation",
+        "batch_job_result": "approve_expectation",
+        "export": ("view_expectation_progress", "export_data"),
+    }
+    permission_denied_messages = {
+        "create": "You do not have permission to create progress records.",
+        "destroy": "You do not have permission to delete progress records.",
+        "approve_and_advance": "You do not have permission to approve expectations.",
+        "batch_approve_and_advance": "You do not have permission to approve expectations.",
+        "batch_job_status": "You do not have permission to approve expectations.",
+        "batch_job_result": "You do not have permission to approve expectations.",
+        "export": "You do not have permission to export progress records.",
+    }
     filter_backends = [filters.SearchFilter, filters.OrderingFilter]
     search_fields = ["expectation__description", "notes"]
     ordering_fields = ["updated_at", "status"]
     ordering = ["-updated_at"]
+    export_fields = [
+        ("id", "id"),
+        ("user_email", "user__email"),
+        ("expectation_id", "expectation_id"),
+        ("status", "status"),
+        ("notes", "notes"),
+        ("updated_at", "updated_at"),
+        ("approved_at", "approved_at"),
+        ("approved_by_email", "approved_by__email"),
+    ]
+    export_filename = "progress-records.csv"
     
     def get_object(self):
         try:
@@ -67,13 +106,14 @@ class UserExpectationProgressViewSet(viewsets.ModelViewSet):
         if self.request.query_params.get('my_progress', None) == 'true':
             queryset = queryset.filter(user=self.request.user)
             
+        if self.action in READ_ACTIONS:
+            queryset = optimize_queryset(queryset, self.get_serializer_class())
+            
         return queryset
     
     def list(self, request, *args, **kwargs):
         requesting_user = request.user
-        has_view_progress_permission = (
-            requesting_user.role and requesting_user.role.permissions.filter(name="view_expectation_progress").exists()
-        )
+        has_view_progress_permission = has_permission(request, "view_expectation_progress")
         
         # Allow users to view their own progress without special permission
         my_progress_only = request.query_params.get('my_progress', None) == 'true'
@@ -86,23 +126,14 @@ class UserExpectationProgressViewSet(viewsets.ModelViewSet):
 
         queryset = self.filter_queryset(self.get_queryset())
         
-        if "page" in request.query_params or "page_size" in request.query_params:
-            page = self.paginate_queryset(queryset)
-            if page is not None:
-                serializer = self.get_serializer(page, many=True)
-                return self.get_paginated_response(serializer.data)
-        
-        serializer = self.get_serializer(queryset, many=True)
-        return Response(serializer.data)
+        return self.get_list_response(queryset)
     
     def retrieve(self, request, *args, **kwargs):
         try:
             progress = self.get_object()
             
             requesting_user = request.user
-            has_view_progress_permission = (
-                requesting_user.role and requesting_user.role.permissions.filter(name="view_expectation_progress").exists()
-            )
+            has_view_progress_permission = has_permission(request, "view_expectation_progress")
             
             # Allow users to view their own progress without special permission
             is_own_progress = progress.user.id == requesting_user.id
@@ -123,18 +154,6 @@ class UserExpectationProgressViewSet(viewsets.ModelViewSet):
             )
     
     def create(self, request, *args, **kwargs):
-        requesting_user = request.user
-        
-        has_create_progress_permission = (
-            requesting_user.role and requesting_user.role.permissions.filter(name="create_expectation_progress").exists()
-        )
-        
-        if not has_create_progress_permission and not requesting_user.is_superuser:
-            return Response(
-                {"detail": "You do not have permission to create progress records."},
-                status=status.HTTP_403_FORBIDDEN
-            )
-            
         serializer = self.get_serializer(data=request.data, context={'request': request})
         if serializer.is_valid():
             serializer.save()
@@ -145,9 +164,7 @@ class UserExpectationProgressViewSet(viewsets.ModelViewSet):
         requesting_user = request.user
         progress = self.get_object()
         
-        has_update_progress_permission = (
-            requesting_user.role and requesting_user.role.permissions.filter(name="update_expectation_progress").exists()
-        )
+        has_update_progress_permission = has_permission(request, "update_expectation_progress")
         
         # Allow users to update their own progress from 'not_started' to 'completed'
         is_own_progress = progress.user.id == requesting_user.id
@@ -171,18 +188,6 @@ class UserExpectationProgressViewSet(viewsets.ModelViewSet):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
     
     def destroy(self, request, *args, **kwargs):
-        requesting_user = request.user
-        
-        has_delete_progress_permission = (
-            requesting_user.role and requesting_user.role.permissions.filter(name="delete_expectation_progress").exists()
-        )
-        
-        if not has_delete_progress_permission and not requesting_user.is_superuser:
-            return Response(
-                {"detail": "You do not have permission to delete progress records."},
-                status=status.HTTP_403_FORBIDDEN
-            )
-        
         try:
             progress = self.get_object()
             progress.delete()
@@ -194,21 +199,11 @@ class UserExpectationProgressViewSet(viewsets.ModelViewSet):
             )
     
     @action(detail=False, methods=['post'])
+    @idempotent("expectation_progress.approve_and_advance")
     def approve_and_advance(self, request):
         """
         Approve all completed expectations for a user's skill and advance them to the next level
         """
-        requesting_user = request.user
-        has_approve_permission = (
-            requesting_user.role and requesting_user.role.permissions.filter(name="approve_expectation").exists()
-        )
-        
-        if not has_approve_permission and not requesting_user.is_superuser:
-            return Response(
-                {"detail": "You do not have permission to approve expectations."},
-                status=status.HTTP_403_FORBIDDEN
-            )
-        
         user_id = request.data.get('user_id')
         skill_id = request.data.get('skill_id')
         
@@ -219,79 +214,125 @@ class UserExpectationProgressViewSet(viewsets.ModelViewSet):
             )
             
         try:
-            # Get the user's current skill level
-            user_skill = UserSkill.objects.get(user_id=user_id, skill_id=skill_id)
-            current_level = user_skill.current_level
+            user_id, skill_id = int(user_id), int(skill_id)
+        except (TypeError, ValueError):
+            return Response(
+                {"detail": "Both user_id and skill_id must be integers."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+            
+        result = services.approve_and_advance(user_id, skill_id, request.user)
+        
+        if result.outcome == services.NOT_ASSIGNED:
+            return Response(
+                {"detail": "User does not have the specified skill assigned."},
+                status=status.HTTP_404_NOT_FOUND
+            )
+            
+        if result.outcome == services.INCOMPLETE:
+            return Response(
+                {"detail": "Not all expectations are completed. Cannot advance level."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
             
-            # Get all expectations for this level
-            level_expectations = Expectation.objects.filter(level=current_level)
+        if result.outcome == services.MAX_LEVEL:
+            detail = "All expectations approved. User has reached maximum level for this skill."
+        else:
+            detail = "All expectations approved and user advanced to next level."
             
-            # Get the user's progress on these expectations
-            progress_records = UserExpectationProgress.objects.filter(
-                user_id=user_id,
-                expectation__in=level_expectations
+        return Response({
+            "detail": detail,
+            "new_level": result.level.name,
+            "new_level_id": result.level.id
+        })
+    
+    @action(detail=False, methods=['post'])
+    @idempotent("expectation_progress.batch_approve_and_advance")
+    def batch_approve_and_advance(self, request):
+        """
+        Approve and advance every (user, skill) pair of a team or a list of users.
+        Large batches run in the background with ?async=true
+        """
+        serializer = BatchPromotionSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        user_ids = serializer.validated_data['user_ids']
+        skill_ids = serializer.validated_data['skill_ids']
+        chunk_size = settings.BATCH_PROMOTION["CHUNK_SIZE"]
+        
+        if request.query_params.get('async', '').lower() in ('1', 'true'):
+            job = enqueue(
+                BATCH_PROMOTION_JOB_KIND,
+                payload={
+                    "user_ids": user_ids,
+                    "skill_ids": skill_ids,
+                    "approver_id": request.user.id,
+                    "chunk_size": chunk_size,
+                },
+                created_by=request.user,
             )
+            return Response(JobSerializer(job).data, status=status.HTTP_202_ACCEPTED)
             
-            # Check if all expectations are at least completed
-            incomplete_expectations = progress_records.filter(
-                status__in=['not_started']
-            ).count()
+        if len(user_ids) * len(skill_ids) > settings.BATCH_PROMOTION["MAX_SYNC_PAIRS"]:
+            return Response(
+                {"detail": "Too many users and skills to promote at once. Run the batch with ?async=true."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
             
-            if incomplete_expectations > 0:
-                return Response(
-                    {"detail": "Not all expectations are completed. Cannot advance level."},
-                    status=status.HTTP_400_BAD_REQUEST
-                )
-                
-            # Approve all completed expectations
-            now = timezone.now()
-            completed_records = progress_records.filter(status='completed')
-            for record in completed_records:
-                record.status = 'approved'
-                record.approved_by = requesting_user
-                record.approved_at = now
-                record.save()
-                
-            # Find the next level for this skill
-            try:
-                next_level = Level.objects.get(
-                    skill_id=skill_id,
-                    order=current_level.order + 1
-                )
-                
-                # Update the user's skill level
-                user_skill.current_level = next_level
-                user_skill.save()
-                
-                # Create 'not_started' progress records for the new level's expectations
-                next_level_expectations = Expectation.objects.filter(level=next_level)
-                for expectation in next_level_expectations:
-                    UserExpectationProgress.objects.create(
-                        user_id=user_id,
-                        expectation=expectation,
-                        status='not_started'
-                    )
-                
-                return Response({
-                    "detail": "All expectations approved and user advanced to next level.",
-                    "new_level": next_level.name,
-                    "new_level_id": next_level.id
-                })
-                
-            except Level.DoesNotExist:
-                return Response({
-                    "detail": "All expectations approved. User has reached maximum level for this skill.",
-                    "new_level": current_level.name,
-                    "new_level_id": current_level.id
-                })
-                
-        except UserSkill.DoesNotExist:
+        results = []
+        for chunk in services.chunk_users(user_ids, len(skill_ids), chunk_size):
+            results.extend(
+                services.approve_and_advance_many(chunk, skill_ids, request.user)
+            )
+            
+        return Response({
+            "summary": services.summarize(results),
+            "results": [result.as_report() for result in results]
+        })
+    
+    def get_batch_job(self, request, job_id):
+        job = Job.get_by_id(job_id).filter(kind=BATCH_PROMOTION_JOB_KIND).first()
+        
+        if not job:
+            raise NotFound("Job not found.")
+            
+        if not request.user.is_superuser and job.created_by_id != request.user.id:
+            raise NotFound("Job not found.")
+            
+        return job
+    
+    @action(
+        detail=False,
+        methods=['get'],
+        url_path=r'batch_approve_and_advance/jobs/(?P<job_id>[0-9]+)'
+    )
+    def batch_job_status(self, request, job_id=None):
+        job = self.get_batch_job(request, job_id)
+        return Response(JobSerializer(job).data)
+    
+    @action(
+        detail=False,
+        methods=['get'],
+        url_path=r'batch_approve_and_advance/jobs/(?P<job_id>[0-9]+)/result'
+    )
+    def batch_job_result(self, request, job_id=None):
+        job = self.get_batch_job(request, job_id)
+        
+        if job.status == Job.Status.FAILED:
             return Response(
-                {"detail": "User does not have the specified skill assigned."},
-                status=status.HTTP_404_NOT_FOUND
+                {"detail": "Job failed.", "error": job.error},
+                status=status.HTTP_409_CONFLICT
             )
-        except Exception as e:
+            
+        if job.status != Job.Status.SUCCEEDED:
             return Response(
-                {"detail": str(e)},
-                status=status.HTTP_500_INTERNAL_SERVER_ERROR
-            )
\ No newline at end of file
+                {"detail": "Job has not finished yet."},
+                status=status.HTTP_409_CONFLICT
+            )
+            
+        response = StreamingHttpResponse(
+            iter_result_json(job), content_type="application/json"
+        )
+        response["Content-Disposition"] = (
+            f'attachment; filename="batch-promotion-{job.id}.json"'
+        )
+        return response
\ No newline at end of file
@@ -2,29 +2,59 @@ from django.db import models
 from django.http import Http404
 from rest_framework import viewsets, status, filters
 from rest_framework.response import Response
-from rest_framework.pagination import PageNumberPagination
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.exceptions import NotFound
+from core.search import IndexSearchFilter, RelevanceOrderingFilter
+from core.exports import ExportMixin
+from core.optimizer import READ_ACTIONS, optimize_queryset
+from core.pagination import BoundedListMixin, BoundedPageNumberPagination
+from permissions.access import HasPermission, has_permission
 
 from ..models import Expectation
+from ..search import expectation_search_index
 from .serializers import ExpectationSerializer
 
 
-class ExpectationPagination(PageNumberPagination):
+class ExpectationPagination(BoundedPageNumberPagination):
     page_size = 10
     page_size_query_param = "page_size"
     max_page_size = 50
 
 
-class ExpectationViewSet(viewsets.ModelViewSet):
+class ExpectationViewSet(ExportMixin, BoundedListMixin, viewsets.ModelViewSet):
     queryset = Expectation.objects.all()
     serializer_class = ExpectationSerializer
-    permission_classes = [IsAuthenticated]
+    permission_classes = [IsAuthenticated, HasPermission]
     pagination_class = ExpectationPagination
-    filter_backends = [filters.SearchFilter, filters.OrderingFilter]
-    search_fields = ["description"]
+    allow_superuser = True
+    required_permissions = {
+        "list": "view_expectation",
+        "create": "create_expectation",
+        "update": "update_expectation",
+        "partial_update": "update_expectation",
+        "destroy": "delete_expectation",
+        "export": ("view_expectation", "export_data"),
+    }
+    permission_denied_messages = {
+        "list": "You do not have permission to view expectations.",
+        "create": "You do not have permission to create expectations.",
+        "update": "You do not have permission to update expectations.",
+        "partial_update": "You do not have permission to update expectations.",
+        "destroy": "You do not have permission to delete expectations.",
+        "export": "You do not have permission to export expectations.",
+    }
+    filter_backends = [IndexSearchFilter, RelevanceOrderingFilter]
+    search_index = expectation_search_index
     ordering_fields = ["created_at"]
     ordering = ["created_at"]
+    export_fields = [
+        ("id", "id"),
+        ("skill", "level__skill__name"),
+        ("level", "level__name"),
+        ("description", "description"),
+        ("created_at", "created_at"),
+    ]
+    export_filename = "expectations.csv"
     
     def get_object(self):
         try:
@@ -34,41 +64,27 @@ class ExpectationViewSet(viewsets.ModelViewSet):
             raise NotFound("Expectation not found.")
     
     def get_queryset(self):
+        queryset = Expectation.objects.all().order_by("created_at")
+        
         if self.kwargs.get('level_pk'):
-            return Expectation.objects.filter(level_id=self.kwargs['level_pk']).order_by("created_at")
-        return Expectation.objects.all().order_by("created_at")
+            queryset = queryset.filter(level_id=self.kwargs['level_pk'])
+        
+        if self.action in READ_ACTIONS:
+            queryset = optimize_queryset(queryset, self.get_serializer_class())
+        
+        return queryset
     
     def list(self, request, *args, **kwargs):
-        requesting_user = request.user
-        has_view_expectation_permission = (
-            requesting_user.role and requesting_user.role.permissions.filter(name="view_expectation").exists()
-        )
-        
-        if not has_view_expectation_permission and not requesting_user.is_superuser:
-            return Response(
-                {"detail": "You do not have permission to view expectations."},
-                status=status.HTTP_403_FORBIDDEN
-            )
-
         queryset = self.filter_queryset(self.get_queryset())
         
-        if "page" in request.query_params or "page_size" in request.query_params:
-            page = self.paginate_queryset(queryset)
-            if page is not None:
-                serializer = self.get_serializer(page, many=True)
-                return self.get_paginated_response(serializer.data)
-        
-        serializer = self.get_serializer(queryset, many=True)
-        return Response(serializer.data)
+        return self.get_list_response(queryset)
     
     def retrieve(self, request, *args, **kwargs):
         try:
             expectation = self.get_object()
             
             requesting_user = request.user
-            has_view_expectation_permission = (
-                requesting_user.role and requesting_user.role.permissions.filter(name="view_expectation").exists()
-            )
+            has_view_expectation_permission = has_permission(request, "view_expectation")
             
             if not has_view_expectation_permission and not requesting_user.is_superuser:
                 return Response(
@@ -86,18 +102,6 @@ class ExpectationViewSet(viewsets.ModelViewSet):
             )
     
     def create(self, request, *args, **kwargs):
-        requesting_user = request.user
-        
-        has_create_expectation_permission = (
-            requesting_user.role and requesting_user.role.permissions.filter(name="create_expectation").exists()
-        )
-        
-        if not has_create_expectation_permission and not requesting_user.is_superuser:
-            return Response(
-                {"detail": "You do not have permission to create expectations."},
-                status=status.HTTP_403_FORBIDDEN
-            )
-        
         # If created within a level, ensure the level_id is set
         if 'level_pk' in self.kwargs:
             request.data['level_id'] = self.kwargs['level_pk']
@@ -109,18 +113,6 @@ class ExpectationViewSet(viewsets.ModelViewSet):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
     
     def update(self, request, *args, **kwargs):
-        requesting_user = request.user
-        
-        has_update_expectation_permission = (
-            requesting_user.role and requesting_user.role.permissions.filter(name="update_expectation").exists()
-        )
-        
-        if not has_update_expectation_permission and not requesting_user.is_superuser:
-            return Response(
-                {"detail": "You do not have permission to update expectations."},
-                status=status.HTTP_403_FORBIDDEN
-            )
-        
         partial = kwargs.pop("partial", False)
         expectation = self.get_object()
         serializer = self.get_serializer(expectation, data=request.data, partial=partial)
@@ -130,18 +122,6 @@ class ExpectationViewSet(viewsets.ModelViewSet):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
     
     def destroy(self, request, *args, **kwargs):
-        requesting_user = request.user
-        
-        has_delete_expectation_permission = (
-            requesting_user.role and requesting_user.role.permissions.filter(name="delete_expectation").exists()
-        )
-        
-        if not has_delete_expectation_permission and not requesting_user.is_superuser:
-            return Response(
-                {"detail": "You do not have permission to delete expectations."},
-                status=status.HTTP_403_FORBIDDEN
-            )
-        
         try:
             expectation = self.get_object()
             expectation.delete()
@@ -2,29 +2,57 @@ from django.db import models
 from django.http import Http404
 from rest_framework import viewsets, status, filters
 from rest_framework.response import Response
-from rest_framework.pagination import PageNumberPagination
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.exceptions import NotFound
+from core.exports import ExportMixin
+from core.optimizer import READ_ACTIONS, optimize_queryset
+from core.pagination import BoundedListMixin, BoundedPageNumberPagination
+from permissions.access import HasPermission, has_permission
 
 from ..models import Level
 from .serializers import LevelSerializer
 
 
-class LevelPagination(PageNumberPagination):
+class LevelPagination(BoundedPageNumberPagination):
     page_size = 10
     page_size_query_param = "page_size"
     max_page_size = 50
 
 
-class LevelViewSet(viewsets.ModelViewSet):
+class LevelViewSet(ExportMixin, BoundedListMixin, viewsets.ModelViewSet):
     queryset = Level.objects.all()
     serializer_class = LevelSerializer
-    permission_classes = [IsAuthenticated]
+    permission_classes = [IsAuthenticated, HasPermission]
     pagination_class = LevelPagination
+    allow_superuser = True
+    required_permissions = {
+        "list": "view_level",
+        "create": "create_level",
+        "update": "update_level",
+        "partial_update": "update_level",
+        "destroy": "delete_level",
+        "export": ("view_level", "export_data"),
+    }
+    permission_denied_messages = {
+        "list": "You do not have permission to view levels.",
+        "create": "You do not have permission to create levels.",
+        "update": "You do not have permission to update levels.",
+        "partial_update": "You do not have permission to update levels.",
+        "destroy": "You do not have permission to delete levels.",
+        "export": "You do not have permission to export levels.",
+    }
     filter_backends = [filters.SearchFilter, filters.OrderingFilter]
     search_fields = ["name", "description"]
     ordering_fields = ["name", "description"]
     ordering = ["name"]
+    export_fields = [
+        ("id", "id"),
+        ("skill", "skill__name"),
+        ("order", "order"),
+        ("name", "name"),
+        ("description", "description"),
+    ]
+    export_filename = "levels.csv"
     
     def get_object(self):
         try:
@@ -34,42 +62,28 @@ class LevelViewSet(viewsets.ModelViewSet):
             raise NotFound("Level not found.")
     
     def get_queryset(self):
+        queryset = Level.objects.all().order_by("name")
+        
         if self.kwargs.get('skill_pk'):
-            return Level.objects.filter(skill_id=self.kwargs['skill_pk']).order_by("name")
-        return Level.objects.all().order_by("name")
+            queryset = queryset.filter(skill_id=self.kwargs['skill_pk'])
+        
+        if self.action in READ_ACTIONS:
+            queryset = optimize_queryset(queryset, self.get_serializer_class())
+        
+        return queryset
     
     
     def list(self, request, *args, **kwargs):
-        requesting_user = request.user
-        has_view_level_permission = (
-            requesting_user.role and requesting_user.role.permissions.filter(name="view_level").exists()
-        )
-        
-        if not has_view_level_permission and not requesting_user.is_superuser:
-            return Response(
-                {"detail": "You do not have permission to view levels."},
-                status=status.HTTP_403_FORBIDDEN
-            )
-
         queryset = self.filter_queryset(self.get_queryset())
         
-        if "page" in request.query_params or "page_size" in request.query_params:
-            page = self.paginate_queryset(queryset)
-            if page is not None:
-                serializer = self.get_serializer(page, many=True)
-                return self.get_paginated_response(serializer.data)
-        
-        serializer = self.get_serializer(queryset, many=True)
-        return Response(serializer.data)
+        return self.get_list_response(queryset)
     
     def retrieve(self, request, *args, **kwargs):
         try:
             level = self.get_object()
             
             requesting_user = request.user
-            has_view_level_permission = (
-                requesting_user.role and requesting_user.role.permissions.filter(name="view_level").exists()
-            )
+            has_view_level_permission = has_permission(request, "view_level")
             
             if not has_view_level_permission and not requesting_user.is_superuser:
                 return Response(
@@ -87,18 +101,6 @@ class LevelViewSet(viewsets.ModelViewSet):
             )
     
     def create(self, request, *args, **kwargs):
-        requesting_user = request.user
-        
-        has_create_level_permission = (
-            requesting_user.role and requesting_user.role.permissions.filter(name="create_level").exists()
-        )
-        
-        if not has_create_level_permission and not requesting_user.is_superuser:
-            return Response(
-                {"detail": "You do not have permission to create levels."},
-                status=status.HTTP_403_FORBIDDEN
-            )
-        
         serializer = self.get_serializer(data=request.data)
         if serializer.is_valid():
             serializer.save()
@@ -106,18 +108,6 @@ class LevelViewSet(viewsets.ModelViewSet):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
     
     def update(self, request, *args, **kwargs):
-        requesting_user = request.user
-        
-        has_update_level_permission = (
-            requesting_user.role and requesting_user.role.permissions.filter(name="update_level").exists()
-        )
-        
-        if not has_update_level_permission and not requesting_user.is_superuser:
-            return Response(
-                {"detail": "You do not have permission to update levels."},
-                status=status.HTTP_403_FORBIDDEN
-            )
-        
         partial = kwargs.pop("partial", False)
         level = self.get_object()
         serializer = self.get_serializer(level, data=request.data, partial=partial)
@@ -127,18 +117,6 @@ class LevelViewSet(viewsets.ModelViewSet):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
     
     def destroy(self, request, *args, **kwargs):
-        requesting_user = request.user
-        
-        has_delete_level_permission = (
-            requesting_user.role and requesting_user.role.permissions.filter(name="delete_level").exists()
-        )
-        
-        if not has_delete_level_permission and not requesting_user.is_superuser:
-            return Response(
-                {"detail": "You do not have permission to delete levels."},
-                status=status.HTTP_403_FORBIDDEN
-            )
-        
         try:
             level = self.get_object()
             level.delete()
@@ -0,0 +1,29 @@
+import core.search
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("skills", "0003_expectation_userexpectationprogress_userskill"),
+    ]
+
+    operations = [
+        core.search.CreateSearchIndex(
+            name="skills",
+            columns=["name", "description"],
+            populate_sql=(
+                "SELECT id, name, COALESCE(description, '') FROM skills_skill"
+            ),
+            trigram_columns=[
+                ("skills_skill", "name"),
+                ("skills_skill", "description"),
+            ],
+        ),
+        core.search.CreateSearchIndex(
+            name="expectations",
+            columns=["description"],
+            populate_sql="SELECT id, description FROM skills_expectation",
+            trigram_columns=[("skills_expectation", "description")],
+        ),
+    ]
@@ -0,0 +1,13 @@
+from core.search import SearchIndex
+from skills.models import Expectation, Skill
+
+
+skill_search_index = SearchIndex(
+    "skills", Skill, {"name": "name", "description": "description"}
+)
+skill_search_index.connect()
+
+expectation_search_index = SearchIndex(
+    "expectations", Expectation, {"description": "description"}
+)
+expectation_search_index.connect()
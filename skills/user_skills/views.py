@@ -2,29 +2,56 @@ from django.db import models
 from django.http import Http404
 from rest_framework import viewsets, status, filters
 from rest_framework.response import Response
-from rest_framework.pagination import PageNumberPagination
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.exceptions import NotFound
+from core.exports import ExportMixin
+from core.optimizer import READ_ACTIONS, optimize_queryset
+from core.pagination import BoundedListMixin, BoundedPageNumberPagination
+from permissions.access import HasPermission, has_permission
 
 from ..models import UserSkill
 from .serializers import UserSkillSerializer
 
 
-class UserSkillPagination(PageNumberPagination):
+class UserSkillPagination(BoundedPageNumberPagination):
     page_size = 10
     page_size_query_param = "page_size"
     max_page_size = 50
 
 
-class UserSkillViewSet(viewsets.ModelViewSet):
+class UserSkillViewSet(ExportMixin, BoundedListMixin, viewsets.ModelViewSet):
     queryset = UserSkill.objects.all()
     serializer_class = UserSkillSerializer
-    permission_classes = [IsAuthenticated]
+    permission_classes = [IsAuthenticated, HasPermission]
     pagination_class = UserSkillPagination
+    allow_superuser = True
+    required_permissions = {
+        "create": "create_user_skill",
+        "update": "update_user_skill",
+        "partial_update": "update_user_skill",
+        "destroy": "delete_user_skill",
+        "export": ("view_user_skill", "export_data"),
+    }
+    permission_denied_messages = {
+        "create": "You do not have permission to assign skills to users.",
+        "update": "You do not have permission to update user skills.",
+        "partial_update": "You do not have permission to update user skills.",
+        "destroy": "You do not have permission to remove skills from users.",
+        "export": "You do not have permission to export user skills.",
+    }
     filter_backends = [filters.SearchFilter, filters.OrderingFilter]
     search_fields = ["user__username", "skill__name"]
     ordering_fields = ["updated_at"]
     ordering = ["-updated_at"]
+    export_fields = [
+        ("id", "id"),
+        ("user_email", "user__email"),
+        ("skill", "skill__name"),
+        ("level", "current_level__name"),
+        ("started_at", "started_at"),
+        ("updated_at", "updated_at"),
+    ]
+    export_filename = "user-skills.csv"
     
     def get_object(self):
         try:
@@ -50,13 +77,14 @@ class UserSkillViewSet(viewsets.ModelViewSet):
         if self.request.query_params.get('my_skills', None) == 'true':
             queryset = queryset.filter(user=self.request.user)
             
+        if self.action in READ_ACTIONS:
+            queryset = optimize_queryset(queryset, self.get_serializer_class())
+            
         return queryset
     
     def list(self, request, *args, **kwargs):
         requesting_user = request.user
-        has_view_user_skill_permission = (
-            requesting_user.role and requesting_user.role.permissions.filter(name="view_user_skill").exists()
-        )
+        has_view_user_skill_permission = has_permission(request, "view_user_skill")
         
         # Allow users to view their own skills without special permission
         my_skills_only = request.query_params.get('my_skills', None) == 'true'
@@ -69,23 +97,14 @@ class UserSkillViewSet(viewsets.ModelViewSet):
 
         queryset = self.filter_queryset(self.get_queryset())
         
-        if "page" in request.query_params or "page_size" in request.query_params:
-            page = self.paginate_queryset(queryset)
-            if page is not None:
-                serializer = self.get_serializer(page, many=True)
-                return self.get_paginated_response(serializer.data)
-        
-        serializer = self.get_serializer(queryset, many=True)
-        return Response(serializer.data)
+        return self.get_list_response(queryset)
     
     def retrieve(self, request, *args, **kwargs):
         try:
             user_skill = self.get_object()
             
             requesting_user = request.user
-            has_view_user_skill_permission = (
-                requesting_user.role and requesting_user.role.permissions.filter(name="view_user_skill").exists()
-            )
+            has_view_user_skill_permission = has_permission(request, "view_user_skill")
             
             # Allow users to view their own skills without special permission
             is_own_skill = user_skill.user.id == requesting_user.id
@@ -106,18 +125,6 @@ class UserSkillViewSet(viewsets.ModelViewSet):
             )
     
     def create(self, request, *args, **kwargs):
-        requesting_user = request.user
-        
-        has_create_user_skill_permission = (
-            requesting_user.role and requesting_user.role.permissions.filter(name="create_user_skill").exists()
-        )
-        
-        if not has_create_user_skill_permission and not requesting_user.is_superuser:
-            return Response(
-                {"detail": "You do not have permission to assign skills to users."},
-                status=status.HTTP_403_FORBIDDEN
-            )
-            
         serializer = self.get_serializer(data=request.data)
         if serializer.is_valid():
             serializer.save()
@@ -125,18 +132,6 @@ class UserSkillViewSet(viewsets.ModelViewSet):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
     
     def update(self, request, *args, **kwargs):
-        requesting_user = request.user
-        
-        has_update_user_skill_permission = (
-            requesting_user.role and requesting_user.role.permissions.filter(name="update_user_skill").exists()
-        )
-        
-        if not has_update_user_skill_permission and not requesting_user.is_superuser:
-            return Response(
-                {"detail": "You do not have permission to update user skills."},
-                status=status.HTTP_403_FORBIDDEN
-            )
-        
         partial = kwargs.pop("partial", False)
         user_skill = self.get_object()
         serializer = self.get_serializer(user_skill, data=request.data, partial=partial)
@@ -146,18 +141,6 @@ class UserSkillViewSet(viewsets.ModelViewSet):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
     
     def destroy(self, request, *args, **kwargs):
-        requesting_user = request.user
-        
-        has_delete_user_skill_permission = (
-            requesting_user.role and requesting_user.role.permissions.filter(name="delete_user_skill").exists()
-        )
-        
-        if not has_delete_user_skill_permission and not requesting_user.is_superuser:
-            return Response(
-                {"detail": "You do not have permission to remove skills from users."},
-                status=status.HTTP_403_FORBIDDEN
-            )
-        
         try:
             user_skill = self.get_object()
             user_skill.delete()
@@ -2,30 +2,56 @@ from django.db import models
 from django.http import Http404
 from rest_framework import viewsets, status, filters
 from rest_framework.response import Response
-from rest_framework.pagination import PageNumberPagination
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.exceptions import NotFound
+from core.search import IndexSearchFilter, RelevanceOrderingFilter
+from core.exports import ExportMixin
+from core.optimizer import READ_ACTIONS, optimize_queryset
+from core.pagination import BoundedListMixin, BoundedPageNumberPagination
+from permissions.access import HasPermission, has_permission
 
 from ..models import Team
+from ..search import team_search_index
 from .serializers import TeamSerializer, TeamDetailSerializer
 from users.models import User
 
 
-class TeamPagination(PageNumberPagination):
+class TeamPagination(BoundedPageNumberPagination):
     page_size = 10
     page_size_query_param = "page_size"
     max_page_size = 50
 
 
-class TeamViewSet(viewsets.ModelViewSet):
+class TeamViewSet(ExportMixin, BoundedListMixin, viewsets.ModelViewSet):
     queryset = Team.objects.all()
     serializer_class = TeamSerializer
-    permission_classes = [IsAuthenticated]
+    permission_classes = [IsAuthenticated, HasPermission]
     pagination_class = TeamPagination
-    filter_backends = [filters.SearchFilter, filters.OrderingFilter]
-    search_fields = ["name", "description"]
+    allow_superuser = True
+    required_permissions = {
+        "list": "view_team",
+        "create": "create_team",
+        "destroy": "delete_team",
+        "export": ("view_team", "export_data"),
+    }
+    permission_denied_messages = {
+        "list": "You do not have permission to view teams.",
+        "create": "You do not have permission to create teams.",
+        "destroy": "You do not have permission to delete teams.",
+        "export": "You do not have permission to export teams.",
+    }
+    filter_backends = [IndexSearchFilter, RelevanceOrderingFilter]
+    search_index = team_search_index
     ordering_fields = ["name", "description"]
     ordering = ["name"]
+    export_fields = [
+        ("id", "id"),
+        ("name", "name"),
+        ("description", "description"),
+        ("team_lead_email", "team_lead__email"),
+        ("created_at", "created_at"),
+    ]
+    export_filename = "teams.csv"
     
     def get_serializer_class(self):
         if self.action == "retrieve":
@@ -42,39 +68,16 @@ class TeamViewSet(viewsets.ModelViewSet):
     def get_queryset(self):
         queryset = Team.objects.all().order_by("name")
         
-        # Apply search filtering manually to ensure it works correctly
-        search = self.request.query_params.get("search", None)
-        if search:
-            queryset = queryset.filter(
-                models.Q(name__icontains=search) | 
-                models.Q(description__icontains=search)
-            )
+        if self.action in READ_ACTIONS:
+            queryset = optimize_queryset(queryset, self.get_serializer_class())
         
         return queryset
     
     def list(self, request, *args, **kwargs):
-        requesting_user = request.user
-        has_view_team_permission = (
-            requesting_user.role and requesting_user.role.permissions.filter(name="view_team").exists()
-        )
-        
-        if not has_view_team_permission and not requesting_user.is_superuser:
-            return Response(
-                {"detail": "You do not have permission to view teams."},
-                status=status.HTTP_403_FORBIDDEN
-            )
-
         queryset = self.filter_queryset(self.get_queryset())
         
         # Use pagination only if specifically requested
-        if "page" in request.query_params or "page_size" in request.query_params:
-            page = self.paginate_queryset(queryset)
-            if page is not None:
-                serializer = self.get_serializer(page, many=True)
-                return self.get_paginated_response(serializer.data)
-        
-        serializer = self.get_serializer(queryset, many=True)
-        return Response(serializer.data)
+        return self.get_list_response(queryset)
     
     def retrieve(self, request, *args, **kwargs):
         try:
@@ -83,9 +86,7 @@ class TeamViewSet(viewsets.ModelViewSet):
             
             # If team exists, check for permissions
             requesting_user = request.user
-            has_view_team_permission = (
-                requesting_user.role and requesting_user.role.permissions.filter(name="view_team").exists()
-            )
+            has_view_team_permission = has_permission(request, "view_team")
             
             if not has_view_team_permission and not requesting_user.is_superuser:
                 return Response(
@@ -103,18 +104,6 @@ class TeamViewSet(viewsets.ModelViewSet):
             )
     
     def create(self, request, *args, **kwargs):
-        requesting_user = request.user
-        
-        has_create_team_permission = (
-            requesting_user.role and requesting_user.role.permissions.filter(name="create_team").exists()
-        )
-        
-        if not has_create_team_permission and not requesting_user.is_superuser:
-            return Response(
-                {"detail": "You do not have permission to create teams."},
-                status=status.HTTP_403_FORBIDDEN
-            )
-        
         serializer = self.get_serializer(data=request.data)
         if serializer.is_valid():
             serializer.save()
@@ -127,9 +116,7 @@ class TeamViewSet(viewsets.ModelViewSet):
         
         # Allow team leads to update their own teams regardless of permission
         is_team_lead = team.team_lead == requesting_user
-        has_update_team_permission = (
-            requesting_user.role and requesting_user.role.permissions.filter(name="update_team").exists()
-        )
+        has_update_team_permission = has_permission(request, "update_team")
         
         if not is_team_lead and not has_update_team_permission and not requesting_user.is_superuser:
             return Response(
@@ -145,18 +132,6 @@ class TeamViewSet(viewsets.ModelViewSet):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
     
     def destroy(self, request, *args, **kwargs):
-        requesting_user = request.user
-        
-        has_delete_team_permission = (
-            requesting_user.role and requesting_user.role.permissions.filter(name="delete_team").exists()
-        )
-        
-        if not has_delete_team_permission and not requesting_user.is_superuser:
-            return Response(
-                {"detail": "You do not have permission to delete teams."},
-                status=status.HTTP_403_FORBIDDEN
-            )
-        
         try:
             # Get the team first (this may raise an exception if not found)
             team = self.get_object()
@@ -0,0 +1,21 @@
+import core.search
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("teams", "0001_initial"),
+    ]
+
+    operations = [
+        core.search.CreateSearchIndex(
+            name="teams",
+            columns=["name", "description"],
+            populate_sql=("SELECT id, name, COALESCE(description, '') FROM teams_team"),
+            trigram_columns=[
+                ("teams_team", "name"),
+                ("teams_team", "description"),
+            ],
+        ),
+    ]
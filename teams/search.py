@@ -0,0 +1,8 @@
+from core.search import SearchIndex
+from teams.models import Team
+
+
+team_search_index = SearchIndex(
+    "teams", Team, {"name": "name", "description": "description"}
+)
+team_search_index.connect()
@@ -5,6 +5,7 @@ from core.validators import (
     validate_user_email,
     validate_user_name,
 )
+from permissions.access import has_permission
 from roles.base.serializers import SimpleRoleSerializer
 from roles.models import Role
 from users.models import User
@@ -78,7 +79,6 @@ class UserSerializer(serializers.ModelSerializer):
     def to_representation(self, instance):
         representation = super().to_representation(instance)
         request = self.context.get("request")
-        requesting_user = request.user if request else None
 
         if not request:
             return representation
@@ -88,11 +88,7 @@ class UserSerializer(serializers.ModelSerializer):
         if operation == "update":
             representation.pop("password", None)
         else:
-            has_create_user_permission = (
-                requesting_user.role
-                and requesting_user.role.has_permission("create_user")
-            )
-            if has_create_user_permission and instance.is_manually_created:
+            if has_permission(request, "create_user") and instance.is_manually_created:
                 if instance.temp_plaintext_password:
                     representation["password"] = instance.temp_plaintext_password
                 else:
@@ -1,9 +1,18 @@
+import csv
+import json
+from django.conf import settings
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from rest_framework import status
 from rest_framework.test import APITestCase
+from authentication.cache import principal_cache
+from core.search import BasicSearchBackend
 from permissions.models import Permission, PermissionGroup
 from roles.models import Role
+from users.bulk.ingest.engine import UserIngestEngine
 from users.models import User
+from users.search import user_search_index
 
 
 class UserTests(APITestCase):
@@ -345,6 +354,19 @@ class UserTests(APITestCase):
         response = self.client.get(self.user_url(self.view_user.id))
         self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
 
+    def test_user_detail_ignores_ordering(self):
+        """
+        Test that an ordering parameter on a user's detail URL is ignored rather than rejected.
+        """
+        self.authenticate(
+            email=self.create_user_data["email"],
+            password=self.create_user_data["password"],
+        )
+        response = self.client.get(
+            self.user_url(self.create_user.id), {"ordering": "unknown"}
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
     def test_user_self(self):
         """
         Test that authenticated users who do not have view_user permission can get their own details.
@@ -1223,3 +1245,401 @@ class UserTests(APITestCase):
         response = self.client.delete(self.user_url(99999))
         self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
         self.assertEqual(response.data["detail"], "User not found.")
+
+
+class UserEmailLookupTests(APITestCase):
+    def setUp(self):
+        self.first_user = User.objects.create_user(
+            name="First", email="first@example.com", password="First123!"
+        )
+        self.second_user = User.objects.create_user(
+            name="Second", email="second@example.com", password="Second123!"
+        )
+
+    def test_get_by_email_case_insensitive(self):
+        """
+        Test that email lookups ignore case and surrounding whitespace.
+        """
+        self.assertEqual(
+            User.get_by_email(" FIRST@Example.com ").get(), self.first_user
+        )
+        self.assertTrue(User.exists_by_email("Second@EXAMPLE.com"))
+        self.assertFalse(User.exists_by_email("third@example.com"))
+
+    def test_email_lookup_uses_lowercase_expression(self):
+        """
+        Test that email lookups compare LOWER(email) so the functional index can be used.
+        """
+        with CaptureQueriesContext(connection) as queries:
+            User.exists_by_email("FIRST@example.com")
+
+        self.assertIn('LOWER("users_user"."email")', queries[0]["sql"])
+
+    def test_email_batch_lookups_use_single_query(self):
+        """
+        Test that batch email lookups resolve every email with one query.
+        """
+        emails = ["FIRST@example.com", "second@EXAMPLE.com", "third@example.com"]
+
+        with self.assertNumQueries(2):
+            self.assertTrue(User.exists_in_emails(emails))
+            self.assertEqual(
+                set(User.get_by_emails(emails)), {self.first_user, self.second_user}
+            )
+
+
+class UserSearchTests(APITestCase):
+    def setUp(self):
+        self.engineer_role = Role.objects.create(name="engineer")
+        self.smith = User.objects.create_user(
+            name="Smith", email="agent@example.com", password="Smith123!"
+        )
+        self.john_smith = User.objects.create_user(
+            name="John Smith", email="john@example.com", password="John123!"
+        )
+        self.blacksmith = User.objects.create_user(
+            name="Jane Doe",
+            email="blacksmith@example.com",
+            password="Jane123!",
+            role=self.engineer_role,
+        )
+
+    def search(self, query, backend=None):
+        if backend is None:
+            return list(user_search_index.search(User.objects.all(), query))
+
+        return list(backend.search(user_search_index, User.objects.all(), query))
+
+    def test_search_ranks_by_relevance(self):
+        """
+        Test that search returns every user matching in any field, best matches first.
+        """
+        results = self.search("smith")
+
+        self.assertEqual(
+            {user.id for user in results},
+            {self.smith.id, self.john_smith.id, self.blacksmith.id},
+        )
+        self.assertEqual(results[0], self.smith)
+
+    def test_search_matches_basic_backend(self):
+        """
+        Test that the configured backend matches the same users as plain substring search.
+        """
+        for query in ["smith", "SMITH", "example.com", "jo", "engineer", "nobody"]:
+            self.assertEqual(
+                {user.id for user in self.search(query)},
+                {user.id for user in self.search(query, BasicSearchBackend())},
+                query,
+            )
+
+    def test_search_index_follows_user_and_role_changes(self):
+        """
+        Test that saving or deleting users and roles keeps the search index in sync.
+        """
+        self.john_smith.name = "John Carpenter"
+        self.john_smith.save()
+        self.assertNotIn(self.john_smith, self.search("smith"))
+        self.assertEqual(self.search("carpenter"), [self.john_smith])
+
+        self.engineer_role.name = "architect"
+        self.engineer_role.save()
+        self.assertEqual(self.search("architect"), [self.blacksmith])
+        self.assertEqual(self.search("engineer"), [])
+
+        self.engineer_role.delete()
+        self.assertEqual(self.search("architect"), [])
+
+        self.smith.delete()
+        self.assertEqual(self.search("agent@"), [])
+
+    def test_search_index_follows_bulk_writes(self):
+        """
+        Test that users written in bulk by the ingest engine and role membership updates are searchable.
+        """
+        UserIngestEngine().ingest_chunk(
+            [
+                {"name": "Bulk Person", "email": "bulk@example.com", "role": ""},
+                {"name": "Renamed Smith", "email": "john@example.com", "role": ""},
+            ],
+            first_row_num=1,
+        )
+        self.engineer_role.set_users([self.smith.id])
+
+        self.assertEqual(
+            [user.email for user in self.search("bulk person")], ["bulk@example.com"]
+        )
+        self.assertEqual(self.search("renamed"), [self.john_smith])
+        self.assertEqual(self.search("engineer"), [self.smith])
+
+    def test_users_list_search_keeps_relevance_order(self):
+        """
+        Test that the users list returns search results in relevance order unless an ordering is given.
+        """
+        viewer_role = Role.objects.create(name="viewer")
+        viewer_role.permissions.set(
+            [
+                Permission.objects.create(
+                    name="view_user",
+                    description="Permission to view users.",
+                    group=PermissionGroup.objects.create(name="users"),
+                )
+            ]
+        )
+        self.client.force_authenticate(
+            User.objects.create_user(
+                name="Viewer",
+                email="viewer@example.com",
+                password="Viewer123!",
+                role=viewer_role,
+            )
+        )
+        users_url = reverse("users-list")
+
+        response = self.client.get(users_url, {"search": "smith"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data[0]["id"], self.smith.id)
+
+        response = self.client.get(users_url, {"search": "smith", "ordering": "name"})
+        self.assertEqual(
+            [user["id"] for user in response.data],
+            [self.blacksmith.id, self.john_smith.id, self.smith.id],
+        )
+
+
+class UserCursorPaginationTests(APITestCase):
+    def setUp(self):
+        self.viewer_role = Role.objects.create(name="viewer")
+        self.viewer_role.permissions.set(
+            [
+                Permission.objects.create(
+                    name="view_user",
+                    description="Permission to view users.",
+                    group=PermissionGroup.objects.create(name="users"),
+                )
+            ]
+        )
+        self.other_role = Role.objects.create(name="other")
+        self.viewer = User.objects.create_user(
+            name="Viewer",
+            email="viewer@example.com",
+            password="Viewer123!",
+            role=self.viewer_role,
+        )
+
+        roles = [None, self.viewer_role, self.other_role]
+        for index in range(25):
+            User.objects.create_user(
+                # Repeated names make the tie-breaking on id matter.
+                name=f"User {index % 7}",
+                email=f"user{index}@example.com",
+                password="User1234!",
+                role=roles[index % 3],
+            )
+
+        self.users_url = reverse("users-list")
+        self.client.force_authenticate(self.viewer)
+
+    def get_expected_ids(self, *ordering):
+        return list(
+            User.objects.exclude(id=self.viewer.id)
+            .order_by(*ordering)
+            .values_list("id", flat=True)
+        )
+
+    def walk(self, params):
+        ids = []
+        response = self.client.get(self.users_url, {**params, "cursor": ""})
+
+        while True:
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            ids.extend(user["id"] for user in response.data["results"])
+
+            if not response.data["next"]:
+                return ids, response
+
+            response = self.client.get(response.data["next"])
+
+    def test_cursor_pagination_walks_every_user_once(self):
+        """
+        Test that following next cursors returns every user once, in the requested order.
+        """
+        for ordering, fields in [
+            (None, ("role_id", "name", "id")),
+            ("-role,-name", ("-role_id", "-name", "-id")),
+            ("name", ("name", "id")),
+            ("-email", ("-email",)),
+        ]:
+            params = {"page_size": 4}
+            if ordering:
+                params["ordering"] = ordering
+
+            ids, _ = self.walk(params)
+
+            self.assertEqual(ids, self.get_expected_ids(*fields), ordering)
+
+    def test_cursor_pagination_previous_link(self):
+        """
+        Test that the previous cursor returns the page before the current one.
+        """
+        first = self.client.get(
+            self.users_url, {"ordering": "name", "page_size": 10, "cursor": ""}
+        )
+        self.assertIsNone(first.data["previous"])
+
+        second = self.client.get(first.data["next"])
+        back = self.client.get(second.data["previous"])
+
+        self.assertEqual(back.data["results"], first.data["results"])
+        self.assertEqual(
+            self.client.get(back.data["next"]).data["results"],
+            second.data["results"],
+        )
+
+    def test_cursor_pagination_does_not_use_offset(self):
+        """
+        Test that later pages seek from the cursor with the same number of queries as the first page.
+        """
+        first = self.client.get(self.users_url, {"page_size": 5, "cursor": ""})
+        second = self.client.get(first.data["next"])
+
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(second.data["next"])
+
+        user_queries = [
+            query["sql"] for query in queries if 'FROM "users_user"' in query["sql"]
+        ]
+        self.assertEqual(len(user_queries), 1)
+        self.assertNotIn("OFFSET", user_queries[0])
+
+    def test_rejects_unsupported_ordering_and_invalid_cursor(self):
+        """
+        Test that orderings outside the allow-list are rejected and tampered cursors are not found.
+        """
+        response = self.client.get(self.users_url, {"ordering": "password"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        response = self.client.get(self.users_url, {"cursor": "not-a-cursor"})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+        first = self.client.get(self.users_url, {"page_size": 5, "cursor": ""})
+        response = self.client.get(first.data["next"] + "&ordering=name")
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class UserListBoundsTests(APITestCase):
+    def setUp(self):
+        users_permission_group = PermissionGroup.objects.create(name="users")
+        self.view_user_permission = Permission.objects.create(
+            name="view_user",
+            description="Permission to view users.",
+            group=users_permission_group,
+        )
+        self.export_data_permission = Permission.objects.create(
+            name="export_data",
+            description="Permission to export data.",
+            group=PermissionGroup.objects.create(name="exports"),
+        )
+        self.viewer_role = Role.objects.create(name="viewer")
+        self.viewer_role.permissions.set([self.view_user_permission])
+        self.viewer = User.objects.create_user(
+            name="Viewer",
+            email="viewer@example.com",
+            password="Viewer123!",
+            role=self.viewer_role,
+        )
+
+        for index in range(20):
+            User.objects.create_user(
+                name=f"User {index:02}",
+                email=f"user{index}@example.com",
+                password="User1234!",
+            )
+
+        self.users_url = reverse("users-list")
+        self.export_url = reverse("users-export")
+        self.client.force_authenticate(self.viewer)
+
+    def test_unpaginated_list_is_capped(self):
+        """
+        Test that a list requested without page parameters is capped and flagged as truncated.
+        """
+        with self.settings(
+            PAGINATION={**settings.PAGINATION, "MAX_UNPAGINATED_RESULTS": 5}
+        ):
+            response = self.client.get(self.users_url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data), 5)
+        self.assertEqual(response["X-Results-Truncated"], "true")
+        self.assertIn('rel="first"', response["Link"])
+
+        response = self.client.get(self.users_url)
+        self.assertEqual(len(response.data), 20)
+        self.assertNotIn("X-Results-Truncated", response)
+
+    def test_page_size_is_capped(self):
+        """
+        Test that a page never holds more than the maximum page size, even when only page_size is given.
+        """
+        response = self.client.get(self.users_url, {"page_size": 1000})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["count"], 20)
+        self.assertEqual(len(response.data["results"]), 15)
+
+    def test_export_requires_export_permission(self):
+        """
+        Test that exporting users requires the export_data permission on top of view_user.
+        """
+        response = self.client.get(self.export_url)
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+        self.viewer_role.permissions.add(self.export_data_permission)
+        principal_cache.clear()
+
+        response = self.client.get(self.export_url, {"search": "user 1"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response["Content-Type"], "text/csv")
+
+        rows = list(
+            csv.reader(b"".join(response.streaming_content).decode().splitlines())
+        )
+        self.assertEqual(
+            rows[0], ["id", "name", "email", "role", "is_active", "date_joined"]
+        )
+        self.assertEqual(
+            sorted(row[1] for row in rows[1:]),
+            [f"User {index}" for index in range(10, 20)],
+        )
+
+    def test_streamed_list_matches_list(self):
+        """
+        Test that ?stream=json streams the complete list, serialized chunk by chunk, for users allowed to export.
+        """
+        response = self.client.get(self.users_url, {"stream": "json"})
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+        self.viewer_role.permissions.add(self.export_data_permission)
+        principal_cache.clear()
+
+        expected = self.client.get(self.users_url, {"ordering": "name"}).json()
+
+        with self.settings(
+            PAGINATION={
+                **settings.PAGINATION,
+                "MAX_UNPAGINATED_RESULTS": 5,
+                "EXPORT_CHUNK_SIZE": 6,
+            }
+        ):
+            response = self.client.get(
+                self.users_url, {"stream": "json", "ordering": "name"}
+            )
+            with CaptureQueriesContext(connection) as queries:
+                content = b"".join(response.streaming_content)
+
+        self.assertEqual(response["Content-Type"], "application/json")
+        self.assertEqual(json.loads(content), expected)
+        self.assertEqual(len(expected), 20)
+        # 20 rows in chunks of 6 need 4 fetches, and roles come with them.
+        self.assertLessEqual(len(queries), 4)
@@ -1,31 +1,76 @@
-from django.db import models
 from django.http import Http404
 from rest_framework import status, viewsets
-from rest_framework.pagination import PageNumberPagination
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.exceptions import NotFound, PermissionDenied
+from core.exports import ExportMixin
+from core.optimizer import READ_ACTIONS, optimize_queryset
+from core.pagination import (
+    BoundedListMixin,
+    BoundedPageNumberPagination,
+    KeysetPagination,
+)
+from permissions.access import HasPermission, has_permission
 from users.models import User
 from users.base.serializers import UserSerializer
+from users.search import user_search_index
 
 
-class CustomUserPagination(PageNumberPagination):
+# Orderings clients may ask for, each backed by an index.
+USER_ORDERINGS = {
+    "role,name": ("role_id", "name", "id"),
+    "-role,-name": ("-role_id", "-name", "-id"),
+    "name": ("name", "id"),
+    "-name": ("-name", "-id"),
+    "email": ("email",),
+    "-email": ("-email",),
+}
+
+
+class CustomUserPagination(BoundedPageNumberPagination):
+    page_size = 10
+    page_size_query_param = "page_size"
+    max_page_size = 15
+
+
+class UserCursorPagination(KeysetPagination):
     page_size = 10
     page_size_query_param = "page_size"
     max_page_size = 15
+    orderings = USER_ORDERINGS
+    default_ordering = "role,name"
 
 
-class UserViewSet(viewsets.ModelViewSet):
+class UserViewSet(ExportMixin, BoundedListMixin, viewsets.ModelViewSet):
     queryset = User.objects.select_related("role").all()
     serializer_class = UserSerializer
-    permission_classes = [IsAuthenticated]
+    permission_classes = [IsAuthenticated, HasPermission]
     pagination_class = CustomUserPagination
+    required_permissions = {
+        "list": "view_user",
+        "create": "create_user",
+        "export": ("view_user", "export_data"),
+    }
+    permission_denied_messages = {
+        "list": "You do not have permission to view users.",
+        "create": "You do not have permission to create a user.",
+        "export": "You do not have permission to export users.",
+    }
+    export_fields = [
+        ("id", "id"),
+        ("name", "name"),
+        ("email", "email"),
+        ("role", "role__name"),
+        ("is_active", "is_active"),
+        ("date_joined", "date_joined"),
+    ]
+    export_filename = "users.csv"
 
     def get_queryset(self):
         requesting_user = self.request.user
         queryset = super().get_queryset()
 
-        if self.action == "list":
+        if self.action in ("list", "export"):
             if requesting_user.is_superuser:
                 queryset = queryset.exclude(id=requesting_user.id)
             else:
@@ -33,20 +78,21 @@ class UserViewSet(viewsets.ModelViewSet):
                     is_superuser=True
                 )
 
-        search = self.request.query_params.get("search", "").strip().lower()
+        search = self.request.query_params.get("search", "").strip()
         if search:
-            queryset = queryset.filter(
-                models.Q(name__icontains=search)
-                | models.Q(email__icontains=search)
-                | models.Q(role__name__icontains=search)
-            )
+            queryset = user_search_index.search(queryset, search)
+
+        # Search results stay in relevance order unless an ordering is given.
+        # Only listings are ordered, so a stray ?ordering= on a detail URL is
+        # ignored rather than rejected.
+        if self.action in ("list", "export") and (
+            self.request.query_params.get("ordering") or not search
+        ):
+            ordering = UserCursorPagination().get_ordering(self.request)
+            queryset = queryset.order_by(*USER_ORDERINGS[ordering])
 
-        ordering = self.request.query_params.get("ordering")
-        if ordering:
-            ordering_fields = [field.strip() for field in ordering.split(",")]
-            queryset = queryset.order_by(*ordering_fields)
-        else:
-            queryset = queryset.order_by("role", "name")
+        if self.action in READ_ACTIONS:
+            queryset = optimize_queryset(queryset, self.get_serializer_class())
 
         return queryset
 
@@ -60,31 +106,20 @@ class UserViewSet(viewsets.ModelViewSet):
 
     def list(self, request):
         requesting_user = request.user
-
-        has_view_user_permission = (
-            requesting_user.role and requesting_user.role.has_permission("view_user")
-        )
-        if not has_view_user_permission:
-            raise PermissionDenied("You do not have permission to view users.")
-
         queryset = self.get_queryset().exclude(id=requesting_user.id)
 
         if not requesting_user.is_superuser:
             queryset = queryset.exclude(is_superuser=True)
 
-        page_param = request.query_params.get("page")
-        page_size_param = request.query_params.get("page_size")
+        if "cursor" in request.query_params:
+            # An empty cursor requests the first page.
+            paginator = UserCursorPagination()
+            page = paginator.paginate_queryset(queryset, request, view=self)
+            serializer = self.get_serializer(page, many=True)
 
-        if page_param and page_size_param:
-            page = self.paginate_queryset(queryset)
-            if page is not None:
-                serializer = self.get_serializer(page, many=True)
+            return paginator.get_paginated_response(serializer.data)
 
-                return self.get_paginated_response(serializer.data)
-
-        serializer = self.get_serializer(queryset, many=True)
-
-        return Response(serializer.data)
+        return self.get_list_response(queryset)
 
     def retrieve(self, request, *args, **kwargs):
         requesting_user = request.user
@@ -105,11 +140,7 @@ class UserViewSet(viewsets.ModelViewSet):
         if target_user.is_superuser:
             raise PermissionDenied("You cannot view a superuser.")
 
-        has_view_user_permission = (
-            requesting_user.role and requesting_user.role.has_permission("view_user")
-        )
-
-        if not has_view_user_permission:
+        if not has_permission(request, "view_user"):
             raise PermissionDenied("You do not have permission to view this user.")
 
         serializer = self.get_serializer(target_user)
@@ -117,15 +148,6 @@ class UserViewSet(viewsets.ModelViewSet):
         return Response(serializer.data)
 
     def create(self, request, *args, **kwargs):
-        requesting_user = request.user
-
-        has_create_user_permission = (
-            requesting_user.role and requesting_user.role.has_permission("create_user")
-        )
-
-        if not has_create_user_permission:
-            raise PermissionDenied("You do not have permission to create a user.")
-
         serializer_context = self.get_serializer_context()
         serializer_context.update({"operation": "create"})
 
@@ -149,11 +171,7 @@ class UserViewSet(viewsets.ModelViewSet):
         is_self = requesting_user.id == target_user.id
 
         if not is_self:
-            has_update_user_permission = (
-                requesting_user.role
-                and requesting_user.role.has_permission("update_user")
-            )
-            if not has_update_user_permission:
+            if not has_permission(request, "update_user"):
                 raise PermissionDenied(
                     "You do not have permission to update this user."
                 )
@@ -183,11 +201,7 @@ class UserViewSet(viewsets.ModelViewSet):
         is_self = requesting_user.id == target_user.id
 
         if not is_self:
-            has_delete_user_permission = (
-                requesting_user.role
-                and requesting_user.role.has_permission("delete_user")
-            )
-            if not has_delete_user_permission:
+            if not has_permission(request, "delete_user"):
                 raise PermissionDenied(
                     "You do not have permission to delete this user."
                 )
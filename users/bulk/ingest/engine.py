@@ -0,0 +1,194 @@
+import time
+from dataclasses import dataclass, field
+from django.db import transaction
+from authentication.cache import principal_cache
+from core.metrics import ingest_chunk_duration, ingest_rows
+from core.utils import generate_password, normalize_string
+from roles.models import Role
+from users.bulk.ingest.hashing import hash_passwords
+from users.bulk.ingest.serializers import UserBulkIngestSerializer
+from users.models import User
+from users.search import user_search_index
+
+
+@dataclass
+class IngestChunkResult:
+    total_rows: int = 0
+    created: list = field(default_factory=list)
+    updated: list = field(default_factory=list)
+    # (row number, "create" or "update", user) for every saved row, in order.
+    operations: list = field(default_factory=list)
+    validation_errors: int = 0
+    db_errors: int = 0
+    errors: list = field(default_factory=list)
+
+
+class UserIngestEngine:
+    """
+    Ingests CSV rows one chunk at a time with a fixed number of queries per
+    chunk: role names are resolved once per file, existing users are looked up
+    by email once per chunk, and creates and updates are each written with a
+    single bulk statement.
+    """
+
+    def __init__(self, serializer_context=None):
+        self.serializer_context = serializer_context or {}
+        # Role name -> Role, or the validation error for that name. Kept for
+        # the whole file so each distinct role name is checked once.
+        self.roles = {}
+
+    def ingest(self, batches, first_row_num=1):
+        row_num = first_row_num
+
+        for rows in batches:
+            yield self.ingest_chunk(rows, row_num)
+            row_num += len(rows)
+
+    def ingest_chunk(self, rows, first_row_num):
+        start = time.perf_counter()
+        result = IngestChunkResult(total_rows=len(rows))
+
+        self.resolve_roles(row.get("role") for row in rows)
+
+        valid_rows = []
+
+        for row_num, row in enumerate(rows, start=first_row_num):
+            serializer = UserBulkIngestSerializer(
+                data=row, context={**self.serializer_context, "roles": self.roles}
+            )
+            if not serializer.is_valid():
+                result.validation_errors += 1
+                result.errors.append({"row": row_num, "errors": serializer.errors})
+                continue
+
+            valid_rows.append((row_num, serializer.validated_data))
+
+        if valid_rows:
+            self.persist(valid_rows, result)
+
+        result.errors.sort(key=lambda error: error["row"])
+
+        ingest_chunk_duration.observe(time.perf_counter() - start)
+        ingest_rows.inc(len(result.created), result="created")
+        ingest_rows.inc(len(result.updated), result="updated")
+        ingest_rows.inc(result.validation_errors, result="validation_error")
+        ingest_rows.inc(result.db_errors, result="db_error")
+
+        return result
+
+    def resolve_roles(self, names):
+        # Stripped like the serializer's role field, which looks names up here.
+        names = {name.strip() for name in names if name}
+        names = {name for name in names if name and name not in self.roles}
+
+        if not names:
+            return
+
+        roles = {role.name: role for role in Role.objects.filter(name__in=names)}
+        superuser_role_ids = set(
+            User.get_superusers_in_roles(roles.values()).values_list(
+                "role_id", flat=True
+            )
+        )
+
+        for name in names:
+            role = roles.get(name)
+
+            if role is None:
+                self.roles[name] = f"Role {name} not found."
+            elif role.id in superuser_role_ids:
+                self.roles[name] = f"Role {name} is a superuser role."
+            else:
+                self.roles[name] = role
+
+    def persist(self, valid_rows, result):
+        emails = {normalize_string(data["email"]) for _, data in valid_rows}
+        existing_users = {
+            normalize_string(user.email): user for user in User.get_by_emails(emails)
+        }
+
+        new_users = {}
+        changed_users = {}
+        operations = []
+
+        for row_num, data in valid_rows:
+            email = normalize_string(data["email"])
+            user = existing_users.get(email)
+
+            if user is None and email in new_users:
+                # A repeated email in the same chunk updates the user its first
+                # row creates, as it would have if the rows were saved one by one.
+                user = new_users[email]
+
+            if user is not None:
+                user.name = data["name"]
+                user.email = data["email"]
+                user.role = data.get("role")
+
+                if user.pk:
+                    changed_users[user.pk] = user
+
+                operations.append((row_num, "update", user))
+                continue
+
+            user = User(
+                name=data["name"].strip(),
+                email=email,
+                role=data.get("role"),
+                is_manually_created=True,
+                temp_plaintext_password=generate_password(),
+            )
+
+            new_users[email] = user
+            operations.append((row_num, "create", user))
+
+        password_hashes = hash_passwords(
+            user.temp_plaintext_password for user in new_users.values()
+        )
+        for user, password_hash in zip(new_users.values(), password_hashes):
+            user.password = password_hash
+
+        try:
+            with transaction.atomic():
+                User.objects.bulk_create(new_users.values())
+                User.objects.bulk_update(
+                    changed_users.values(), ["name", "email", "role"]
+                )
+                # Bulk writes skip the signals that keep the search index in sync.
+                user_search_index.update(
+                    [user.pk for user in new_users.values()] + list(changed_users)
+                )
+        except Exception:
+            # Fall back to saving row by row so the failing rows can be
+            # reported individually, as they were before batching.
+            for user in new_users.values():
+                user.pk = None
+                user._state.adding = True
+
+            operations = self.persist_rows(operations, result)
+
+        principal_cache.invalidate_users(changed_users.keys())
+
+        result.operations.extend(operations)
+
+        for row_num, operation, user in operations:
+            if operation == "create":
+                result.created.append(user)
+            else:
+                result.updated.append(user)
+
+    def persist_rows(self, operations, result):
+        saved_operations = []
+
+        for row_num, operation, user in operations:
+            try:
+                with transaction.atomic():
+                    user.save()
+            except Exception as e:
+                result.db_errors += 1
+                result.errors.append({"row": row_num, "errors": [str(e)]})
+                continue
+
+            saved_operations.append((row_num, operation, user))
+
+        return saved_operations
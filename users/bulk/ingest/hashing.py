@@ -0,0 +1,84 @@
+import atexit
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+
+
+_executor = None
+_executor_workers = None
+_executor_lock = threading.Lock()
+
+
+def _setup_worker():
+    import django
+
+    django.setup()
+
+
+def _hash_passwords(passwords):
+    return [make_password(password) for password in passwords]
+
+
+def get_executor(workers):
+    global _executor, _executor_workers
+
+    with _executor_lock:
+        if _executor is None or _executor_workers != workers:
+            if _executor is not None:
+                _executor.shutdown(wait=False)
+
+            # Workers are spawned rather than forked so they never inherit the
+            # locks or database connections of a threaded server process.
+            _executor = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_setup_worker,
+            )
+            _executor_workers = workers
+
+        return _executor
+
+
+def shutdown_executor():
+    global _executor
+
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=True)
+            _executor = None
+
+
+atexit.register(shutdown_executor)
+
+
+def hash_passwords(passwords, workers=None):
+    """
+    Returns the hashes of the given passwords in order. Large batches are
+    split across a process pool, since hashing is CPU bound and a single
+    process is limited by the GIL; small batches are hashed in process to
+    avoid the pool overhead.
+    """
+    passwords = list(passwords)
+
+    if workers is None:
+        workers = settings.USER_BULK_INGEST["HASH_WORKERS"]
+
+    if (
+        workers <= 1
+        or len(passwords) < settings.USER_BULK_INGEST["PARALLEL_HASH_MIN_ROWS"]
+    ):
+        return _hash_passwords(passwords)
+
+    slice_size = -(-len(passwords) // workers)
+    slices = [
+        passwords[index : index + slice_size]
+        for index in range(0, len(passwords), slice_size)
+    ]
+
+    hashes = []
+    for slice_hashes in get_executor(workers).map(_hash_passwords, slices):
+        hashes.extend(slice_hashes)
+
+    return hashes
@@ -0,0 +1,162 @@
+import csv
+import json
+from django.db import transaction
+from core.jobs import commit_chunk, job_handler
+from users.bulk.ingest.engine import UserIngestEngine
+from users.bulk.ingest.readers import CSVBatchReader
+from users.bulk.ingest.serializers import UserBulkIngestSerializer
+from users.models import User
+
+
+INGEST_JOB_KIND = "users.bulk_ingest"
+
+EMPTY_PROGRESS = {
+    "chunks": 0,
+    "rows_processed": 0,
+    "created": 0,
+    "updated": 0,
+    "validation_errors": 0,
+    "db_errors": 0,
+    "errors": 0,
+}
+
+
+def serialize_users(users, operation):
+    # Chunks outlive the request, so generated passwords are left out of them
+    # and read back from the users when the result is fetched.
+    return UserBulkIngestSerializer(
+        users, many=True, context={"operation": operation, "show_password": False}
+    ).data
+
+
+@job_handler(INGEST_JOB_KIND)
+def ingest_users_csv(job):
+    progress = {**EMPTY_PROGRESS, **job.progress}
+    engine = UserIngestEngine()
+
+    with job.input_file.open("rb") as file:
+        reader = CSVBatchReader(file)
+
+        # Rows up to the last committed chunk were already ingested by an
+        # earlier attempt.
+        reader.skip_rows(progress["rows_processed"])
+
+        try:
+            for rows in reader.batches(job.payload["batch_size"]):
+                with transaction.atomic():
+                    result = engine.ingest_chunk(rows, progress["rows_processed"] + 1)
+
+                    progress = {
+                        "chunks": progress["chunks"] + 1,
+                        "rows_processed": progress["rows_processed"]
+                        + result.total_rows,
+                        "created": progress["created"] + len(result.created),
+                        "updated": progress["updated"] + len(result.updated),
+                        "validation_errors": progress["validation_errors"]
+                        + result.validation_errors,
+                        "db_errors": progress["db_errors"] + result.db_errors,
+                        "errors": progress["errors"] + len(result.errors),
+                    }
+
+                    commit_chunk(
+                        job,
+                        progress["chunks"] - 1,
+                        {
+                            "created": serialize_users(result.created, "create"),
+                            "updated": serialize_users(result.updated, "update"),
+                            "errors": result.errors,
+                        },
+                        progress,
+                    )
+        except (UnicodeDecodeError, csv.Error) as e:
+            if isinstance(e, UnicodeDecodeError):
+                message = "Uploaded file is not a valid UTF-8 encoded text file."
+            else:
+                message = "Uploaded file does not appear to be a valid CSV."
+
+            progress = {
+                **progress,
+                "chunks": progress["chunks"] + 1,
+                "errors": progress["errors"] + 1,
+            }
+
+            with transaction.atomic():
+                commit_chunk(
+                    job,
+                    progress["chunks"] - 1,
+                    {
+                        "created": [],
+                        "updated": [],
+                        "errors": [
+                            {
+                                "row": progress["rows_processed"] + 1,
+                                "errors": [message],
+                            }
+                        ],
+                    },
+                    progress,
+                )
+
+    job.input_file.delete(save=False)
+    job.save(update_fields=["input_file"])
+
+
+def iter_result_json(job):
+    """
+    Streams the result of a finished ingest job in the same shape as the
+    synchronous response, reading one chunk at a time.
+    """
+    progress = {**EMPTY_PROGRESS, **job.progress}
+    summary = {
+        "total_rows": progress["rows_processed"],
+        "created": progress["created"],
+        "updated": progress["updated"],
+        "validation_errors": progress["validation_errors"],
+        "db_errors": progress["db_errors"],
+    }
+
+    # The summary object is left open so its errors can be streamed into it.
+    yield '{"summary": ' + json.dumps(summary)[:-1] + ', "errors": ['
+    yield from iter_chunk_items(job, "errors")
+    yield ']}, "users": {"created": ['
+    yield from iter_created_users(job)
+    yield '], "updated": ['
+    yield from iter_chunk_items(job, "updated")
+    yield "]}}"
+
+
+def iter_chunk_items(job, key):
+    separator = ""
+
+    for items in job.chunks.values_list(f"data__{key}", flat=True).iterator():
+        for item in items or []:
+            yield separator + json.dumps(item)
+            separator = ", "
+
+
+def iter_created_users(job):
+    """
+    Streams the created users with the passwords generated for them, which
+    are only returned until the users set their own.
+    """
+    separator = ""
+
+    for users in job.chunks.values_list("data__created", flat=True).iterator():
+        users = users or []
+        passwords = {}
+
+        if users:
+            passwords = dict(
+                User.objects.filter(
+                    id__in=[user["id"] for user in users],
+                    is_manually_created=True,
+                    temp_plaintext_password__isnull=False,
+                ).values_list("id", "temp_plaintext_password")
+            )
+
+        for user in users:
+            if user["id"] in passwords:
+                user = {**user, "password": passwords[user["id"]]}
+
+            yield separator + json.dumps(user)
+            separator = ", "
@@ -0,0 +1,95 @@
+import codecs
+import csv
+import io
+from functools import partial
+from itertools import chain, islice
+
+
+SNIFF_SIZE = 1024
+CHUNK_SIZE = 64 * 1024
+
+
+def iter_decoded_chunks(file, chunk_size=CHUNK_SIZE):
+    """
+    Decodes an uploaded file chunk by chunk. A multi-byte character split
+    across two chunks is held back by the decoder until it is complete.
+    """
+    decoder = codecs.getincrementaldecoder("utf-8")()
+
+    # file.chunks() returns in-memory uploads in a single piece, so the file is
+    # read in fixed-size pieces directly instead.
+    if file.seekable():
+        file.seek(0)
+
+    for chunk in iter(partial(file.read, chunk_size), b""):
+        text = decoder.decode(chunk)
+        if text:
+            yield text
+
+    text = decoder.decode(b"", final=True)
+    if text:
+        yield text
+
+
+def iter_lines(chunks):
+    pending = ""
+
+    for chunk in chunks:
+        lines = io.StringIO(pending + chunk, newline="").readlines()
+
+        # The last line may continue in the next chunk (including the "\n"
+        # of a "\r\n" split across chunks), so it is held back until then.
+        pending = lines.pop() if lines else ""
+
+        yield from lines
+
+    if pending:
+        yield pending
+
+
+class CSVBatchReader:
+    """
+    Reads rows from an uploaded CSV without holding the whole file in memory.
+    Only the first block is sniffed for the dialect; rows are then decoded and
+    parsed as they are consumed.
+
+    Raises UnicodeDecodeError or csv.Error when the first block is not valid
+    UTF-8 or CSV. The same errors can be raised later while iterating batches.
+    """
+
+    def __init__(self, file, chunk_size=CHUNK_SIZE):
+        chunks = iter_decoded_chunks(file, chunk_size)
+
+        head = []
+        head_size = 0
+
+        for chunk in chunks:
+            head.append(chunk)
+            head_size += len(chunk)
+
+            if head_size >= SNIFF_SIZE:
+                break
+
+        sample = "".join(head)
+
+        self.dialect = csv.Sniffer().sniff(sample[:SNIFF_SIZE])
+        self.reader = csv.DictReader(
+            iter_lines(chain([sample], chunks)), dialect=self.dialect
+        )
+
+    @property
+    def fieldnames(self):
+        return self.reader.fieldnames or []
+
+    def skip_rows(self, count):
+        for _ in islice(self.reader, count):
+            pass
+
+    def batches(self, batch_size):
+        while True:
+            batch = list(islice(self.reader, batch_size))
+
+            if not batch:
+                return
+
+            yield batch
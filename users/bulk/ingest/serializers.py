@@ -1,10 +1,10 @@
+from django.core.exceptions import ImproperlyConfigured
 from rest_framework import serializers
-from core.utils import generate_password
 from core.validators import (
     validate_user_name,
 )
+from permissions.access import has_permissions
 from roles.base.serializers import SimpleRoleSerializer
-from roles.models import Role
 from users.models import User
 
 
@@ -32,69 +32,51 @@ class UserBulkIngestSerializer(serializers.ModelSerializer):
         if not value:
             return None
 
-        try:
-            role = Role.objects.get(name=value)
-        except Role.DoesNotExist:
-            raise serializers.ValidationError(f"Role {value} not found.")
+        # The ingest engine resolves every role name of a chunk with one query
+        # before validating its rows, so rows never look up their own role.
+        roles = self.context.get("roles")
+        if roles is None or value not in roles:
+            raise ImproperlyConfigured(
+                "UserBulkIngestSerializer needs the role names resolved by "
+                "UserIngestEngine.resolve_roles in its 'roles' context."
+            )
 
-        has_superusers = User.superuser_exists_in_role(role)
+        role = roles[value]
 
-        if has_superusers:
-            raise serializers.ValidationError(f"Role {value} is a superuser role.")
+        if isinstance(role, str):
+            raise serializers.ValidationError(role)
 
         return role
 
-    def save(self):
-        validated_data = self.validated_data
-        name = validated_data["name"]
-        email = validated_data["email"]
-        role = validated_data.get("role")
-
-        user = User.get_by_email(email).first()
-        self.context["operation"] = "update" if user else "create"
-
-        if user:
-            user.name = name
-            user.email = email
-            user.role = role
-            user.save()
-        else:
-            generated_password = generate_password()
-
-            user = User.objects.create_user(
-                name=name,
-                email=email,
-                role=role,
-                password=generated_password,
-                is_manually_created=True,
-            )
-            user.temp_plaintext_password = generated_password
-            user.save(update_fields=["temp_plaintext_password"])
-
-        return user
-
     def to_representation(self, instance):
         representation = super().to_representation(instance)
         request = self.context.get("request")
-        requesting_user = request.user if request else None
+        show_password = self.context.get("show_password")
 
-        if not request:
+        if not request and show_password is None:
             return representation
 
         if instance.role:
-            representation["role"] = SimpleRoleSerializer(instance.role).data
+            # Rows in a bulk result share a handful of roles, so each role is
+            # serialized once per result.
+            role_representations = self.context.setdefault("role_representations", {})
+
+            if instance.role.id not in role_representations:
+                role_representations[instance.role.id] = SimpleRoleSerializer(
+                    instance.role
+                ).data
+
+            representation["role"] = role_representations[instance.role.id]
 
         operation = self.context.get("operation", None)
 
         if operation == "update":
             representation.pop("password", None)
         else:
-            has_import_user_permission = (
-                requesting_user.role
-                and requesting_user.role.has_permission("create_user")
-                and requesting_user.role.has_permission("update_user")
-            )
-            if has_import_user_permission and instance.is_manually_created:
+            if show_password is None:
+                show_password = has_permissions(request, ["create_user", "update_user"])
+
+            if show_password and instance.is_manually_created:
                 if instance.temp_plaintext_password:
                     representation["password"] = instance.temp_plaintext_password
             else:
@@ -1,10 +1,26 @@
 import io
 import csv
+import json
+import tempfile
+from functools import partial
+from unittest import mock
+from django.conf import settings
 from django.urls import reverse
+from django.core.exceptions import ImproperlyConfigured
 from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import IntegrityError, connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from rest_framework import status
 from rest_framework.test import APITestCase
+from core.jobs import claim_job, enqueue, run_job, run_next_job
+from core.models import Job, JobChunk
 from permissions.models import PermissionGroup, Permission
+from users.bulk.ingest.engine import UserIngestEngine
+from users.bulk.ingest.hashing import shutdown_executor
+from users.bulk.ingest.jobs import INGEST_JOB_KIND, ingest_users_csv
+from users.bulk.ingest.readers import CSVBatchReader
+from users.bulk.ingest.serializers import UserBulkIngestSerializer
 from users.models import User, Role
 
 
@@ -138,6 +154,12 @@ class UserBulkIngestTests(APITestCase):
 
         self.sign_in_url = reverse("sign-in")
         self.bulk_ingest_url = reverse("bulk-ingest-ingest-csv")
+        self.bulk_ingest_job_url = lambda job_id: reverse(
+            "bulk-ingest-job-status", args=[job_id]
+        )
+        self.bulk_ingest_job_result_url = lambda job_id: reverse(
+            "bulk-ingest-job-result", args=[job_id]
+        )
 
     def _create_csv_file(self, rows):
         """
@@ -281,6 +303,220 @@ class UserBulkIngestTests(APITestCase):
             response.data["detail"], "Uploaded file does not appear to be a valid CSV."
         )
 
+    @override_settings(USER_BULK_INGEST={**settings.USER_BULK_INGEST, "BATCH_SIZE": 1})
+    def test_bulk_ingest_invalid_utf8_after_first_chunk(self):
+        """
+        Test that rows before an invalid UTF-8 sequence late in the file are ingested and the failure is reported.
+        """
+        self.authenticate(
+            email=self.ingest_user_data["email"],
+            password=self.ingest_user_data["password"],
+        )
+        content = (
+            "name,email,role\n"
+            f"Bulk User 1,bulkuser1@example.com,{self.view_role.name}\n"
+            + f"Bulk User,not-an-email,{self.view_role.name}\n" * 40
+            + f"Bulk Usér 2,bulkuser2@example.com,{self.view_role.name}\n"
+        ).encode("latin-1")
+        file = SimpleUploadedFile("late_invalid.csv", content, content_type="text/csv")
+
+        with mock.patch(
+            "users.bulk.ingest.views.CSVBatchReader",
+            partial(CSVBatchReader, chunk_size=64),
+        ):
+            response = self.client.post(
+                self.bulk_ingest_url, {"file": file}, format="multipart"
+            )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["summary"]["created"], 1)
+        self.assertEqual(
+            response.data["summary"]["errors"][-1]["errors"],
+            ["Uploaded file is not a valid UTF-8 encoded text file."],
+        )
+
+    def test_bulk_ingest_async_job(self):
+        """
+        Test that an async ingest returns a job whose status and result can be fetched once a worker has run it.
+        """
+        self.authenticate(
+            email=self.ingest_user_data["email"],
+            password=self.ingest_user_data["password"],
+        )
+        file = self._create_csv_file(
+            [
+                {
+                    "name": self.bulk_user_data_1["name"],
+                    "email": self.bulk_user_data_1["email"],
+                    "role": self.view_role.name,
+                },
+                {
+                    "name": self.bulk_user_data_2["name"],
+                    "email": self.bulk_user_data_2["email"],
+                    "role": "missing",
+                },
+            ]
+        )
+
+        with tempfile.TemporaryDirectory() as media_root, override_settings(
+            MEDIA_ROOT=media_root
+        ):
+            response = self.client.post(
+                f"{self.bulk_ingest_url}?async=true", {"file": file}, format="multipart"
+            )
+            self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+            self.assertEqual(response.data["status"], "queued")
+            job_id = response.data["id"]
+
+            response = self.client.get(self.bulk_ingest_job_result_url(job_id))
+            self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+
+            self.assertTrue(run_next_job())
+
+        response = self.client.get(self.bulk_ingest_job_url(job_id))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["status"], "succeeded")
+        self.assertEqual(response.data["progress"]["rows_processed"], 2)
+        self.assertEqual(response.data["progress"]["created"], 1)
+        self.assertEqual(response.data["progress"]["validation_errors"], 1)
+
+        response = self.client.get(self.bulk_ingest_job_result_url(job_id))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        result = json.loads(b"".join(response.streaming_content))
+        self.assertEqual(result["summary"]["total_rows"], 2)
+        self.assertEqual(result["summary"]["errors"][0]["row"], 2)
+        self.assertEqual(
+            result["users"]["created"][0]["email"], self.bulk_user_data_1["email"]
+        )
+        self.assertIn("password", result["users"]["created"][0])
+
+        # Generated passwords are read from the users, never stored in chunks.
+        for chunk in JobChunk.objects.filter(job_id=job_id):
+            for user in chunk.data["created"]:
+                self.assertNotIn("password", user)
+
+    def test_bulk_ingest_stream_ndjson(self):
+        """
+        Test that the NDJSON stream mode emits one line per row in order, followed by a summary line.
+        """
+        self.authenticate(
+            email=self.ingest_user_data["email"],
+            password=self.ingest_user_data["password"],
+        )
+        file = self._create_csv_file(
+            [
+                {
+                    "name": self.bulk_user_data_1["name"],
+                    "email": self.bulk_user_data_1["email"],
+                    "role": self.view_role.name,
+                },
+                {
+                    "name": self.bulk_user_data_2["name"],
+                    "email": self.bulk_user_data_2["email"],
+                    "role": "missing",
+                },
+                {
+                    "name": self.view_user_data["name"],
+                    "email": self.view_user_data["email"],
+                    "role": self.view_role.name,
+                },
+            ]
+        )
+        response = self.client.post(
+            f"{self.bulk_ingest_url}?stream=ndjson", {"file": file}, format="multipart"
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+
+        lines = [
+            json.loads(line)
+            for line in b"".join(response.streaming_content).decode().splitlines()
+        ]
+        self.assertEqual(len(lines), 4)
+        self.assertEqual([line.get("row") for line in lines[:3]], [1, 2, 3])
+        self.assertEqual(
+            [line["status"] for line in lines[:3]], ["created", "error", "updated"]
+        )
+        self.assertEqual(lines[0]["user"]["email"], self.bulk_user_data_1["email"])
+        self.assertEqual(lines[0]["user"]["role"]["id"], self.view_role.id)
+        self.assertIn("password", lines[0]["user"])
+        self.assertNotIn("password", lines[2]["user"])
+        self.assertIn("role", lines[1]["errors"])
+        self.assertEqual(
+            lines[3]["summary"],
+            {
+                "total_rows": 3,
+                "created": 1,
+                "updated": 1,
+                "validation_errors": 1,
+                "db_errors": 0,
+            },
+        )
+
+    def test_bulk_ingest_job_hidden_from_other_users(self):
+        """
+        Test that users cannot see ingest jobs started by someone else.
+        """
+        job = Job.objects.create(kind=INGEST_JOB_KIND, created_by=self.admin_user)
+        self.authenticate(
+            email=self.ingest_user_data["email"],
+            password=self.ingest_user_data["password"],
+        )
+        response = self.client.get(self.bulk_ingest_job_url(job.id))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(response.data["detail"], "Job not found.")
+
+    def test_bulk_ingest_job_resumes_after_last_chunk(self):
+        """
+        Test that an interrupted ingest job resumes after its last committed chunk without repeating rows.
+        """
+        rows = [
+            {
+                "name": f"Bulk User {index}",
+                "email": f"bulk{index}@example.com",
+                "role": self.view_role.name,
+            }
+            for index in range(3)
+        ]
+
+        with tempfile.TemporaryDirectory() as media_root, override_settings(
+            MEDIA_ROOT=media_root
+        ):
+            job = enqueue(
+                INGEST_JOB_KIND,
+                payload={"batch_size": 1},
+                input_file=self._create_csv_file(rows),
+                created_by=self.ingest_user,
+            )
+            job = claim_job("worker-1")
+
+            ingest_chunk = UserIngestEngine.ingest_chunk
+            calls = []
+
+            def crash_on_second_chunk(engine, *args, **kwargs):
+                calls.append(args)
+                if len(calls) == 2:
+                    raise RuntimeError("Worker crashed.")
+
+                return ingest_chunk(engine, *args, **kwargs)
+
+            with mock.patch.object(
+                UserIngestEngine, "ingest_chunk", crash_on_second_chunk
+            ):
+                with self.assertRaises(RuntimeError):
+                    ingest_users_csv(job)
+
+            job.refresh_from_db()
+            self.assertEqual(job.progress["rows_processed"], 1)
+
+            run_job(job)
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.Status.SUCCEEDED)
+        self.assertEqual(job.progress["created"], 3)
+        self.assertEqual(job.chunks.count(), 3)
+        self.assertEqual(User.objects.filter(email__startswith="bulk").count(), 3)
+
     def test_bulk_ingest_csv_missing_required_columns(self):
         """
         Test that authenticated users get an appropriate error response when the uploaded file is a CSV missing one or more required columns.
@@ -1241,3 +1477,192 @@ class UserBulkIngestTests(APITestCase):
             response.data["summary"]["errors"][0]["errors"]["email"][0],
             "Enter a valid email address.",
         )
+
+
+class CSVBatchReaderTests(TestCase):
+    def test_multibyte_character_split_across_chunks(self):
+        """
+        Test that a multi-byte character split across two chunks is decoded intact.
+        """
+        content = "name,email,role\nBulk Usér,bulkuser@example.com,viewer\n"
+        file = SimpleUploadedFile("test.csv", content.encode("utf-8"))
+        split_at = content.encode("utf-8").index("é".encode("utf-8")) + 1
+
+        reader = CSVBatchReader(file, chunk_size=split_at)
+        rows = [row for batch in reader.batches(10) for row in batch]
+        self.assertEqual(rows[0]["name"], "Bulk Usér")
+
+    def test_line_endings_split_across_chunks(self):
+        """
+        Test that CRLF line endings split across chunks do not produce extra rows.
+        """
+        content = "name,email,role\r\n" + "".join(
+            f"User {index},user{index}@example.com,viewer\r\n" for index in range(50)
+        )
+        file = SimpleUploadedFile("test.csv", content.encode("utf-8"))
+
+        reader = CSVBatchReader(file, chunk_size=7)
+        rows = [row for batch in reader.batches(10) for row in batch]
+        self.assertEqual(len(rows), 50)
+        self.assertEqual(rows[-1]["email"], "user49@example.com")
+
+    def test_rows_yielded_in_fixed_size_batches(self):
+        """
+        Test that rows are yielded in batches of the requested size.
+        """
+        content = "name,email,role\n" + "".join(
+            f"User {index},user{index}@example.com,viewer\n" for index in range(25)
+        )
+        file = SimpleUploadedFile("test.csv", content.encode("utf-8"))
+
+        reader = CSVBatchReader(file)
+        self.assertEqual(reader.fieldnames, ["name", "email", "role"])
+        self.assertEqual([len(batch) for batch in reader.batches(10)], [10, 10, 5])
+
+
+class UserIngestEngineTests(TestCase):
+    def setUp(self):
+        self.view_role = Role.objects.create(name="viewer")
+        self.admin_role = Role.objects.create(name="admin")
+
+        User.objects.create_superuser(
+            name="Admin",
+            email="admin@example.com",
+            password="Admin123!",
+            role=self.admin_role,
+        )
+        self.existing_user = User.objects.create_user(
+            name="Existing User",
+            email="existing@example.com",
+            password="Existing123!",
+        )
+
+    def make_rows(self, count, role="viewer"):
+        return [
+            {
+                "name": f"Bulk User {index}",
+                "email": f"bulk{index}@example.com",
+                "role": role,
+            }
+            for index in range(count)
+        ]
+
+    def test_queries_per_chunk_independent_of_row_count(self):
+        """
+        Test that a chunk is ingested with the same number of queries regardless of its size.
+        """
+        engine = UserIngestEngine()
+
+        with CaptureQueriesContext(connection) as small_chunk_queries:
+            engine.ingest_chunk(self.make_rows(2), 1)
+
+        rows = self.make_rows(20)[2:] + [
+            {"name": "Existing User", "email": "EXISTING@example.com", "role": "viewer"}
+        ]
+        with CaptureQueriesContext(connection) as large_chunk_queries:
+            result = engine.ingest_chunk(rows, 3)
+
+        self.assertEqual(len(result.created), 18)
+        self.assertEqual(len(result.updated), 1)
+        self.assertLessEqual(len(large_chunk_queries), len(small_chunk_queries) + 1)
+
+    def test_role_validity_cached_for_file(self):
+        """
+        Test that each role name is resolved once per file and invalid roles are reported per row.
+        """
+        engine = UserIngestEngine()
+        engine.ingest_chunk(self.make_rows(1, role="admin"), 1)
+
+        with CaptureQueriesContext(connection) as queries:
+            result = engine.ingest_chunk(self.make_rows(2, role="admin"), 2)
+
+        self.assertEqual(len(queries), 0)
+        self.assertEqual(result.validation_errors, 2)
+        self.assertEqual(
+            result.errors[0]["errors"]["role"][0], "Role admin is a superuser role."
+        )
+
+    def test_padded_role_name_resolved_with_chunk(self):
+        """
+        Test that a role name with surrounding spaces is resolved with the chunk's roles.
+        """
+        engine = UserIngestEngine()
+        engine.ingest_chunk(self.make_rows(1), 1)
+
+        with CaptureQueriesContext(connection) as queries:
+            result = engine.ingest_chunk(self.make_rows(2, role=" viewer "), 2)
+
+        self.assertFalse(
+            [query for query in queries if 'FROM "roles_role"' in query["sql"]]
+        )
+        self.assertEqual(result.validation_errors, 0)
+        self.assertEqual(
+            User.objects.get(email="bulk1@example.com").role, self.view_role
+        )
+
+    def test_serializer_requires_resolved_roles(self):
+        """
+        Test that validating a role without the engine's resolved roles is reported as a configuration error.
+        """
+        serializer = UserBulkIngestSerializer(
+            data={"name": "Bulk User", "email": "bulk@example.com", "role": "viewer"}
+        )
+
+        with self.assertRaises(ImproperlyConfigured):
+            serializer.is_valid()
+
+    def test_repeated_email_in_chunk_updates_created_user(self):
+        """
+        Test that a repeated email within a chunk updates the user created by its first row.
+        """
+        rows = self.make_rows(1) + [
+            {"name": "Renamed User", "email": "bulk0@example.com", "role": ""}
+        ]
+        result = UserIngestEngine().ingest_chunk(rows, 1)
+        self.assertEqual(len(result.created), 1)
+        self.assertEqual(len(result.updated), 1)
+
+        user = User.objects.get(email="bulk0@example.com")
+        self.assertEqual(user.name, "Renamed User")
+        self.assertIsNone(user.role)
+        self.assertTrue(user.check_password(user.temp_plaintext_password))
+
+    def test_database_errors_reported_per_row(self):
+        """
+        Test that a database error fails only the offending row when a bulk write fails.
+        """
+        rows = self.make_rows(3)
+        save = User.save
+
+        def failing_save(user, *args, **kwargs):
+            if user.email == "bulk1@example.com":
+                raise IntegrityError("UNIQUE constraint failed: users_user.email")
+
+            return save(user, *args, **kwargs)
+
+        with mock.patch.object(
+            User.objects, "bulk_create", side_effect=IntegrityError
+        ), mock.patch.object(User, "save", failing_save):
+            result = UserIngestEngine().ingest_chunk(rows, 1)
+
+        self.assertEqual(len(result.created), 2)
+        self.assertEqual(result.db_errors, 1)
+        self.assertEqual(result.errors[0]["row"], 2)
+
+    @override_settings(
+        USER_BULK_INGEST={
+            **settings.USER_BULK_INGEST,
+            "HASH_WORKERS": 2,
+            "PARALLEL_HASH_MIN_ROWS": 4,
+        }
+    )
+    def test_passwords_hashed_in_process_pool(self):
+        """
+        Test that passwords hashed by the worker pool match their generated passwords.
+        """
+        result = UserIngestEngine().ingest_chunk(self.make_rows(6), 1)
+        shutdown_executor()
+
+        self.assertEqual(len(result.created), 6)
+        for user in User.objects.filter(email__startswith="bulk"):
+            self.assertTrue(user.check_password(user.temp_plaintext_password))
@@ -1,17 +1,48 @@
 import csv
-import io
+import json
+from django.conf import settings
+from django.http import StreamingHttpResponse
 from rest_framework import status, viewsets
 from rest_framework.decorators import action
+from rest_framework.exceptions import NotFound
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.parsers import MultiPartParser
+from core.jobs import enqueue
+from core.models import Job
+from core.serializers import JobSerializer
+from permissions.access import HasPermission
+from users.bulk.ingest.engine import UserIngestEngine
+from users.bulk.ingest.jobs import INGEST_JOB_KIND, iter_result_json
+from users.bulk.ingest.readers import CSVBatchReader
 from users.bulk.ingest.serializers import UserBulkIngestSerializer
 
 
 class UserBulkIngestViewSet(viewsets.GenericViewSet):
     serializer_class = UserBulkIngestSerializer
-    permission_classes = [IsAuthenticated]
+    permission_classes = [IsAuthenticated, HasPermission]
     parser_classes = [MultiPartParser]
+    required_permissions = {
+        "ingest_csv": ("create_user", "update_user"),
+        "job_status": ("create_user", "update_user"),
+        "job_result": ("create_user", "update_user"),
+    }
+    permission_denied_messages = {
+        "ingest_csv": "You do not have permission to bulk ingest users.",
+        "job_status": "You do not have permission to bulk ingest users.",
+        "job_result": "You do not have permission to bulk ingest users.",
+    }
+
+    def get_job(self, request, job_id):
+        job = Job.get_by_id(job_id).filter(kind=INGEST_JOB_KIND).first()
+
+        if not job:
+            raise NotFound("Job not found.")
+
+        if not request.user.is_superuser and job.created_by_id != request.user.id:
+            raise NotFound("Job not found.")
+
+        return job
 
     @action(
         detail=False,
@@ -19,19 +50,6 @@ class UserBulkIngestViewSet(viewsets.GenericViewSet):
         url_path="csv",
     )
     def ingest_csv(self, request):
-        requesting_user = request.user
-
-        has_import_permission = (
-            requesting_user.role
-            and requesting_user.role.has_permissions(["create_user", "update_user"])
-        )
-
-        if not has_import_permission:
-            return Response(
-                {"detail": "You do not have permission to bulk ingest users."},
-                status=status.HTTP_403_FORBIDDEN,
-            )
-
         file = request.FILES.get("file")
 
         if not file:
@@ -40,19 +58,13 @@ class UserBulkIngestViewSet(viewsets.GenericViewSet):
             )
 
         try:
-            decoded_file = file.read().decode("utf-8")
+            reader = CSVBatchReader(file)
+            fieldnames = reader.fieldnames
         except UnicodeDecodeError:
             return Response(
                 {"detail": "Uploaded file is not a valid UTF-8 encoded text file."},
                 status=status.HTTP_400_BAD_REQUEST,
             )
-
-        csv_file = io.StringIO(decoded_file)
-
-        try:
-            dialect = csv.Sniffer().sniff(decoded_file[:1024])
-            csv_file.seek(0)
-            reader = csv.DictReader(csv_file, dialect=dialect)
         except csv.Error:
             return Response(
                 {"detail": "Uploaded file does not appear to be a valid CSV."},
@@ -60,12 +72,31 @@ class UserBulkIngestViewSet(viewsets.GenericViewSet):
             )
 
         required_columns = {"name", "email", "role"}
-        if not required_columns.issubset(reader.fieldnames):
+        if not required_columns.issubset(fieldnames):
             return Response(
                 {"detail": "CSV must include these columns: name, email, role."},
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
+        if request.query_params.get("async", "").lower() in ("1", "true"):
+            job = enqueue(
+                INGEST_JOB_KIND,
+                payload={"batch_size": settings.USER_BULK_INGEST["BATCH_SIZE"]},
+                input_file=file,
+                created_by=request.user,
+            )
+
+            return Response(JobSerializer(job).data, status=status.HTTP_202_ACCEPTED)
+
+        batch_size = settings.USER_BULK_INGEST["BATCH_SIZE"]
+        engine = UserIngestEngine(self.get_serializer_context())
+
+        if request.query_params.get("stream", "").lower() == "ndjson":
+            return StreamingHttpResponse(
+                self.iter_ndjson(engine, reader.batches(batch_size)),
+                content_type="application/x-ndjson",
+            )
+
         summary = {
             "total_rows": 0,
             "created": 0,
@@ -78,35 +109,28 @@ class UserBulkIngestViewSet(viewsets.GenericViewSet):
         created_users = []
         updated_users = []
 
-        # Do not count the CSV headers row as a row
-        for row_num, row in enumerate(reader, start=1):
-            summary["total_rows"] += 1
-
-            serializer_context = self.get_serializer_context()
-
-            serializer = self.get_serializer(data=row, context=serializer_context)
-            if not serializer.is_valid():
-                summary["validation_errors"] += 1
-                summary["errors"].append({"row": row_num, "errors": serializer.errors})
-                continue
-
-            try:
-                user = serializer.save()
-                operation = serializer.context.get("operation", None)
-                serializer_context.update({"operation": operation})
-                serialized_user = self.get_serializer(
-                    user, context=serializer_context
-                ).data
-
-                if operation == "create":
-                    created_users.append(serialized_user)
-                    summary["created"] += 1
-                elif operation == "update":
-                    updated_users.append(serialized_user)
-                    summary["updated"] += 1
-            except Exception as e:
-                summary["db_errors"] += 1
-                summary["errors"].append({"row": row_num, "errors": [str(e)]})
+        # Rows are read, validated and saved one batch at a time so memory use
+        # is bounded by the batch size rather than the file size. A file that
+        # turns out to be malformed part way through keeps the rows ingested
+        # before the bad batch.
+        try:
+            # Do not count the CSV headers row as a row
+            for result in engine.ingest(reader.batches(batch_size)):
+                self.add_chunk_result(result, summary, created_users, updated_users)
+        except UnicodeDecodeError:
+            summary["errors"].append(
+                {
+                    "row": summary["total_rows"] + 1,
+                    "errors": ["Uploaded file is not a valid UTF-8 encoded text file."],
+                }
+            )
+        except csv.Error:
+            summary["errors"].append(
+                {
+                    "row": summary["total_rows"] + 1,
+                    "errors": ["Uploaded file does not appear to be a valid CSV."],
+                }
+            )
 
         response_data = {
             "summary": summary,
@@ -114,3 +138,130 @@ class UserBulkIngestViewSet(viewsets.GenericViewSet):
         }
 
         return Response(response_data)
+
+    @action(
+        detail=False,
+        methods=["get"],
+        url_path=r"jobs/(?P<job_id>[0-9]+)",
+    )
+    def job_status(self, request, job_id=None):
+        job = self.get_job(request, job_id)
+
+        return Response(JobSerializer(job).data)
+
+    @action(
+        detail=False,
+        methods=["get"],
+        url_path=r"jobs/(?P<job_id>[0-9]+)/result",
+    )
+    def job_result(self, request, job_id=None):
+        job = self.get_job(request, job_id)
+
+        if job.status == Job.Status.FAILED:
+            return Response(
+                {"detail": "Job failed.", "error": job.error},
+                status=status.HTTP_409_CONFLICT,
+            )
+
+        if job.status != Job.Status.SUCCEEDED:
+            return Response(
+                {"detail": "Job has not finished yet."},
+                status=status.HTTP_409_CONFLICT,
+            )
+
+        response = StreamingHttpResponse(
+            iter_result_json(job), content_type="application/json"
+        )
+        response["Content-Disposition"] = (
+            f'attachment; filename="bulk-ingest-{job.id}.json"'
+        )
+
+        return response
+
+    def iter_ndjson(self, engine, batches):
+        """
+        Yields one JSON line per row as soon as its chunk is committed, then a
+        final summary line.
+        """
+        summary = {
+            "total_rows": 0,
+            "created": 0,
+            "updated": 0,
+            "validation_errors": 0,
+            "db_errors": 0,
+        }
+
+        serializer_context = self.get_serializer_context()
+        contexts = {
+            "create": {**serializer_context, "operation": "create"},
+            "update": {**serializer_context, "operation": "update"},
+        }
+        statuses = {"create": "created", "update": "updated"}
+
+        try:
+            for result in engine.ingest(batches):
+                summary["total_rows"] += result.total_rows
+                summary["created"] += len(result.created)
+                summary["updated"] += len(result.updated)
+                summary["validation_errors"] += result.validation_errors
+                summary["db_errors"] += result.db_errors
+
+                lines = [
+                    (
+                        row_num,
+                        {
+                            "row": row_num,
+                            "status": statuses[operation],
+                            "user": self.get_serializer(
+                                user, context=contexts[operation]
+                            ).data,
+                        },
+                    )
+                    for row_num, operation, user in result.operations
+                ]
+                lines.extend(
+                    (error["row"], {"status": "error", **error})
+                    for error in result.errors
+                )
+                lines.sort(key=lambda line: line[0])
+
+                yield "".join(json.dumps(line) + "\n" for _, line in lines)
+        except (UnicodeDecodeError, csv.Error) as e:
+            if isinstance(e, UnicodeDecodeError):
+                message = "Uploaded file is not a valid UTF-8 encoded text file."
+            else:
+                message = "Uploaded file does not appear to be a valid CSV."
+
+            line = {
+                "row": summary["total_rows"] + 1,
+                "status": "error",
+                "errors": [message],
+            }
+            yield json.dumps(line) + "\n"
+
+        yield json.dumps({"summary": summary}) + "\n"
+
+    def add_chunk_result(self, result, summary, created_users, updated_users):
+        summary["total_rows"] += result.total_rows
+        summary["created"] += len(result.created)
+        summary["updated"] += len(result.updated)
+        summary["validation_errors"] += result.validation_errors
+        summary["db_errors"] += result.db_errors
+        summary["errors"].extend(result.errors)
+
+        serializer_context = self.get_serializer_context()
+
+        created_users.extend(
+            self.get_serializer(
+                result.created,
+                many=True,
+                context={**serializer_context, "operation": "create"},
+            ).data
+        )
+        updated_users.extend(
+            self.get_serializer(
+                result.updated,
+                many=True,
+                context={**serializer_context, "operation": "update"},
+            ).data
+        )
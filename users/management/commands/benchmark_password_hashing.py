@@ -0,0 +1,56 @@
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from core.utils import generate_password
+from users.bulk.ingest.hashing import hash_passwords, shutdown_executor
+
+
+class Command(BaseCommand):
+    help = "Compare serial and parallel password hashing throughput for bulk ingest."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--sizes",
+            default="1000,10000,50000",
+            help="Comma-separated numbers of passwords to hash.",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=settings.USER_BULK_INGEST["HASH_WORKERS"],
+            help="Number of worker processes for the parallel run.",
+        )
+
+    def handle(self, *args, **kwargs):
+        sizes = [int(size) for size in kwargs["sizes"].split(",")]
+        workers = kwargs["workers"]
+
+        # Start the pool before timing so worker start-up is not counted.
+        hash_passwords(
+            [generate_password()]
+            * max(workers, settings.USER_BULK_INGEST["PARALLEL_HASH_MIN_ROWS"]),
+            workers=workers,
+        )
+
+        try:
+            for size in sizes:
+                passwords = [generate_password() for _ in range(size)]
+
+                serial = self.run(passwords, workers=1)
+                parallel = self.run(passwords, workers=workers)
+
+                self.stdout.write(
+                    f"{size} rows: serial {size / serial:.0f} rows/s ({serial:.2f}s), "
+                    f"{workers} workers {size / parallel:.0f} rows/s ({parallel:.2f}s)"
+                )
+                self.stdout.write(
+                    self.style.SUCCESS(f"Speedup: {serial / parallel:.1f}x.")
+                )
+        finally:
+            shutdown_executor()
+
+    def run(self, passwords, workers):
+        start = time.perf_counter()
+        hash_passwords(passwords, workers=workers)
+
+        return time.perf_counter() - start
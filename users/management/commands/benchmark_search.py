@@ -0,0 +1,98 @@
+import random
+import time
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from core.search import BasicSearchBackend, get_backend
+from roles.models import Role
+from users.models import User
+from users.search import user_search_index
+
+
+FIRST_NAMES = ["Ada", "Grace", "Alan", "Edsger", "Barbara", "Donald", "Frances"]
+LAST_NAMES = ["Lovelace", "Hopper", "Turing", "Dijkstra", "Liskov", "Knuth", "Allen"]
+
+
+class Command(BaseCommand):
+    help = "Compare user search latency of the configured search backend and plain substring matching."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--users",
+            type=int,
+            default=100000,
+            help="Number of synthetic users to search through.",
+        )
+        parser.add_argument(
+            "--queries",
+            default="turing,hopper7,user4242@,engineer,zz-no-match",
+            help="Comma-separated search queries.",
+        )
+        parser.add_argument(
+            "--repeat",
+            type=int,
+            default=20,
+            help="Number of times each query is run per backend.",
+        )
+
+    def handle(self, *args, **kwargs):
+        queries = kwargs["queries"].split(",")
+        repeat = kwargs["repeat"]
+        backend = get_backend(user_search_index)
+        basic = BasicSearchBackend()
+
+        # The synthetic users are rolled back once the benchmark is done.
+        with transaction.atomic():
+            self.create_users(kwargs["users"])
+
+            self.stdout.write(f"Users: {kwargs['users']}, backend: {backend.name}")
+
+            for query in queries:
+                indexed, count = self.run(backend, query, repeat)
+                scanned, _ = self.run(basic, query, repeat)
+
+                self.stdout.write(
+                    f"{query!r} ({count} matches): {backend.name} {indexed:.2f} ms, "
+                    f"{basic.name} {scanned:.2f} ms"
+                )
+                self.stdout.write(
+                    self.style.SUCCESS(f"Speedup: {scanned / indexed:.1f}x.")
+                )
+
+            transaction.set_rollback(True)
+
+    def create_users(self, count):
+        rng = random.Random(0)
+        roles = [
+            Role.objects.create(name=f"benchmark-{name}")
+            for name in ("engineer", "designer", "manager")
+        ]
+        # Hashing a password per user would dominate the set-up time.
+        password = make_password(None)
+
+        User.objects.bulk_create(
+            (
+                User(
+                    name=f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}{index}",
+                    email=f"user{index}@example.com",
+                    password=password,
+                    role=rng.choice(roles),
+                )
+                for index in range(count)
+            ),
+            batch_size=5000,
+        )
+        user_search_index.rebuild()
+
+    def run(self, backend, query, repeat):
+        queryset = User.objects.select_related("role")
+
+        start = time.perf_counter()
+
+        for _ in range(repeat):
+            results = backend.search(user_search_index, queryset, query)
+            # A search box shows the first page and the number of matches.
+            list(results[:10])
+            count = results.count()
+
+        return (time.perf_counter() - start) / repeat * 1000, count
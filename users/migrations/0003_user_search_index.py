@@ -0,0 +1,27 @@
+import core.search
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("roles", "0002_role_version"),
+        ("users", "0002_user_email_lower_idx"),
+    ]
+
+    operations = [
+        core.search.CreateSearchIndex(
+            name="users",
+            columns=["name", "email", "role_name"],
+            populate_sql=(
+                "SELECT users_user.id, users_user.name, users_user.email, "
+                "COALESCE(roles_role.name, '') FROM users_user "
+                "LEFT JOIN roles_role ON roles_role.id = users_user.role_id"
+            ),
+            trigram_columns=[
+                ("users_user", "name"),
+                ("users_user", "email"),
+                ("roles_role", "name"),
+            ],
+        ),
+    ]
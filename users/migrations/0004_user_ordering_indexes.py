@@ -0,0 +1,25 @@
+# Generated by Django 5.2 on 2026-10-17 01:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("auth", "0012_alter_user_first_name_max_length"),
+        ("roles", "0002_role_version"),
+        ("users", "0003_user_search_index"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="user",
+            index=models.Index(
+                fields=["role", "name", "id"], name="user_role_name_id_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="user",
+            index=models.Index(fields=["name", "id"], name="user_name_id_idx"),
+        ),
+    ]
@@ -1,10 +1,16 @@
 from django.db import models
+from django.db.models.functions import Lower
 from django.utils import timezone
 from django.contrib.auth.models import UserManager, AbstractBaseUser, PermissionsMixin
 from core.utils import normalize_string
 from roles.models import Role
 
 
+# Enables email__lower lookups, which match the functional index on
+# LOWER(email) where email__iexact cannot use an index.
+models.CharField.register_lookup(Lower)
+
+
 class CustomUserManager(UserManager):
     def _create_user(
         self, name, email, password, is_manually_created=False, **extra_fields
@@ -63,6 +69,12 @@ class User(AbstractBaseUser, PermissionsMixin):
     class Meta:
         verbose_name = "User"
         verbose_name_plural = "Users"
+        indexes = [
+            models.Index(Lower("email"), name="user_email_lower_idx"),
+            # Back the orderings users can be paginated by with a cursor.
+            models.Index(fields=["role", "name", "id"], name="user_role_name_id_idx"),
+            models.Index(fields=["name", "id"], name="user_name_id_idx"),
+        ]
 
     def __str__(self):
         return f"{self.name} ({self.email})"
@@ -77,11 +89,11 @@ class User(AbstractBaseUser, PermissionsMixin):
 
     @classmethod
     def exists_by_email(cls, email):
-        return cls.objects.filter(email__iexact=email).exists()
+        return cls.get_by_email(email).exists()
 
     @classmethod
     def exists_in_emails(cls, emails):
-        return any(cls.exists_by_email(email) for email in emails)
+        return cls.get_by_emails(emails).exists()
 
     @classmethod
     def exists_by_role(cls, role):
@@ -109,11 +121,13 @@ class User(AbstractBaseUser, PermissionsMixin):
 
     @classmethod
     def get_by_email(cls, email):
-        return cls.objects.filter(email__iexact=email)
+        return cls.objects.filter(email__lower=normalize_string(email))
 
     @classmethod
     def get_by_emails(cls, emails):
-        return cls.objects.filter(email__in=emails)
+        return cls.objects.filter(
+            email__lower__in={normalize_string(email) for email in emails}
+        )
 
     @classmethod
     def get_by_role(cls, role):
@@ -4,6 +4,7 @@ from rest_framework.decorators import action
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.exceptions import NotFound, PermissionDenied
+from permissions.access import has_permission
 from users.models import User
 from users.password.serializers import UserPasswordSerializer
 
@@ -54,7 +55,6 @@ class UserPasswordViewSet(viewsets.GenericViewSet):
 
     @action(detail=True, methods=["post"], url_path="password/set")
     def set_password(self, request, *args, **kwargs):
-        requesting_user = request.user
         target_user = self.get_object()
 
         is_self = request.user.id == target_user.id
@@ -64,11 +64,7 @@ class UserPasswordViewSet(viewsets.GenericViewSet):
                 "Use the change password endpoint to update your own password."
             )
 
-        has_update_permission = (
-            requesting_user.role and requesting_user.role.has_permission("update_user")
-        )
-
-        if not has_update_permission:
+        if not has_permission(request, "update_user"):
             raise PermissionDenied(
                 "You do not have permission to set password for another user."
             )
@@ -0,0 +1,12 @@
+from core.search import SearchIndex
+from roles.models import Role
+from users.models import User
+
+
+user_search_index = SearchIndex(
+    "users",
+    User,
+    {"name": "name", "email": "email", "role_name": "role__name"},
+    dependencies={Role: "role"},
+)
+user_search_index.connect()